@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark analytics.py on a synthetic season of minute-level snapshots
+Usage: python3 benchmarks/bench_analytics.py [snapshots] [lifts] [stored snapshots]
+
+The matrix operations run on a full season of arrays, and the season is
+also loaded from importer day partitions (load_archive_matrix). The
+per-run load path (frames_to_matrix, and load_snapshot_matrix reading one
+CSV object per run from an in-memory sink) runs on `stored snapshots`
+real per-run frames; its season estimate scales that linearly.
+"""
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from analytics import SnapshotMatrix, archive_key, frames_to_matrix, load_archive_matrix, load_snapshot_matrix
+from export import build_series
+from lift_schema import STATUS_LABELS, LiftStatus
+from sinks import MemorySink, write_df
+
+
+def synthetic_long_arrays(snapshots, lifts, seed=0):
+    """Generate long-format arrays for a season of minute snapshots"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2025-12-01T08:00:00', 's')
+    times = start + np.arange(snapshots) * np.timedelta64(60, 's')
+    
+    time_index = np.repeat(np.arange(snapshots), lifts)
+    lift_ids = np.tile(np.arange(lifts), snapshots)
+    wait = rng.integers(0, 30, size=snapshots * lifts).astype(np.float32)
+    wait[rng.random(wait.size) < 0.3] = np.nan
+    status = rng.integers(0, 6, size=snapshots * lifts).astype(np.int8)
+    return times, time_index, lift_ids, wait, status
+
+
+def synthetic_snapshots(snapshots, lifts, seed=0):
+    """Generate (timestamp, status_df, wait_time_df) tuples shaped like the scraper's output"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 12, 1, 8, 0, tzinfo=timezone.utc)
+    labels = np.array([STATUS_LABELS[status] for status in LiftStatus])
+    lift_ids = np.arange(lifts, dtype=np.int32)
+    names = [f"Lift {i}" for i in range(lifts)]
+    result = []
+    for index in range(snapshots):
+        status_df = pd.DataFrame({"Map ID": 152, "Lift ID": lift_ids, "Lift": names,
+                                  "Status": labels[rng.integers(0, len(labels), lifts)], "Status Detail": None})
+        wait = pd.array(rng.integers(0, 30, lifts), dtype="Int16")
+        wait[rng.random(lifts) < 0.3] = pd.NA
+        wait_time_df = pd.DataFrame({"Map ID": 152, "Lift ID": lift_ids, "Lift": names, "Wait Time": wait})
+        result.append((start + timedelta(minutes=index), status_df, wait_time_df))
+    return result
+
+
+def stored_sink(snapshots):
+    """Write snapshots to an in-memory sink as status_/wait_time_ CSV pairs"""
+    sink = MemorySink()
+    for timestamp, status_df, wait_time_df in snapshots:
+        label = timestamp.strftime('%Y%m%d_%H%M%S')
+        write_df(sink, status_df, f"status_{label}.csv")
+        write_df(sink, wait_time_df, f"wait_time_{label}.csv")
+    return sink
+
+
+def archive_sink(snapshots, lifts, seed=0):
+    """Write a season of minute snapshots as importer day partitions (archive/YYYYMMDD.csv)"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2025-12-01 08:00', periods=snapshots, freq='min')
+    labels = np.array([STATUS_LABELS[status] for status in LiftStatus])
+    names = np.array([f"Lift {i}" for i in range(lifts)])
+    sink = MemorySink()
+    for day, day_times in pd.Series(times).groupby(times.strftime('%Y%m%d')):
+        count = len(day_times) * lifts
+        wait = pd.array(rng.integers(0, 30, count), dtype="Int16")
+        wait[rng.random(count) < 0.3] = pd.NA
+        write_df(sink, pd.DataFrame({
+            "Time": np.repeat(day_times.dt.strftime('%Y%m%d_%H%M%S').to_numpy(), lifts),
+            "Map ID": 152,
+            "Lift ID": np.tile(np.arange(lifts, dtype=np.int32), len(day_times)),
+            "Lift": np.tile(names, len(day_times)),
+            "Status": labels[rng.integers(0, len(labels), count)],
+            "Status Detail": None,
+            "Wait Time": wait,
+        }), archive_key(day))
+    return sink
+
+
+def timed(label, func):
+    """Run func once and print its wall time"""
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<28} {time.perf_counter() - started:8.3f} s")
+    return result
+
+
+if __name__ == "__main__":
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 150_000
+    lifts = int(sys.argv[2]) if len(sys.argv) > 2 else 45
+    stored = int(sys.argv[3]) if len(sys.argv) > 3 else 5_000
+    
+    print("=" * 70)
+    print(f"ANALYTICS BENCHMARK: {snapshots} snapshots x {lifts} lifts")
+    print("=" * 70)
+    
+    arrays = synthetic_long_arrays(snapshots, lifts)
+    matrix = timed("build matrix", lambda: SnapshotMatrix.from_long(*arrays))
+    timed("rolling mean (60)", lambda: matrix.rolling_mean(60))
+    timed("percentiles (50/90/99)", lambda: matrix.percentile([50, 90, 99]))
+    timed("uptime fraction", matrix.uptime_fraction)
+    timed("hourly mean", matrix.resample_mean)
+    timed("LTTB export (500 pts)", lambda: build_series(matrix, 500, "lttb"))
+    timed("min/max export (500 pts)", lambda: build_series(matrix, 500, "minmax"))
+    
+    archive = archive_sink(snapshots, lifts)
+    loaded = timed(f"load_archive_matrix ({snapshots})", lambda: load_archive_matrix(sink=archive))
+    assert loaded.wait.shape == (lifts, snapshots)
+    
+    frames = synthetic_snapshots(stored, lifts)
+    timed(f"frames_to_matrix ({stored})", lambda: frames_to_matrix(frames))
+    sink = stored_sink(frames)
+    started = time.perf_counter()
+    timed(f"load_snapshot_matrix ({stored})", lambda: load_snapshot_matrix(sink=sink))
+    print(f"{'  per-run season estimate':<28} {(time.perf_counter() - started) * snapshots / stored:8.1f} s")
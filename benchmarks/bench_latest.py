@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark the latest-state HTTP server with keep-alive clients
+Usage: python3 benchmarks/bench_latest.py [requests_per_client] [clients]
+"""
+import http.client
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from latest import LatestCache, make_handler
+
+
+def sample_document(lifts=45):
+    """Latest document shaped like two resorts' worth of lifts"""
+    return {
+        "updated": "2026-01-02T09:30:00+00:00",
+        "resorts": {
+            str(map_id): {"lifts": [
+                {"id": i, "name": f"Lift {i}", "status": "Open", "detail": None, "wait": i % 15}
+                for i in range(lifts // 2)
+            ]}
+            for map_id in (152, 1446)
+        },
+    }
+
+
+def client(port, count, headers):
+    """Issue count sequential GETs over one connection"""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    for _ in range(count):
+        connection.request('GET', '/latest', headers=headers)
+        connection.getresponse().read()
+    connection.close()
+
+
+if __name__ == "__main__":
+    per_client = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    
+    cache = LatestCache()
+    cache.update(sample_document())
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(cache))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    etag = cache.response('/latest')[1]['ETag']
+    
+    print("=" * 70)
+    print(f"LATEST SERVER BENCHMARK: {clients} clients x {per_client} requests")
+    print("=" * 70)
+    for label, headers in (("gzip 200", {'Accept-Encoding': 'gzip'}), ("304 revalidate", {'If-None-Match': etag})):
+        threads = [threading.Thread(target=client, args=(port, per_client, headers)) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<20} {clients * per_client / elapsed:10.0f} req/s")
+    
+    server.shutdown()
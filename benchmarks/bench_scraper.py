@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark lambda_handler against a local server of synthetic resort payloads
+Usage: python3 benchmarks/bench_scraper.py [--maps N] [--lifts N] [--repeats N] [--warm N] [--no-record]
+
+Each repeat runs in a fresh interpreter, so import time, the cold
+invocation and peak RSS are measured as a new Lambda container would see
+them. Results are appended to the history store (see history.py).
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from history import RESULTS_PATH, record_run
+
+
+SRC = Path(__file__).parent.parent / "src"
+
+
+def synthetic_payload(map_id, lifts, run):
+    """Map payload shaped like the resort API; waits change every run so nothing is deduplicated"""
+    return {
+        "lifts": [
+            {"id": f"{map_id}-{i}", "name": f"Lift {i}", "status": "Open" if (i + run) % 5 else "Closed",
+             "waitTime": (i * 7 + run) % 30}
+            for i in range(lifts)
+        ],
+        "trails": [{"name": f"Trail {i}", "status": "Open"} for i in range(lifts)],
+    }
+
+
+def serve_payloads(lifts):
+    """Start a local server answering /api/maps/{id}; returns the URL template and server"""
+    runs = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            map_id = int(self.path.rsplit('/', 1)[1])
+            with lock:
+                runs[map_id] = runs.get(map_id, 0) + 1
+            body = json.dumps(synthetic_payload(map_id, lifts, runs[map_id])).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/api/maps/{{map_id}}", server
+
+
+def child(maps, lifts, warm):
+    """One cold container: import, one cold invocation, then warm ones; prints JSON"""
+    url, server = serve_payloads(lifts)
+    output_dir = tempfile.mkdtemp(prefix="bench-scraper-")
+    os.environ['OUTPUT_DIR'] = output_dir
+    os.environ.pop('S3_BUCKET', None)
+    sys.path.insert(0, str(SRC))
+
+    started = time.perf_counter()
+    import scraper
+    import_seconds = time.perf_counter() - started
+
+    scraper.MAP_URL = url
+    event = {"map_ids": list(range(1, maps + 1))}
+    # Keep the per-run log out of the measurement output
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        timings = []
+        for _ in range(warm + 1):
+            started = time.perf_counter()
+            response = scraper.lambda_handler(event, None)
+            timings.append(time.perf_counter() - started)
+            if response['statusCode'] != 200:
+                raise RuntimeError(response['body'])
+            # One snapshot per second at most; keep keys distinct
+            time.sleep(max(0.0, 1.0 - timings[-1]))
+    finally:
+        sys.stdout = stdout
+        server.shutdown()
+
+    warm_seconds = statistics.median(timings[1:]) if warm else timings[0]
+    print(json.dumps({
+        "import_seconds": import_seconds,
+        "cold_handler_seconds": timings[0],
+        "warm_handler_seconds": warm_seconds,
+        "maps_per_second": maps / warm_seconds,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark lambda_handler and record the results")
+    parser.add_argument('--maps', type=int, default=20, help="Resorts per invocation")
+    parser.add_argument('--lifts', type=int, default=45, help="Lifts per resort")
+    parser.add_argument('--repeats', type=int, default=5, help="Fresh interpreters (samples per metric)")
+    parser.add_argument('--warm', type=int, default=3, help="Warm invocations per interpreter")
+    parser.add_argument('--results', default=str(RESULTS_PATH), help="Results store (JSON lines)")
+    parser.add_argument('--no-record', action='store_true', help="Print results without storing them")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.maps, args.lifts, args.warm)
+        sys.exit(0)
+
+    print("=" * 70)
+    print(f"SCRAPER BENCHMARK: {args.maps} maps x {args.lifts} lifts, {args.repeats} cold starts")
+    print("=" * 70)
+
+    samples = {}
+    for _ in range(args.repeats):
+        result = subprocess.run(
+            [sys.executable, __file__, '--child', '--maps', str(args.maps), '--lifts', str(args.lifts),
+             '--warm', str(args.warm)],
+            capture_output=True, text=True, check=True,
+        )
+        for name, value in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            samples.setdefault(name, []).append(value)
+
+    for name, values in samples.items():
+        print(f"{name:<28} median {statistics.median(values):10.4f}  (min {min(values):.4f}, max {max(values):.4f})")
+
+    if not args.no_record:
+        record = record_run(samples, args.results)
+        print(f"Recorded version {record['version']} on machine {record['machine']['id']} to {args.results}")
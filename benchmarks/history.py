@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark result history and regression report
+Usage: python3 benchmarks/history.py [--results PATH] [--window N] [--alpha P] [--min-effect F]
+
+Each benchmark run appends one JSON line (version, machine fingerprint,
+samples per metric) to the results store. The report compares the newest
+run with the previous runs on the same machine and exits 1 when a metric
+got significantly worse.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+
+RESULTS_PATH = Path(__file__).parent / "results" / "history.jsonl"
+
+# Metric name -> (unit, True when lower is better)
+METRICS = {
+    "import_seconds": ("s", True),
+    "cold_handler_seconds": ("s", True),
+    "warm_handler_seconds": ("s", True),
+    "maps_per_second": ("maps/s", False),
+    "peak_rss_mb": ("MB", True),
+}
+
+# Runs in the rolling baseline
+DEFAULT_WINDOW = 5
+DEFAULT_ALPHA = 0.05
+# Changes smaller than this fraction of the baseline median are never flagged
+DEFAULT_MIN_EFFECT = 0.05
+
+
+def _cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _memory_mb():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def machine_fingerprint():
+    """
+    Describe the machine and interpreter; runs are only compared within one fingerprint.
+
+    Returns:
+        dict: the fields, plus "id", a short hash of them
+    """
+    machine = {
+        "system": platform.system(),
+        "arch": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count(),
+        "memory_mb": _memory_mb(),
+        "python": f"{platform.python_implementation()} {sys.version_info.major}.{sys.version_info.minor}",
+    }
+    machine["id"] = hashlib.sha1(json.dumps(machine, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return machine
+
+
+def read_version(root=Path(__file__).parent.parent):
+    """Contents of VERSION, or 'unknown'"""
+    try:
+        return (root / "VERSION").read_text().strip()
+    except OSError:
+        return 'unknown'
+
+
+def git_commit():
+    """Short hash of HEAD, or None outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_run(metrics, path=RESULTS_PATH, version=None, machine=None):
+    """
+    Append one run to the results store.
+
+    Args:
+        metrics: dict of metric name -> list of samples
+        path: JSON-lines results file (created if missing)
+
+    Returns:
+        dict: the stored record
+    """
+    record = {
+        "time": datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S'),
+        "version": version or read_version(),
+        "commit": git_commit(),
+        "machine": machine or machine_fingerprint(),
+        "metrics": {name: [float(sample) for sample in samples] for name, samples in metrics.items()},
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+    return record
+
+
+def load_history(path=RESULTS_PATH):
+    """All stored runs, oldest first (an empty list when the store does not exist)"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def mann_whitney_p(current, baseline):
+    """
+    Two-sided p-value of the Mann-Whitney U test (normal approximation with tie correction).
+
+    Rank-based, so a single noisy sample cannot dominate the way it can in a t-test.
+    """
+    current = np.asarray(current, dtype=np.float64)
+    baseline = np.asarray(baseline, dtype=np.float64)
+    n1, n2 = len(current), len(baseline)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+
+    combined = np.concatenate([current, baseline])
+    order = np.argsort(combined, kind='stable')
+    ranks = np.empty(len(combined))
+    ranks[order] = np.arange(1, len(combined) + 1)
+    # Average the ranks of tied values
+    _, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    ranks = (np.bincount(inverse, weights=ranks) / counts)[inverse]
+
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - (counts ** 3 - counts).sum() / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def compare(history, window=DEFAULT_WINDOW, alpha=DEFAULT_ALPHA, min_effect=DEFAULT_MIN_EFFECT):
+    """
+    Compare the newest run with the previous `window` runs on the same machine.
+
+    A metric is a regression when it moved in the worse direction by more
+    than min_effect (relative to the baseline median) and the difference is
+    significant at alpha; a significant move the other way is an improvement.
+
+    Returns:
+        tuple: (newest run or None, baseline runs, list of per-metric dicts)
+    """
+    if not history:
+        return None, [], []
+    current = history[-1]
+    same_machine = [run for run in history[:-1] if run["machine"]["id"] == current["machine"]["id"]]
+    baseline = same_machine[-window:]
+
+    rows = []
+    for name, samples in current["metrics"].items():
+        pooled = [sample for run in baseline for sample in run["metrics"].get(name, [])]
+        unit, lower_is_better = METRICS.get(name, ("", True))
+        row = {"metric": name, "unit": unit, "current": float(np.median(samples)), "baseline": None,
+               "change": None, "p": None, "verdict": "no baseline"}
+        if pooled:
+            row["baseline"] = float(np.median(pooled))
+            row["change"] = (row["current"] - row["baseline"]) / row["baseline"] if row["baseline"] else 0.0
+            row["p"] = mann_whitney_p(samples, pooled)
+            worse = row["change"] > min_effect if lower_is_better else row["change"] < -min_effect
+            better = row["change"] < -min_effect if lower_is_better else row["change"] > min_effect
+            significant = row["p"] < alpha
+            row["verdict"] = "REGRESSION" if worse and significant else "improved" if better and significant else "ok"
+        rows.append(row)
+    return current, baseline, rows
+
+
+def format_report(current, baseline, rows):
+    """Human-readable comparison table"""
+    if current is None:
+        return "No benchmark results recorded yet"
+    versions = sorted({run["version"] for run in baseline})
+    lines = [
+        f"Version {current['version']} ({current['time']}, machine {current['machine']['id']}) "
+        f"vs {len(baseline)} previous runs (versions {', '.join(versions) or '-'})",
+        f"{'metric':<24} {'current':>14} {'baseline':>14} {'change':>8} {'p':>7}  verdict",
+    ]
+    for row in rows:
+        current_text = f"{row['current']:.4g} {row['unit']}"
+        baseline_text = "-" if row["baseline"] is None else f"{row['baseline']:.4g} {row['unit']}"
+        change_text = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        p_text = "-" if row["p"] is None else f"{row['p']:.3f}"
+        lines.append(f"{row['metric']:<24} {current_text:>14} {baseline_text:>14} "
+                     f"{change_text:>8} {p_text:>7}  {row['verdict']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report benchmark regressions against a rolling baseline")
+    parser.add_argument('--results', default=str(RESULTS_PATH), help="Results store (JSON lines)")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help="Previous runs in the baseline")
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Significance level")
+    parser.add_argument('--min-effect', type=float, default=DEFAULT_MIN_EFFECT,
+                        help="Smallest relative change worth flagging")
+    args = parser.parse_args()
+
+    current, baseline, rows = compare(load_history(args.results), args.window, args.alpha, args.min_effect)
+    print(format_report(current, baseline, rows))
+    regressions = [row["metric"] for row in rows if row["verdict"] == "REGRESSION"]
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
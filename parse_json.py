@@ -1,72 +1,48 @@
-import requests
-import json
+import os
+import sys
+from datetime import datetime, timezone
+
 import pandas as pd
 
-#create dataframe from existing csv file, append new data to it, save as new csv file
-#read csv file into dataframe
-def read_csv_to_dfs():
-    status = pd.read_csv('/Users/masonsgroi/Desktop/Scraper_Output/status.csv')
-    wait_time = pd.read_csv('/Users/masonsgroi/Desktop/Scraper_Output/wait_time.csv')
-    return status, wait_time
+# Share the Lambda's scraper and output sinks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
+from scraper import load_lift_registry, scrape_lift_data
+from sinks import LocalSink, read_df, sink_from_env, write_df
 
-def add_data_to_dfs(dfs):
-    data1 = fetch_json_from_url("https://vicomap-cdn.resorts-interactive.com/api/maps/152")
-    lifts = data1.get("lifts", [])
+# Local output directory used when neither OUTPUT_DIR nor S3_BUCKET is set
+DEFAULT_OUTPUT_DIR = "Scraper_Output"
 
-    first=dfs[0]
-    second=dfs[1]
 
-    for lift in lifts:
-        name = lift.get("name", "Unknown")
-        status = lift.get("status", "Unknown")
-        wait_time = lift.get("waitTime", "N/A")
-        print(f"Lift: {name}, Status: {status}, Wait Time: {wait_time} minutes")
-        first=pd.concat([dfs[0], pd.DataFrame([{"Lift": name, "Status": status}])], ignore_index=True)
-        second=pd.concat([dfs[1], pd.DataFrame([{"Lift": name, "Wait Time": wait_time}])], ignore_index=True)
-    data2 = fetch_json_from_url("https://vicomap-cdn.resorts-interactive.com/api/maps/1446")
-    lifts = data2.get("lifts", [])
-    for lift in lifts:
-        name = lift.get("name", "Unknown")
-        status = lift.get("status", "Unknown")
-        wait_time = lift.get("waitTime", "N/A")
-        print(f"Lift: {name}, Status: {status}, Wait Time: {wait_time} minutes")
-        first=pd.concat([dfs[0], pd.DataFrame([{"Lift": name, "Status": status}])], ignore_index=True)
-        second=pd.concat([dfs[1], pd.DataFrame([{"Lift": name, "Wait Time": wait_time}])], ignore_index=True)
-    #read datafram into csv file
-    first.to_csv('status.csv', index=False)
-    second.to_csv('wait_time.csv', index=False)
-    print("Data appended and saved to CSV files.")
+#create dataframe from existing csv file, append new data to it, save as new csv file
+#read csv file into dataframe
+def read_csv_to_dfs(sink):
+    status = read_df(sink, 'status.csv')
+    wait_time = read_df(sink, 'wait_time.csv')
+    return (
+        pd.DataFrame() if status is None else status,
+        pd.DataFrame() if wait_time is None else wait_time,
+    )
 
 
-def fetch_json_from_url(url):
-    """
-    Fetch JSON data from a given URL.
+def add_data_to_dfs(dfs, sink):
+    # Use the output's stored registry so Lift IDs stay stable across runs
+    registry = load_lift_registry(sink)
+    status_df, wait_time_df = scrape_lift_data(registry)
 
-    Args:
-        url (str): The URL to fetch JSON data from.
+    # Stamp each appended row with the scrape time so the history can be replayed
+    time_label = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+    status_df.insert(0, "Time", time_label)
+    wait_time_df.insert(0, "Time", time_label)
 
-    Returns:
-        dict: Parsed JSON data.
-    """
-    response = requests.get(url)
-    response.raise_for_status()  # Raise an error for bad responses
-    return response.json()
-# Usage: Lift ride times and status
-""" data1 = fetch_json_from_url("https://vicomap-cdn.resorts-interactive.com/api/maps/152")
-lifts = data1.get("lifts", [])
-for lift in lifts:
-    name = lift.get("name", "Unknown")
-    status = lift.get("status", "Unknown")
-    wait_time = lift.get("waitTime", "N/A")
-    print(f"Lift: {name}, Status: {status}, Wait Time: {wait_time} minutes")
-data2 = fetch_json_from_url("https://vicomap-cdn.resorts-interactive.com/api/maps/1446")
-lifts = data2.get("lifts", [])
-for lift in lifts:
-    name = lift.get("name", "Unknown")
-    status = lift.get("status", "Unknown")
-    wait_time = lift.get("waitTime", "N/A")
-    print(f"Lift: {name}, Status: {status}, Wait Time: {wait_time} minutes") """
+    first = pd.concat([dfs[0], status_df], ignore_index=True)
+    second = pd.concat([dfs[1], wait_time_df], ignore_index=True)
+    #write dataframes back through the sink
+    write_df(sink, first, 'status.csv')
+    write_df(sink, second, 'wait_time.csv')
+    if registry.dirty:
+        registry.save()
+    print("Data appended and saved to CSV files.")
 
 
 def filter_status_data(first_data, second_data):
@@ -99,21 +75,25 @@ def filter_wait_time_data(first_data, second_data):
         rows.append({"Lift": name, "Wait Time": wait_time})
     return rows
 
-def json_to_csv(json_data,extension):
+def json_to_csv(json_data, extension, sink):
     """
     Convert JSON data to a pandas DataFrame and save it as a CSV file.
     file named current date and time.
     Args:
         json_data (dict): The JSON data to convert.
+        extension (str): File name without ".csv".
+        sink: sinks.Sink the file is written to.
 
     Returns:
         pd.DataFrame: The resulting DataFrame.
     """
-    path_string = "/Users/masonsgroi/Desktop/Scraper_Output/"
     df = pd.json_normalize(json_data)
-    full_filename = path_string + extension + ".csv"
-    df.to_csv(full_filename, index=False)
-    print(f"Data saved to {full_filename}")
+    full_filename = extension + ".csv"
+    write_df(sink, df, full_filename)
+    print(f"Data saved to {sink.describe(full_filename)}")
     return df
 
-add_data_to_dfs(read_csv_to_dfs())
\ No newline at end of file
+
+if __name__ == "__main__":
+    output = sink_from_env() or LocalSink(DEFAULT_OUTPUT_DIR)
+    add_data_to_dfs(read_csv_to_dfs(output), output)
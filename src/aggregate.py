@@ -0,0 +1,297 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analytics import UP_STATUSES, _with_lift_ids, iter_snapshot_days, list_snapshot_runs
+from lift_registry import LiftRegistry
+from lift_schema import status_codes, type_status_df, type_wait_time_df
+from rollups import snapshot_arrays
+from sinks import read_df, resolve_sink
+
+
+# Wait histograms have one bin per minute; longer waits land in the last bin
+WAIT_BINS = 512
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+# Lifts a partial aggregate is sized for up front (it grows if more appear)
+DEFAULT_MAX_LIFTS = 256
+# Conservative in-memory cost of one parsed CSV row (strings, categoricals, index)
+ROW_BYTES = 512
+MIN_CHUNK_ROWS = 1000
+
+
+class WaitAggregate:
+    """
+    Mergeable per-lift summary of any number of snapshots.
+
+    Counts, sums and extremes merge by addition/min/max; percentiles come
+    from exact per-minute wait histograms, so merging partials computed
+    over disjoint chunks gives the same answers as one in-memory pass
+    (for waits under WAIT_BINS minutes).
+
+    Arrays are indexed by Lift ID.
+    """
+
+    def __init__(self, lifts=0):
+        self.samples = np.zeros(lifts, dtype=np.int64)
+        self.up_samples = np.zeros(lifts, dtype=np.int64)
+        self.wait_samples = np.zeros(lifts, dtype=np.int64)
+        self.wait_sum = np.zeros(lifts, dtype=np.float64)
+        self.wait_min = np.full(lifts, np.nan)
+        self.wait_max = np.full(lifts, np.nan)
+        self.histogram = np.zeros((lifts, WAIT_BINS), dtype=np.int64)
+
+    @staticmethod
+    def partial_bytes(lifts):
+        """Memory held by one aggregate over this many lifts"""
+        return lifts * (WAIT_BINS + 6) * 8
+
+    @property
+    def nbytes(self):
+        return self.partial_bytes(len(self.samples))
+
+    @property
+    def lift_ids(self):
+        """Lift IDs observed at least once"""
+        return np.flatnonzero(self.samples > 0).astype(np.int32)
+
+    def _grow(self, lifts):
+        if lifts <= len(self.samples):
+            return
+        extra = lifts - len(self.samples)
+        for name in ("samples", "up_samples", "wait_samples"):
+            setattr(self, name, np.r_[getattr(self, name), np.zeros(extra, dtype=np.int64)])
+        self.wait_sum = np.r_[self.wait_sum, np.zeros(extra)]
+        self.wait_min = np.r_[self.wait_min, np.full(extra, np.nan)]
+        self.wait_max = np.r_[self.wait_max, np.full(extra, np.nan)]
+        self.histogram = np.vstack([self.histogram, np.zeros((extra, WAIT_BINS), dtype=np.int64)])
+
+    def add(self, lift_ids, codes, waits, weight=1):
+        """
+        Fold per-row arrays into the aggregate.
+
+        Args:
+            lift_ids: Lift ID per row
+            codes: LiftStatus code per row (-1 where the lift was absent)
+            waits: wait time per row (NaN where not reported)
+            weight: number of runs the rows stand for (e.g. dedup markers)
+        """
+        lift_ids = np.asarray(lift_ids, dtype=np.int64)
+        codes = np.asarray(codes)
+        waits = np.asarray(waits, dtype=np.float64)
+        if len(lift_ids) == 0:
+            return
+        lifts = int(lift_ids.max()) + 1
+        self._grow(lifts)
+
+        observed = codes >= 0
+        has_wait = ~np.isnan(waits)
+        self.samples[:lifts] += np.bincount(lift_ids[observed], minlength=lifts) * weight
+        self.up_samples[:lifts] += np.bincount(lift_ids[np.isin(codes, UP_STATUSES)], minlength=lifts) * weight
+
+        ids, values = lift_ids[has_wait], waits[has_wait]
+        self.wait_samples[:lifts] += np.bincount(ids, minlength=lifts) * weight
+        self.wait_sum[:lifts] += np.bincount(ids, weights=values, minlength=lifts) * weight
+        np.fmin.at(self.wait_min, ids, values)
+        np.fmax.at(self.wait_max, ids, values)
+
+        bins = np.clip(values, 0, WAIT_BINS - 1).astype(np.int64)
+        self.histogram.reshape(-1)[:lifts * WAIT_BINS] += np.bincount(
+            ids * WAIT_BINS + bins, minlength=lifts * WAIT_BINS
+        ) * weight
+
+    def merge(self, other):
+        """Fold another partial aggregate into this one"""
+        self._grow(len(other.samples))
+        lifts = len(other.samples)
+        self.samples[:lifts] += other.samples
+        self.up_samples[:lifts] += other.up_samples
+        self.wait_samples[:lifts] += other.wait_samples
+        self.wait_sum[:lifts] += other.wait_sum
+        self.wait_min[:lifts] = np.fmin(self.wait_min[:lifts], other.wait_min)
+        self.wait_max[:lifts] = np.fmax(self.wait_max[:lifts], other.wait_max)
+        self.histogram[:lifts] += other.histogram
+        return self
+
+    def mean_wait(self):
+        """Mean wait per observed lift (NaN where no wait was reported)"""
+        ids = self.lift_ids
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.wait_sum[ids] / self.wait_samples[ids]
+
+    def uptime_fraction(self):
+        """Fraction of observed snapshots in which each observed lift was running"""
+        ids = self.lift_ids
+        return self.up_samples[ids] / self.samples[ids]
+
+    def percentile(self, q):
+        """
+        Per-lift wait percentile(s), interpolated like SnapshotMatrix.percentile.
+
+        Returns:
+            float32 array of (observed lifts x len(q))
+        """
+        ids = self.lift_ids
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        cumulative = np.cumsum(self.histogram[ids], axis=1)
+        counts = cumulative[:, -1]
+
+        positions = (counts[:, None] - 1) * (q[None, :] / 100.0)
+        lower = np.floor(positions).astype(np.int64).clip(min=0)
+        upper = np.ceil(positions).astype(np.int64).clip(min=0)
+        fraction = positions - lower
+
+        # The k-th smallest wait is the first bin whose cumulative count exceeds k
+        def value_at(rank):
+            return (cumulative[:, None, :] <= rank[:, :, None]).sum(axis=2)
+
+        result = value_at(lower) * (1 - fraction) + value_at(upper) * fraction
+        result[counts == 0] = np.nan
+        return result.astype(np.float32)
+
+    def to_df(self, percentiles=(50, 90)):
+        """Summary table with one row per observed lift"""
+        ids = self.lift_ids
+        df = pd.DataFrame({
+            "Lift ID": ids,
+            "Samples": self.samples[ids],
+            "Wait Samples": self.wait_samples[ids],
+            "Wait Mean": self.mean_wait(),
+            "Wait Min": self.wait_min[ids],
+            "Wait Max": self.wait_max[ids],
+            "Uptime": self.uptime_fraction(),
+        })
+        for q, values in zip(percentiles, self.percentile(percentiles).T):
+            df[f"Wait P{q:g}"] = values
+        return df
+
+
+def plan_memory(memory_limit, max_workers, lifts=DEFAULT_MAX_LIFTS):
+    """
+    Split a memory cap between workers.
+
+    Each worker holds one partial aggregate and one parsed chunk; workers
+    are dropped until every worker can afford at least MIN_CHUNK_ROWS rows.
+
+    Returns:
+        tuple: (workers, rows per chunk)
+    """
+    partial = WaitAggregate.partial_bytes(lifts)
+    # The merged result is held alongside the workers' partials
+    for workers in range(max(1, max_workers), 0, -1):
+        budget = (memory_limit - partial) // workers - partial
+        chunk_rows = budget // ROW_BYTES
+        if chunk_rows >= MIN_CHUNK_ROWS:
+            return workers, int(chunk_rows)
+    raise ValueError(
+        f"memory_limit of {memory_limit} bytes is too small; need at least "
+        f"{2 * partial + MIN_CHUNK_ROWS * ROW_BYTES} bytes"
+    )
+
+
+def _chunk_arrays(chunk, registry, lock):
+    """Per-row (lift IDs, codes, waits) for one chunk of a long-format CSV"""
+    if "Lift ID" not in chunk.columns:
+        # Registry lookups mutate shared state, so legacy names are resolved one chunk at a time
+        with lock:
+            chunk = _with_lift_ids(chunk, registry)
+    codes = status_codes(type_status_df(chunk)["Status"]) if "Status" in chunk.columns \
+        else np.zeros(len(chunk), dtype=np.int8)
+    waits = type_wait_time_df(chunk)["Wait Time"].astype("Float64").to_numpy(dtype=np.float64, na_value=np.nan) \
+        if "Wait Time" in chunk.columns else np.full(len(chunk), np.nan)
+    return chunk["Lift ID"].to_numpy(), codes, waits
+
+
+def _aggregate_units(sink, units, workers, chunk_rows, registry):
+    """Run units round-robin across workers, each into its own partial, then merge"""
+    lock = threading.Lock()
+
+    def work(shard):
+        partial = WaitAggregate(DEFAULT_MAX_LIFTS)
+        for kind, first_key, second_key, weight in shard:
+            if kind == 'pair':
+                # One snapshot per object, so these stay small
+                status_df = read_df(sink, first_key)
+                wait_time_df = status_df if second_key == first_key else read_df(sink, second_key)
+                with lock:
+                    status_df = _with_lift_ids(status_df, registry)
+                    wait_time_df = _with_lift_ids(wait_time_df, registry)
+                lift_ids, codes, waits = snapshot_arrays(type_status_df(status_df), type_wait_time_df(wait_time_df))
+                partial.add(lift_ids, codes, waits, weight)
+            else:
+                stream = sink.open(first_key)
+                try:
+                    for chunk in pd.read_csv(stream, chunksize=chunk_rows):
+                        partial.add(*_chunk_arrays(chunk, registry, lock), weight=weight)
+                finally:
+                    stream.close()
+        return partial
+
+    shards = [units[i::workers] for i in range(workers)]
+    result = WaitAggregate(DEFAULT_MAX_LIFTS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(work, shards):
+            result.merge(partial)
+    return result
+
+
+def aggregate_archive(start=None, end=None, bucket_name=None, directory=None, registry=None, max_workers=8,
+                      key_prefix='', memory_limit=DEFAULT_MEMORY_LIMIT, sink=None):
+    """
+    Summarize every snapshot between start and end without loading them together.
+
+    Gives the same per-lift answers as load_snapshot_matrix over the same
+    range (including runs stored as dedup markers), while memory stays
+    under memory_limit however long the range is. The archive is listed
+    and read one UTC day at a time: each distinct object is read once per
+    day and weighted by the number of that day's runs that point at it.
+
+    Args:
+        start, end: range as for load_snapshot_matrix
+        bucket_name, directory, sink: where to read from (see sinks.resolve_sink)
+        registry: LiftRegistry used to key legacy files without a Lift ID
+        max_workers: objects read in parallel (reduced to fit memory_limit)
+        key_prefix: key prefix of a batch output namespace
+        memory_limit: cap in bytes on partial aggregates plus in-flight chunks
+
+    Returns:
+        WaitAggregate
+    """
+    sink = resolve_sink(sink, bucket_name, directory)
+    workers, chunk_rows = plan_memory(memory_limit, max_workers)
+    registry = registry or LiftRegistry()
+    result = WaitAggregate(DEFAULT_MAX_LIFTS)
+    snapshots = objects = 0
+    for day_start, day_end in iter_snapshot_days(sink, start, end, key_prefix):
+        runs = Counter((status_key, wait_time_key) for _, status_key, wait_time_key in list_snapshot_runs(
+            sink, day_start, day_end, key_prefix
+        ))
+        units = [('pair', status_key, wait_time_key, weight) for (status_key, wait_time_key), weight in sorted(runs.items())]
+        if units:
+            result.merge(_aggregate_units(sink, units, workers, chunk_rows, registry))
+        snapshots += sum(runs.values())
+        objects += len(units)
+    print(f"Aggregated {snapshots} snapshots from {objects} objects with {workers} workers")
+    return result
+
+
+def aggregate_files(keys, bucket_name=None, directory=None, registry=None, max_workers=8,
+                    memory_limit=DEFAULT_MEMORY_LIMIT, sink=None):
+    """
+    Summarize long-format CSVs (one row per lift per snapshot) in bounded chunks.
+
+    Each file is streamed in chunks sized from memory_limit, so a single
+    multi-season file never has to fit in memory. Files need Lift ID (or
+    Lift) and Status and/or Wait Time columns.
+
+    Returns:
+        WaitAggregate
+    """
+    sink = resolve_sink(sink, bucket_name, directory)
+    workers, chunk_rows = plan_memory(memory_limit, max_workers)
+    units = [('long', key, None, 1) for key in keys]
+    result = _aggregate_units(sink, units, workers, chunk_rows, registry or LiftRegistry())
+    print(f"Aggregated {len(units)} files in chunks of {chunk_rows} rows with {workers} workers")
+    return result
@@ -0,0 +1,579 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import dedup
+from fanout import batch_namespaces, shared_prefix
+from batcher import BATCH_PREFIX, MAX_BATCH_SPAN, batch_key
+from lift_registry import LiftRegistry
+from lift_schema import STATUS_DTYPE, LiftStatus, status_codes, type_status_df, type_wait_time_df
+from sinks import member_key, read_batch_footer, read_df, read_object, resolve_sink
+
+
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+SNAPSHOT_KEY_PATTERN = re.compile(r'^(?P<kind>status|wait_time|snapshot)_(?P<timestamp>\d{8}_\d{6})\.csv$')
+SNAPSHOT_KINDS = ('status', 'wait_time', 'snapshot')
+# Lift ID registry written by the scraper (shared by a base's fan-out batches)
+LIFT_REGISTRY_KEY = "lifts.csv"
+
+# Day partitions written by importer.py (one long-format CSV per UTC day)
+ARCHIVE_PREFIX = "archive/"
+ARCHIVE_KEY_PATTERN = re.compile(r'^archive/(?P<day>\d{8})\.csv$')
+
+# Statuses that count towards uptime
+UP_STATUSES = [int(LiftStatus.OPEN), int(LiftStatus.LIMITED)]
+
+
+def parse_snapshot_key(key):
+    """Return (kind, datetime) for a snapshot key like status_20260101_143000.csv, or None
+
+    Kinds are "status", "wait_time" and "snapshot" (the combined object
+    written by batch invocations with output.combined).
+    """
+    match = SNAPSHOT_KEY_PATTERN.match(os.path.basename(key))
+    if not match:
+        return None
+    timestamp = datetime.strptime(match.group('timestamp'), TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    return match.group('kind'), timestamp
+
+
+def pair_snapshot_keys(keys, start=None, end=None):
+    """
+    Pair status/wait_time keys by timestamp.
+
+    Returns:
+        list: (timestamp, status_key, wait_time_key) tuples sorted by time,
+        restricted to start <= timestamp < end when given. Combined
+        snapshot objects appear with the same key in both positions.
+    """
+    pairs = {}
+    for key in keys:
+        parsed = parse_snapshot_key(key)
+        if parsed is None:
+            continue
+        kind, timestamp = parsed
+        if (start and timestamp < start) or (end and timestamp >= end):
+            continue
+        pairs.setdefault(timestamp, {})[kind] = key
+
+    result = []
+    for timestamp, pair in sorted(pairs.items()):
+        if 'snapshot' in pair:
+            result.append((timestamp, pair['snapshot'], pair['snapshot']))
+        elif 'status' in pair and 'wait_time' in pair:
+            result.append((timestamp, pair['status'], pair['wait_time']))
+    return result
+
+
+def archive_key(day):
+    """Key of the archive partition holding one day (YYYYMMDD) of snapshots"""
+    return f"{ARCHIVE_PREFIX}{day}.csv"
+
+
+def list_snapshot_keys(sink, start=None, end=None, key_prefix=''):
+    """List snapshot key pairs in a sink (under key_prefix) between start and end"""
+    keys = []
+    for kind in SNAPSHOT_KINDS:
+        prefix = f"{key_prefix}{kind}_"
+        # Keys sort by timestamp, so skip straight to the start of the range
+        start_after = f"{prefix}{start.strftime(TIMESTAMP_FORMAT)}" if start else None
+        end_key = f"{prefix}{end.strftime(TIMESTAMP_FORMAT)}" if end else None
+        for key in sink.list(prefix, start_after):
+            if end_key and key >= end_key:
+                break
+            keys.append(key)
+    return pair_snapshot_keys(keys, start, end)
+
+
+class SnapshotMatrix:
+    """
+    Columnar lift x time view of a range of snapshots.
+
+    Attributes:
+        times: datetime64[s] array of snapshot times (length T)
+        lift_ids: int32 array of lift IDs, one per row (length L)
+        names: display name per row
+        wait: float32 array (L x T), NaN where no wait time was reported
+        status: int8 array (L x T) of LiftStatus codes, -1 where the lift was absent
+    """
+
+    def __init__(self, times, lift_ids, names, wait, status):
+        self.times = times
+        self.lift_ids = lift_ids
+        self.names = names
+        self.wait = wait
+        self.status = status
+
+    @classmethod
+    def from_long(cls, times, time_index, lift_ids, wait, status, names=None):
+        """
+        Build a matrix from long-format arrays (one entry per lift per snapshot).
+
+        Args:
+            times: sorted snapshot times (length T)
+            time_index: snapshot index for each entry
+            lift_ids: lift ID for each entry
+            wait: wait time for each entry (NaN when missing)
+            status: LiftStatus code for each entry
+            names: optional mapping of lift ID to display name
+        """
+        unique_ids, rows = np.unique(lift_ids, return_inverse=True)
+        shape = (len(unique_ids), len(times))
+
+        wait_matrix = np.full(shape, np.nan, dtype=np.float32)
+        status_matrix = np.full(shape, -1, dtype=np.int8)
+        wait_matrix[rows, time_index] = wait
+        status_matrix[rows, time_index] = status
+
+        names = names or {}
+        return cls(
+            np.asarray(times, dtype='datetime64[s]'),
+            unique_ids.astype(np.int32),
+            [names.get(int(lift_id), str(lift_id)) for lift_id in unique_ids],
+            wait_matrix,
+            status_matrix,
+        )
+
+    def row(self, lift_id):
+        """Return the row index for a lift ID"""
+        return int(np.searchsorted(self.lift_ids, lift_id))
+
+    def rolling_mean(self, window):
+        """Rolling mean wait over the previous `window` snapshots, ignoring gaps"""
+        valid = ~np.isnan(self.wait)
+        sums = np.cumsum(np.where(valid, self.wait, 0.0), axis=1, dtype=np.float64)
+        counts = np.cumsum(valid, axis=1, dtype=np.int64)
+
+        # Subtract the cumulative value `window` steps back to get each window total
+        sums[:, window:] -= sums[:, :-window].copy()
+        counts[:, window:] -= counts[:, :-window].copy()
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (sums / counts).astype(np.float32)
+
+    def percentile(self, q):
+        """Per-lift wait percentile(s) over the whole range, ignoring gaps"""
+        # Sort once with NaNs last, then index by each row's valid count
+        ordered = np.sort(self.wait, axis=1)
+        counts = (~np.isnan(self.wait)).sum(axis=1)
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+
+        positions = (counts[:, None] - 1) * (q[None, :] / 100.0)
+        lower = np.floor(positions).astype(np.int64).clip(min=0)
+        upper = np.ceil(positions).astype(np.int64).clip(min=0)
+        rows = np.arange(len(ordered))[:, None]
+        fraction = positions - lower
+
+        result = ordered[rows, lower] * (1 - fraction) + ordered[rows, upper] * fraction
+        result[counts == 0] = np.nan
+        return result.astype(np.float32)
+
+    def uptime_fraction(self):
+        """Fraction of observed snapshots in which each lift was running"""
+        observed = (self.status >= 0).sum(axis=1)
+        up = np.isin(self.status, UP_STATUSES).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return up / observed
+
+    def resample_mean(self, seconds=3600):
+        """
+        Mean wait per lift per time bucket (hourly by default).
+
+        Returns:
+            tuple: (bucket start times, float32 array of L x buckets)
+        """
+        buckets = self.times.astype(np.int64) // seconds
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+        valid = ~np.isnan(self.wait)
+        sums = np.add.reduceat(np.where(valid, self.wait, 0.0), starts, axis=1)
+        counts = np.add.reduceat(valid.astype(np.int32), starts, axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (sums / counts).astype(np.float32)
+        return (buckets[starts] * seconds).astype('datetime64[s]'), means
+
+
+def _long_frame(frames):
+    """
+    Concatenate frames into one long DataFrame with a Time Index column.
+
+    Whole frames go to one pd.concat: selecting columns frame by frame
+    first would cost more than the rest of the load. Columns a frame
+    lacks (legacy files) come out as NaN.
+    """
+    long_df = pd.concat(frames, ignore_index=True)
+    long_df["Time Index"] = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+    return long_df
+
+
+def frames_to_matrix(snapshots, registry=None):
+    """
+    Build a SnapshotMatrix from (timestamp, status_df, wait_time_df) tuples.
+
+    Frames without a Lift ID column (legacy files) are matched to the
+    registry's lifts by name (see _with_lift_ids). All
+    frames are concatenated first, so typing, ID lookup and the status /
+    wait time merge each run once over the whole range.
+    """
+    registry = registry or LiftRegistry()
+    snapshots = list(snapshots)
+    if not snapshots:
+        return SnapshotMatrix(
+            np.array([], dtype='datetime64[s]'), np.array([], dtype=np.int32), [],
+            np.empty((0, 0), dtype=np.float32), np.empty((0, 0), dtype=np.int8)
+        )
+
+    times = [np.datetime64(timestamp.replace(tzinfo=None), 's') for timestamp, _, _ in snapshots]
+    status_long = _with_lift_ids(_long_frame([status_df for _, status_df, _ in snapshots]), registry)
+    wait_long = _with_lift_ids(_long_frame([wait_time_df for _, _, wait_time_df in snapshots]), registry)
+    # Without Status Detail every distinct status (typed label or legacy text) is parsed once
+    status_long = type_status_df(status_long[["Time Index", "Lift ID", "Lift", "Status"]])
+    wait_long = type_wait_time_df(wait_long[["Time Index", "Lift ID", "Wait Time"]])
+    long_df = status_long[["Time Index", "Lift ID", "Status"]].merge(
+        wait_long[["Time Index", "Lift ID", "Wait Time"]], on=["Time Index", "Lift ID"], how="outer"
+    )
+
+    codes = status_codes(long_df["Status"])
+    wait = long_df["Wait Time"].astype("Float32").to_numpy(dtype=np.float32, na_value=np.nan)
+    # One name per lift: the last one reported
+    named = status_long[["Lift ID", "Lift"]].drop_duplicates("Lift ID", keep="last")
+    names = dict(zip(named["Lift ID"].tolist(), named["Lift"].tolist()))
+
+    return SnapshotMatrix.from_long(
+        times, long_df["Time Index"].to_numpy(), long_df["Lift ID"].to_numpy(), wait, codes, names
+    )
+
+
+def _legacy_lift_id(registry, map_id, name, by_name):
+    """
+    ID for a legacy (map ID, name) row: the lift of that name on the map, else
+    the only lift of that name on any map, else a new ID keyed by name.
+    """
+    known = by_name.get(name, [])
+    on_map = [lift_id for lift_map, lift_id in known if lift_map == map_id]
+    if map_id and on_map:
+        return on_map[0]
+    if len({lift_id for _, lift_id in known}) == 1:
+        return known[0][1]
+    lift_id = registry.lift_id(map_id, {"name": name})
+    by_name.setdefault(name, []).append((map_id, lift_id))
+    return lift_id
+
+
+def _with_lift_ids(df, registry):
+    """
+    Ensure a frame has a Lift ID on every row, registering legacy names as needed.
+
+    Rows without one (legacy files, or legacy rows concatenated with
+    current ones) are matched by display name against the registry: on
+    their own map first (map ID 0 when unknown), then across maps when
+    exactly one lift has that name. Only unmatched names get new IDs.
+    """
+    missing = df["Lift ID"].isna() if "Lift ID" in df.columns else pd.Series(True, index=df.index)
+    if not missing.any():
+        return df
+    df = df.copy()
+    map_ids = df["Map ID"].fillna(0) if "Map ID" in df.columns else pd.Series(0, index=df.index)
+    by_name = {}
+    for lift_id, (lift_map, name) in enumerate(zip(registry.map_ids, registry.names)):
+        by_name.setdefault(name, []).append((lift_map, lift_id))
+    # Look up each distinct (map, name) once
+    codes, uniques = pd.factorize(pd.MultiIndex.from_arrays([map_ids[missing], df.loc[missing, "Lift"]]))
+    ids = np.array([_legacy_lift_id(registry, int(map_id), name, by_name) for map_id, name in uniques],
+                   dtype=np.int32)
+    lift_ids = df["Lift ID"].to_numpy(dtype=np.float64, na_value=np.nan, copy=True) if "Lift ID" in df.columns \
+        else np.zeros(len(df))
+    lift_ids[missing.to_numpy()] = ids[codes]
+    df["Lift ID"] = lift_ids.astype(np.int32)
+    if "Map ID" in df.columns:
+        df["Map ID"] = map_ids
+    return df
+
+
+def _index_in_range(name, start, end):
+    """Whether a daily index file (YYYYMMDD.csv) can hold snapshots in [start, end)"""
+    day = os.path.basename(name)[:8]
+    if not (day.isdigit() and name.endswith('.csv')):
+        return False
+    return (not start or day >= start.strftime('%Y%m%d')) and (not end or day <= end.strftime('%Y%m%d'))
+
+
+def merge_index_markers(pairs, index_frames, start=None, end=None):
+    """
+    Add "unchanged since" markers from snapshot indexes to a list of key pairs.
+
+    Deduplicated runs store no object of their own; their index row points
+    at the full snapshot they repeat, so the reader expands them here.
+    """
+    seen = {timestamp for timestamp, _, _ in pairs}
+    merged = list(pairs)
+    for index_df in index_frames:
+        markers = index_df[index_df["Unchanged Since"].notna() & (index_df["Unchanged Since"].astype(str) != "")]
+        for time_label, status_key, wait_time_key in dedup.expand_index(markers):
+            timestamp = datetime.strptime(time_label, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+            if timestamp in seen or (start and timestamp < start) or (end and timestamp >= end):
+                continue
+            seen.add(timestamp)
+            merged.append((timestamp, status_key, wait_time_key))
+    return sorted(merged)
+
+
+def list_batch_runs(sink, start=None, end=None, key_prefix=''):
+    """
+    List (timestamp, status key, wait time key) for snapshots stored in batch objects.
+
+    Stored snapshots resolve to their member keys; markers in a batch
+    resolve to the keys of the snapshot they repeat. Only batches that can
+    overlap the range are opened, each with one footer read.
+    """
+    prefix = f"{key_prefix}{BATCH_PREFIX}"
+    start_after = batch_key(start - MAX_BATCH_SPAN, key_prefix) if start else None
+    end_key = batch_key(end, key_prefix) if end else None
+    runs = []
+    for key in sink.list(prefix, start_after):
+        if end_key and key >= end_key:
+            break
+        footer = read_batch_footer(sink, key)
+        for entry in footer["entries"] if footer else []:
+            if entry.get("kind") != "snapshot":
+                continue
+            timestamp = datetime.strptime(entry["time"], TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+            if (start and timestamp < start) or (end and timestamp >= end):
+                continue
+            if "offset" in entry:
+                runs.append((timestamp, member_key(key, entry["name"]), member_key(key, entry["name"])))
+            else:
+                runs.append((timestamp, entry["status_key"], entry["wait_time_key"]))
+    return runs
+
+
+def list_snapshot_runs(sink, start=None, end=None, key_prefix=''):
+    """
+    List (timestamp, status key, wait time key) for every run between start and end.
+
+    Includes runs recorded only as "unchanged since" markers in the
+    snapshot index, and runs stored in batch objects (list_batch_runs).
+    Under a fan-out base the runs of every batch namespace are listed
+    too (fanout.batch_namespaces), so a resort's history stays whole when
+    a new plan moves it to another namespace.
+    """
+    runs = []
+    for prefix in [key_prefix] + batch_namespaces(sink, key_prefix):
+        runs += _namespace_runs(sink, start, end, prefix)
+    return sorted(runs)
+
+
+def _namespace_runs(sink, start, end, key_prefix):
+    """Runs stored directly under one prefix (see list_snapshot_runs)"""
+    pairs = list_snapshot_keys(sink, start, end, key_prefix)
+    seen = {timestamp for timestamp, _, _ in pairs}
+    pairs += [run for run in list_batch_runs(sink, start, end, key_prefix) if run[0] not in seen]
+    index_prefix = f"{key_prefix}index/"
+    start_after = f"{index_prefix}{start.strftime('%Y%m%d')}" if start else None
+    index_keys = []
+    for key in sink.list(index_prefix, start_after):
+        if end and os.path.basename(key)[:8] > end.strftime('%Y%m%d'):
+            break
+        if _index_in_range(key, start, end):
+            index_keys.append(key)
+    return merge_index_markers(pairs, [read_df(sink, key) for key in index_keys], start, end)
+
+
+def _day_start(timestamp):
+    return datetime(timestamp.year, timestamp.month, timestamp.day, tzinfo=timezone.utc)
+
+
+def next_snapshot_day(sink, after=None, key_prefix=''):
+    """
+    Start of the first UTC day after `after` (or the first day at all) that holds runs, or None.
+
+    Peeks at the first key of each listing (snapshot kinds, batches,
+    indexes) instead of listing the archive.
+    """
+    following = _day_start(after) + timedelta(days=1) if after else None
+    days = []
+    for head in [f"{key_prefix}{kind}_" for kind in SNAPSHOT_KINDS] + [f"{key_prefix}index/"]:
+        key = next(sink.list(head, f"{head}{after.strftime('%Y%m%d')}~" if after else None), None)
+        if key and key[len(head):len(head) + 8].isdigit():
+            days.append(datetime.strptime(key[len(head):len(head) + 8], '%Y%m%d').replace(tzinfo=timezone.utc))
+    # A batch that started up to MAX_BATCH_SPAN before midnight can still hold runs on the following day
+    head = f"{key_prefix}{BATCH_PREFIX}batch_"
+    key = next(sink.list(head, batch_key(following - MAX_BATCH_SPAN, key_prefix) if after else None), None)
+    if key and key[len(head):len(head) + 8].isdigit():
+        day = datetime.strptime(key[len(head):len(head) + 8], '%Y%m%d').replace(tzinfo=timezone.utc)
+        days.append(max(day, following) if following else day)
+    return min(days) if days else None
+
+
+def iter_snapshot_days(sink, start=None, end=None, key_prefix=''):
+    """
+    Yield (day start, day end) windows covering [start, end), one per UTC day that holds runs.
+
+    Lets callers list and read a long range one day at a time; empty days
+    are skipped with a few single-key listings per namespace (the prefix
+    and its fan-out batch namespaces, as in list_snapshot_runs).
+    """
+    prefixes = [key_prefix] + batch_namespaces(sink, key_prefix)
+
+    def next_day(after):
+        days = [day for day in (next_snapshot_day(sink, after, prefix) for prefix in prefixes) if day]
+        return min(days) if days else None
+
+    day = next_day(_day_start(start) - timedelta(days=1) if start else None)
+    while day and (not end or day < end):
+        following = day + timedelta(days=1)
+        yield max(day, start) if start else day, min(following, end) if end else following
+        day = next_day(day)
+
+
+def read_lift_registry(sink, key_prefix=''):
+    """
+    The lift registry stored for a prefix, or an empty one.
+
+    A read-only copy: legacy names matched against it during a load get
+    IDs in memory only.
+    """
+    registry_df = read_df(sink, shared_prefix(key_prefix) + LIFT_REGISTRY_KEY)
+    return LiftRegistry() if registry_df is None else LiftRegistry.from_df(registry_df)
+
+
+def load_snapshot_matrix(start=None, end=None, bucket_name=None, directory=None, registry=None, max_workers=16,
+                         key_prefix='', sink=None):
+    """
+    Load all snapshots between start and end into one SnapshotMatrix.
+
+    Runs recorded only as "unchanged since" markers in the snapshot index
+    are expanded to the snapshot they repeat; each object is read once.
+
+    Args:
+        start: inclusive start datetime (UTC), or None for the beginning
+        end: exclusive end datetime (UTC), or None for the latest snapshot
+        bucket_name: S3 bucket holding status_/wait_time_ CSVs
+        directory: local directory holding the same files (used instead of S3)
+        registry: LiftRegistry for display names and legacy files
+        max_workers: number of files fetched in parallel
+        key_prefix: key prefix of a batch output namespace
+        sink: sinks.Sink to read from (used instead of bucket_name/directory)
+    """
+    sink = resolve_sink(sink, bucket_name, directory)
+    pairs = list_snapshot_runs(sink, start, end, key_prefix)
+
+    def read_csv(key):
+        return read_df(sink, key)
+
+    # Read each distinct object once, even when many markers point at it
+    keys = sorted({key for _, status_key, wait_time_key in pairs for key in (status_key, wait_time_key)})
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = dict(zip(keys, executor.map(read_csv, keys)))
+
+    snapshots = [(timestamp, frames[status_key], frames[wait_time_key]) for timestamp, status_key, wait_time_key in pairs]
+    print(f"Loaded {len(snapshots)} snapshots from {len(keys)} objects")
+    return frames_to_matrix(_merge_same_time(snapshots), registry)
+
+
+def _merge_same_time(snapshots):
+    """Join snapshots taken at the same second (by batches in different namespaces) into one"""
+    merged = []
+    for timestamp, status_df, wait_time_df in snapshots:
+        if merged and merged[-1][0] == timestamp:
+            _, status_dfs, wait_time_dfs = merged[-1]
+            status_dfs.append(status_df)
+            wait_time_dfs.append(wait_time_df)
+        else:
+            merged.append((timestamp, [status_df], [wait_time_df]))
+    return [
+        (timestamp, *(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+                      for frames in (status_dfs, wait_time_dfs)))
+        for timestamp, status_dfs, wait_time_dfs in merged
+    ]
+
+
+def list_archive_keys(sink, start=None, end=None):
+    """List the archive partitions (archive/YYYYMMDD.csv) that can hold snapshots in [start, end)"""
+    # archive/YYYYMMDD sorts just before that day's partition
+    start_after = f"{ARCHIVE_PREFIX}{start.strftime('%Y%m%d')}" if start else None
+    keys = []
+    for key in sink.list(ARCHIVE_PREFIX, start_after):
+        match = ARCHIVE_KEY_PATTERN.match(key)
+        if not match:
+            continue
+        if end and match.group('day') > end.strftime('%Y%m%d'):
+            break
+        keys.append(key)
+    return keys
+
+
+def _partition_arrays(sink, key, start, end):
+    """
+    Long-format arrays of one archive partition, restricted to [start, end).
+
+    Only the columns the matrix needs are parsed, with Time, Lift and
+    Status as categoricals: each distinct timestamp and status is decoded
+    once, not once per row.
+
+    Returns:
+        tuple: (times, time index per row, lift IDs, waits, status codes, names), or None
+    """
+    body = read_object(sink, key)
+    if body is None:
+        return None
+    df = pd.read_csv(BytesIO(body), usecols=["Time", "Lift ID", "Lift", "Status", "Wait Time"], dtype={
+        "Time": "category", "Lift ID": np.int32, "Lift": "category", "Status": STATUS_DTYPE, "Wait Time": np.float32,
+    })
+    times = pd.to_datetime(df["Time"].cat.categories, format=TIMESTAMP_FORMAT).to_numpy(dtype='datetime64[s]')
+    time_index = df["Time"].cat.codes.to_numpy().astype(np.int64)
+    keep = np.ones(len(times), dtype=bool)
+    if start:
+        keep &= times >= np.datetime64(start.replace(tzinfo=None), 's')
+    if end:
+        keep &= times < np.datetime64(end.replace(tzinfo=None), 's')
+    if not keep.all():
+        rows = keep[time_index]
+        df, time_index = df[rows], (np.cumsum(keep) - 1)[time_index[rows]]
+        times = times[keep]
+
+    named = df[["Lift ID", "Lift"]].drop_duplicates("Lift ID", keep="last")
+    return (times, time_index, df["Lift ID"].to_numpy(), df["Wait Time"].to_numpy(),
+            df["Status"].cat.codes.to_numpy(), dict(zip(named["Lift ID"].tolist(), named["Lift"].astype(str).tolist())))
+
+
+def load_archive_matrix(start=None, end=None, bucket_name=None, directory=None, max_workers=16, sink=None):
+    """
+    Load the importer's day partitions between start and end into one SnapshotMatrix.
+
+    The fast path for long ranges: a season is about a hundred partition
+    reads instead of one read per run, and the partitions are already
+    typed, keyed by Lift ID and expanded from dedup markers. Runs not yet
+    imported are not included; load_snapshot_matrix reads those.
+
+    Args:
+        start, end: range as for load_snapshot_matrix
+        bucket_name, directory, sink: where the archive/ partitions live (see sinks.resolve_sink)
+        max_workers: number of partitions read in parallel
+    """
+    sink = resolve_sink(sink, bucket_name, directory)
+    keys = list_archive_keys(sink, start, end)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        parts = [part for part in executor.map(lambda key: _partition_arrays(sink, key, start, end), keys)
+                 if part is not None and len(part[0])]
+    print(f"Loaded {sum(len(part[0]) for part in parts)} snapshots from {len(parts)} archive partitions")
+    if not parts:
+        return frames_to_matrix([])
+
+    # Partitions are whole days in key order, so offsetting each day's time index keeps times sorted
+    offsets = np.cumsum([0] + [len(part[0]) for part in parts[:-1]])
+    names = {}
+    for part in parts:
+        names.update(part[5])
+    return SnapshotMatrix.from_long(
+        np.concatenate([part[0] for part in parts]),
+        np.concatenate([part[1] + offset for part, offset in zip(parts, offsets)]),
+        *[np.concatenate([part[column] for part in parts]) for column in (2, 3, 4)],
+        names=names,
+    )
@@ -0,0 +1,159 @@
+import threading
+import time
+from datetime import timedelta
+
+from sinks import member_key, pack_batch
+
+
+BATCH_PREFIX = "batches/"
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+# Snapshots in one batch never span more than this, so readers can bound their listing
+MAX_BATCH_SPAN = timedelta(hours=1)
+
+
+def batch_key(first_timestamp, prefix=''):
+    """Key of the batch object whose first snapshot was taken at first_timestamp"""
+    return f"{prefix}{BATCH_PREFIX}batch_{first_timestamp.strftime(TIMESTAMP_FORMAT)}.snap"
+
+
+class MicroBatcher:
+    """
+    Buffers per-run objects and writes them as one batch object.
+
+    Each add() returns the member key the object will be readable at
+    (sinks.read_df / read_text accept it) once its batch is flushed. A
+    batch is flushed when it holds max_members entries or max_bytes of
+    bodies, when its oldest entry is max_age_seconds old, or when a new
+    entry would make it span more than MAX_BATCH_SPAN. A failed flush
+    keeps the buffer, so the next flush (or close) retries it.
+
+    Args:
+        sink: sinks.Sink to write batches to
+        prefix: key prefix of the output namespace
+        max_members: entries per batch
+        max_bytes: total body bytes per batch
+        max_age_seconds: longest an entry waits in memory
+        on_flush: optional callable(batch key, footer entries) run after
+            each successful flush
+    """
+
+    def __init__(self, sink, prefix='', max_members=60, max_bytes=8 * 1024 * 1024, max_age_seconds=600,
+                 on_flush=None, clock=time.monotonic):
+        self.sink = sink
+        self.prefix = prefix
+        self.max_members = max_members
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.on_flush = on_flush
+        self.clock = clock
+        self.batches_written = 0
+        self.members_written = 0
+        self._members = []
+        self._bytes = 0
+        self._key = None
+        self._first_timestamp = None
+        self._opened_at = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._members)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self, timestamp):
+        if self._members and timestamp - self._first_timestamp > MAX_BATCH_SPAN:
+            self.flush()
+        if not self._members:
+            self._key = batch_key(timestamp, self.prefix)
+            self._first_timestamp = timestamp
+            self._opened_at = self.clock()
+
+    def _append(self, entry, body):
+        self._members.append((entry, body))
+        self._bytes += 0 if body is None else len(body)
+        if len(self._members) >= self.max_members or self._bytes >= self.max_bytes:
+            self.flush()
+
+    def add(self, timestamp, name, body, **fields):
+        """
+        Buffer one object.
+
+        Args:
+            timestamp: time of the run that produced it (UTC datetime)
+            name: member name, unique within the batch
+            body: str or bytes
+            fields: extra values stored in the member's footer entry
+
+        Returns:
+            str: member key to read the object at after the flush
+        """
+        with self._lock:
+            self._open(timestamp)
+            key = member_key(self._key, name)
+            self._append(dict(fields, name=name, time=timestamp.strftime(TIMESTAMP_FORMAT)), body)
+            return key
+
+    def add_entry(self, timestamp, name, **fields):
+        """Record a footer entry with no body (e.g. an "unchanged since" marker)"""
+        with self._lock:
+            self._open(timestamp)
+            self._append(dict(fields, name=name, time=timestamp.strftime(TIMESTAMP_FORMAT)), None)
+
+    def due(self):
+        """Whether the oldest buffered entry has waited max_age_seconds"""
+        return bool(self._members) and self.clock() - self._opened_at >= self.max_age_seconds
+
+    def flush(self):
+        """
+        Write the buffered entries as one batch object.
+
+        Returns:
+            str: key of the written batch, or None when nothing was buffered
+        """
+        with self._lock:
+            if not self._members:
+                return None
+            key, members = self._key, self._members
+            body, entries = pack_batch(members, self.sink.compress)
+            self.sink.write(key, body, 'application/octet-stream', raw=True)
+            self._members, self._bytes = [], 0
+            self.batches_written += 1
+            self.members_written += len(members)
+            print(f"Flushed {len(members)} entries to {self.sink.describe(key)}")
+            if self.on_flush:
+                self.on_flush(key, entries)
+            return key
+
+    def flush_if_due(self):
+        with self._lock:
+            return self.flush() if self.due() else None
+
+    def start(self, interval=None):
+        """Flush due batches from a background thread until close()"""
+        interval = interval or max(0.05, min(1.0, self.max_age_seconds / 4))
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.flush_if_due()
+                except Exception as e:
+                    print(f"ERROR: Batch flush failed: {str(e)}")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the background thread and flush whatever is buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.flush()
@@ -0,0 +1,195 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from analytics import SnapshotMatrix, load_snapshot_matrix, read_lift_registry
+from sinks import resolve_sink
+
+
+META_FILE = 'meta.json'
+WAIT_FILE = 'wait.i16'
+STATUS_FILE = 'status.i8'
+FILLED_FILE = 'filled.u8'
+NAMES_FILE = 'lifts.json'
+
+MISSING = -1
+
+
+def _minute_floor(timestamp):
+    """Truncate a timestamp to the minute (UTC)"""
+    return timestamp.astimezone(timezone.utc).replace(second=0, microsecond=0)
+
+
+class WaitCube:
+    """
+    Local memory-mapped cache of wait times and status codes.
+
+    The cube is a fixed-width lift x minute grid: row i holds lift ID i
+    (from the lift registry) and column j holds the minute start + j.
+    Wait times are int16 and status codes are int8 LiftStatus values,
+    both -1 where no data was recorded. A per-minute `filled` flag records
+    which minutes have already been fetched from the archive so only
+    missing ranges are refetched.
+
+    Opening a cube only maps the files; nothing is read until sliced.
+    """
+
+    def __init__(self, directory, mode='r+'):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), 'r') as f:
+            meta = json.load(f)
+        self.start = datetime.fromisoformat(meta['start'])
+        self.minutes = meta['minutes']
+        self.max_lifts = meta['max_lifts']
+        # Stored lift registry used by the default loader, read on first use
+        self.registry = None
+
+        shape = (self.max_lifts, self.minutes)
+        self.wait = np.memmap(os.path.join(directory, WAIT_FILE), dtype=np.int16, mode=mode, shape=shape)
+        self.status = np.memmap(os.path.join(directory, STATUS_FILE), dtype=np.int8, mode=mode, shape=shape)
+        self.filled = np.memmap(os.path.join(directory, FILLED_FILE), dtype=np.uint8, mode=mode, shape=(self.minutes,))
+
+        names_path = os.path.join(directory, NAMES_FILE)
+        self.names = {}
+        if os.path.exists(names_path):
+            with open(names_path, 'r') as f:
+                self.names = {int(lift_id): name for lift_id, name in json.load(f).items()}
+
+    @classmethod
+    def create(cls, directory, start, end, max_lifts=256):
+        """Create an empty cube covering [start, end) at one-minute resolution"""
+        os.makedirs(directory, exist_ok=True)
+        start = _minute_floor(start)
+        minutes = int((_minute_floor(end) - start).total_seconds() // 60)
+        shape = (max_lifts, minutes)
+
+        for name, dtype, file_shape in (
+            (WAIT_FILE, np.int16, shape),
+            (STATUS_FILE, np.int8, shape),
+        ):
+            array = np.memmap(os.path.join(directory, name), dtype=dtype, mode='w+', shape=file_shape)
+            array[:] = MISSING
+            array.flush()
+        np.memmap(os.path.join(directory, FILLED_FILE), dtype=np.uint8, mode='w+', shape=(minutes,)).flush()
+
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            json.dump({'start': start.isoformat(), 'minutes': minutes, 'max_lifts': max_lifts}, f)
+
+        print(f"Created cube at {directory}: {max_lifts} lifts x {minutes} minutes")
+        return cls(directory)
+
+    def minute_index(self, timestamp):
+        """Column index of the minute containing timestamp, clipped to the cube"""
+        offset = int((_minute_floor(timestamp) - self.start).total_seconds() // 60)
+        return min(max(offset, 0), self.minutes)
+
+    def minute_time(self, index):
+        """Start time of a column"""
+        return self.start + timedelta(minutes=int(index))
+
+    def missing_ranges(self, start, end):
+        """Return (start, end) datetime pairs for unfetched minutes within [start, end)"""
+        first, last = self.minute_index(start), self.minute_index(end)
+        unfilled = np.r_[False, self.filled[first:last] == 0, False].astype(np.int8)
+        edges = np.flatnonzero(np.diff(unfilled))
+        return [
+            (self.minute_time(first + run_start), self.minute_time(first + run_end))
+            for run_start, run_end in zip(edges[::2], edges[1::2])
+        ]
+
+    def write_matrix(self, matrix):
+        """Scatter a SnapshotMatrix into the cube (snapshots outside the cube are dropped)"""
+        if not len(matrix.times):
+            return
+        offsets = (matrix.times - np.datetime64(self.start.replace(tzinfo=None), 's')) // np.timedelta64(60, 's')
+        columns = offsets.astype(np.int64)
+        in_range = (columns >= 0) & (columns < self.minutes)
+        in_lifts = matrix.lift_ids < self.max_lifts
+        if not in_lifts.all():
+            print(f"WARNING: {int((~in_lifts).sum())} lift IDs exceed cube capacity {self.max_lifts}")
+
+        rows = matrix.lift_ids[in_lifts][:, None]
+        cols = columns[in_range][None, :]
+        wait = matrix.wait[in_lifts][:, in_range]
+        self.wait[rows, cols] = np.where(np.isnan(wait), MISSING, np.round(wait)).astype(np.int16)
+        self.status[rows, cols] = matrix.status[in_lifts][:, in_range]
+
+        for lift_id, name in zip(matrix.lift_ids, matrix.names):
+            self.names[int(lift_id)] = name
+
+    def mark_filled(self, start, end):
+        """Record that [start, end) has been fetched"""
+        self.filled[self.minute_index(start):self.minute_index(end)] = 1
+
+    def flush(self):
+        """Flush mapped arrays and the lift name index to disk"""
+        self.wait.flush()
+        self.status.flush()
+        self.filled.flush()
+        with open(os.path.join(self.directory, NAMES_FILE), 'w') as f:
+            json.dump({str(lift_id): name for lift_id, name in sorted(self.names.items())}, f)
+
+    def ensure(self, start, end, loader=None, bucket_name=None, now=None, sink=None, key_prefix=''):
+        """
+        Fetch any unfilled minutes in [start, end) from the archive.
+
+        Args:
+            start, end: range to make available locally
+            loader: callable(range_start, range_end) returning a SnapshotMatrix;
+                defaults to analytics.load_snapshot_matrix over sink or bucket_name,
+                with the stored lift registry so rows keep their lift IDs
+            bucket_name: S3 bucket used by the default loader
+            sink: sinks.Sink used by the default loader instead of bucket_name
+            key_prefix: output prefix read by the default loader
+            now: minutes at or after this time are never marked filled, since
+                snapshots may still arrive for them (defaults to the current time)
+
+        Returns:
+            int: number of ranges fetched
+        """
+        if loader is None:
+            source = resolve_sink(sink, bucket_name)
+            # Kept across calls, so legacy names missing from it keep the IDs they got first
+            if self.registry is None:
+                self.registry = read_lift_registry(source, key_prefix)
+
+            def loader(range_start, range_end):
+                return load_snapshot_matrix(range_start, range_end, registry=self.registry, key_prefix=key_prefix,
+                                            sink=source)
+
+        end = min(end, _minute_floor(now or datetime.now(timezone.utc)))
+        ranges = self.missing_ranges(start, end)
+        for range_start, range_end in ranges:
+            print(f"Fetching {range_start.isoformat()} to {range_end.isoformat()}")
+            self.write_matrix(loader(range_start, range_end))
+            self.mark_filled(range_start, range_end)
+
+        if ranges:
+            self.flush()
+        return len(ranges)
+
+    def query(self, start, end):
+        """
+        Return zero-copy (wait, status) views for all lifts over [start, end).
+
+        Row i is lift ID i; use `names` for display names.
+        """
+        first, last = self.minute_index(start), self.minute_index(end)
+        return self.wait[:, first:last], self.status[:, first:last]
+
+    def to_matrix(self, start, end):
+        """Copy [start, end) into a SnapshotMatrix for the analytics helpers"""
+        wait, status = self.query(start, end)
+        present = np.flatnonzero((status >= 0).any(axis=1))
+        first = self.minute_index(start)
+        times = np.datetime64(self.start.replace(tzinfo=None), 's') + \
+            (first + np.arange(wait.shape[1])) * np.timedelta64(60, 's')
+
+        wait_float = wait[present].astype(np.float32)
+        wait_float[wait_float == MISSING] = np.nan
+        return SnapshotMatrix(
+            times, present.astype(np.int32), [self.names.get(int(i), str(i)) for i in present],
+            wait_float, np.array(status[present])
+        )
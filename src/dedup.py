@@ -0,0 +1,75 @@
+import hashlib
+import json
+
+import pandas as pd
+
+
+INDEX_COLUMNS = ["Time", "Hash", "Status Key", "Wait Time Key", "Unchanged Since"]
+LAST_SNAPSHOT_KEY = "index/last.json"
+
+# Columns that define snapshot content, in canonical order
+HASH_COLUMNS = ["Map ID", "Lift ID", "Lift", "Status", "Status Detail", "Wait Time"]
+
+# Last full snapshot per index namespace, kept across warm invocations
+_last_snapshots = {}
+
+
+def index_key(timestamp):
+    """S3 key of the snapshot index for the timestamp's day"""
+    return f"index/{timestamp.strftime('%Y%m%d')}.csv"
+
+
+def snapshot_hash(status_df, wait_time_df):
+    """
+    Canonical content hash of one extracted snapshot.
+
+    Rows are sorted by Lift ID and missing values rendered uniformly, so
+    the hash only changes when a lift's name, status or wait changes.
+    """
+    merged = status_df.merge(
+        wait_time_df[["Lift ID", "Wait Time"]], on="Lift ID", how="outer"
+    ) if "Wait Time" not in status_df.columns else status_df
+    columns = [column for column in HASH_COLUMNS if column in merged.columns]
+    canonical = merged[columns].sort_values("Lift ID").astype(object).where(merged[columns].notna(), "")
+    text = canonical.to_csv(index=False, header=True, lineterminator='\n')
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def index_row(timestamp, digest, status_key, wait_time_key, unchanged_since=""):
+    """Index entry for one run: a full snapshot, or a marker pointing at an earlier one"""
+    return {
+        "Time": timestamp.strftime('%Y%m%d_%H%M%S'),
+        "Hash": digest,
+        "Status Key": status_key,
+        "Wait Time Key": wait_time_key,
+        "Unchanged Since": unchanged_since,
+    }
+
+
+def last_to_json(row):
+    """Serialize the last full snapshot's index row"""
+    return json.dumps(row)
+
+
+def last_from_json(text):
+    """Load the last full snapshot's index row"""
+    return json.loads(text)
+
+
+def expand_index(index_df):
+    """
+    Expand an index into (time label, status key, wait time key) for every run.
+
+    Markers resolve to the keys of the full snapshot they repeat, so
+    readers see one entry per minute whether or not it was stored.
+    """
+    if index_df is None or index_df.empty:
+        return []
+    return list(zip(
+        index_df["Time"].astype(str), index_df["Status Key"].astype(str), index_df["Wait Time Key"].astype(str)
+    ))
+
+
+def index_to_df(rows):
+    """Build an index DataFrame with the index columns"""
+    return pd.DataFrame(rows, columns=INDEX_COLUMNS)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from lift_schema import LiftStatus, STATUS_LABELS
+
+
+EVENT_COLUMNS = ["Time", "Lift ID", "Event", "From", "To"]
+
+# Lower bounds of the wait bands; moving between bands emits a "wait" event
+WAIT_THRESHOLDS = [0, 10, 20, 30]
+
+
+def event_log_key(timestamp):
+    """S3 key of the append-only event log for the timestamp's day"""
+    return f"events/{timestamp.strftime('%Y%m%d')}.csv"
+
+
+def wait_bands(waits):
+    """Map wait times to band lower bounds (-1 where no wait was reported)"""
+    waits = np.asarray(waits, dtype=np.float64)
+    index = np.searchsorted(WAIT_THRESHOLDS, np.nan_to_num(waits, nan=0.0), side='right') - 1
+    bands = np.asarray(WAIT_THRESHOLDS)[index.clip(min=0)]
+    return np.where(np.isnan(waits), -1, bands)
+
+
+def _band_label(band):
+    return "" if band < 0 else str(band)
+
+
+def detect_transitions(previous, lift_ids, codes, waits, timestamp):
+    """
+    Compare a snapshot against the last known state.
+
+    Args:
+        previous: dict of Lift ID -> (status code, wait band)
+        lift_ids, codes, waits: per-lift snapshot arrays
+        timestamp: snapshot time
+
+    Returns:
+        tuple: (list of event dicts, new state dict)
+    """
+    time_label = timestamp.strftime('%Y%m%d_%H%M%S')
+    bands = wait_bands(waits)
+    state = dict(previous)
+    events = []
+
+    for lift_id, code, band in zip(lift_ids, codes, bands):
+        lift_id, code, band = int(lift_id), int(code), int(band)
+        old = previous.get(lift_id)
+        old_code, old_band = old if old else (None, None)
+
+        if old_code != code:
+            events.append({
+                "Time": time_label, "Lift ID": lift_id, "Event": "status",
+                "From": "" if old_code is None else STATUS_LABELS[LiftStatus(old_code)],
+                "To": STATUS_LABELS[LiftStatus(code)],
+            })
+        if old_band is not None and old_band != band:
+            events.append({
+                "Time": time_label, "Lift ID": lift_id, "Event": "wait",
+                "From": _band_label(old_band), "To": _band_label(band),
+            })
+        state[lift_id] = (code, band)
+
+    return events, state
+
+
+def events_to_df(events):
+    """Build an event DataFrame with the event log columns"""
+    return pd.DataFrame(events, columns=EVENT_COLUMNS)
+
+
+def find_events(events_df, lift_id, event="status", to=None):
+    """Filter an event log to one lift, optionally to transitions into a given state"""
+    mask = (events_df["Lift ID"] == lift_id) & (events_df["Event"] == event)
+    if to is not None:
+        mask &= events_df["To"].astype(str) == str(to)
+    return events_df[mask]
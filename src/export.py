@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Downsampled wait-time series for dashboards.
+
+Usage: python3 src/export.py --bucket <bucket> [--start 20260101] [--end 20260201] [--points 500] [--method lttb]
+       python3 src/export.py --output-dir ./output --method minmax
+"""
+import argparse
+import json
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from analytics import list_snapshot_runs, load_snapshot_matrix
+from batcher import MAX_BATCH_SPAN
+from sinks import resolve_sink
+
+
+DEFAULT_POINTS = 500
+METHODS = ("lttb", "minmax")
+# Downsampled ranges kept per process
+CACHE_ENTRIES = 64
+# How long after a run its snapshot may still appear (batched runs wait for their flush);
+# a range that ended longer ago than this can no longer change
+SETTLE_TIME = MAX_BATCH_SPAN
+
+
+def minmax_indices(wait, points):
+    """
+    Per-lift time indices of the min and max wait in each of points // 2 equal buckets.
+
+    Keeps every spike and dip at the cost of two points per bucket. Buckets
+    with no reported wait contribute their first minute (a gap).
+
+    Args:
+        wait: float array (L x T), NaN where no wait was reported
+        points: points per lift (the result has 2 * (points // 2) columns when T is larger)
+
+    Returns:
+        int array (L x P) of sorted time indices
+    """
+    lifts, length = wait.shape
+    if length <= points:
+        return np.broadcast_to(np.arange(length), (lifts, length))
+
+    buckets = max(1, points // 2)
+    starts = np.linspace(0, length, buckets + 1).astype(np.int64)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.r_[starts, length]))
+    columns = np.arange(length)
+
+    def first_index(filled, reduce):
+        extreme = reduce.reduceat(filled, starts, axis=1)
+        # First column in each bucket holding the bucket's extreme value
+        hits = np.where(filled == extreme[:, bucket_of], columns, length)
+        return np.minimum.reduceat(hits, starts, axis=1)
+
+    low = first_index(np.where(np.isnan(wait), np.inf, wait), np.minimum)
+    high = first_index(np.where(np.isnan(wait), -np.inf, wait), np.maximum)
+    return np.sort(np.stack([low, high], axis=2), axis=2).reshape(lifts, 2 * buckets)
+
+
+def lttb_indices(seconds, wait, points):
+    """
+    Per-lift time indices chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last minutes are kept; every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's average. Buckets are walked in order, but each step
+    is vectorized over all lifts and all candidates in the bucket. Missing
+    waits are never chosen over reported ones.
+
+    Args:
+        seconds: float array (T) of snapshot times
+        wait: float array (L x T), NaN where no wait was reported
+        points: points per lift (at least 3)
+
+    Returns:
+        int array (L x P) of increasing time indices
+    """
+    lifts, length = wait.shape
+    if length <= points:
+        return np.broadcast_to(np.arange(length), (lifts, length))
+
+    buckets = points - 2
+    edges = (1 + np.linspace(0, length - 2, buckets + 1)).astype(np.int64)
+    valid = ~np.isnan(wait)
+    filled = np.where(valid, wait, 0.0)
+
+    # Average point of every bucket, used as the third triangle vertex (the
+    # segment after the last edge is the final point alone and is dropped)
+    counts = np.add.reduceat(valid.astype(np.int64), edges, axis=1)[:, :-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average_wait = np.add.reduceat(filled, edges, axis=1)[:, :-1] / counts
+    average_time = np.add.reduceat(seconds, edges)[:-1] / np.diff(edges)
+    average_wait = np.c_[average_wait, wait[:, -1]]
+    average_time = np.r_[average_time, seconds[-1]]
+
+    rows = np.arange(lifts)
+    chosen = np.empty((lifts, points), dtype=np.int64)
+    chosen[:, 0] = 0
+    chosen[:, -1] = length - 1
+    previous_time = np.full(lifts, seconds[0])
+    previous_wait = wait[:, 0]
+    for bucket in range(buckets):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_time, next_wait = average_time[bucket + 1], average_wait[:, bucket + 1]
+        # Across gaps, anchor on whichever neighbour is known
+        anchor = np.where(np.isnan(previous_wait), next_wait, previous_wait)
+        next_wait = np.where(np.isnan(next_wait), anchor, next_wait)
+        anchor, next_wait = np.nan_to_num(anchor), np.nan_to_num(next_wait)
+
+        area = np.abs(
+            (previous_time[:, None] - next_time) * (wait[:, lo:hi] - anchor[:, None])
+            - (previous_time[:, None] - seconds[lo:hi]) * (next_wait - anchor)[:, None]
+        )
+        area = np.where(valid[:, lo:hi], area, -1.0)
+        best = lo + np.argmax(area, axis=1)
+        chosen[:, bucket + 1] = best
+        previous_time = seconds[best]
+        previous_wait = wait[rows, best]
+    return chosen
+
+
+def build_series(matrix, points=DEFAULT_POINTS, method="lttb"):
+    """
+    Downsample every lift of a SnapshotMatrix to a fixed number of points.
+
+    Returns:
+        dict: {"method", "points", "start", "end", "lifts": [{"id", "name", "times", "waits"}]}
+        with times in epoch seconds and null for missing waits
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method {method!r}; expected one of {', '.join(METHODS)}")
+    seconds = matrix.times.astype(np.int64)
+    if method == "lttb":
+        indices = lttb_indices(seconds.astype(np.float64), matrix.wait.astype(np.float64), max(points, 3))
+    else:
+        indices = minmax_indices(matrix.wait, points)
+
+    times = seconds[indices]
+    waits = np.take_along_axis(matrix.wait, indices, axis=1)
+    lifts = []
+    for row, (lift_id, name) in enumerate(zip(matrix.lift_ids, matrix.names)):
+        lifts.append({
+            "id": int(lift_id),
+            "name": name,
+            "times": times[row].tolist(),
+            "waits": [None if np.isnan(wait) else round(float(wait), 1) for wait in waits[row]],
+        })
+    return {
+        "method": method,
+        "points": int(indices.shape[1]),
+        "start": int(seconds[0]) if len(seconds) else None,
+        "end": int(seconds[-1]) if len(seconds) else None,
+        "lifts": lifts,
+    }
+
+
+class SeriesCache:
+    """
+    Downsampled ranges by (location, prefix, start, end, points, method), least recently used first out.
+
+    Each entry remembers the newest snapshot it covered. A range that ends
+    before that snapshot can never change; otherwise a lookup first lists
+    runs newer than it (one listing plus the day's index) and recomputes
+    when any arrived.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, newest, document):
+        with self._lock:
+            self.entries[key] = (newest, document)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, prefix=None):
+        """Drop every entry, or those of one output prefix"""
+        with self._lock:
+            for key in [key for key in self.entries if prefix is None or key[1] == prefix]:
+                del self.entries[key]
+
+
+_cache = SeriesCache()
+
+
+def export_series(start=None, end=None, points=DEFAULT_POINTS, method="lttb", bucket_name=None, directory=None,
+                  key_prefix='', registry=None, sink=None, cache=_cache):
+    """
+    Downsampled wait series per lift for a time range, served from cache when still current.
+
+    Args:
+        start, end: range as in analytics.load_snapshot_matrix
+        points: points per lift
+        method: "lttb" (shape-preserving) or "minmax" (keeps every extreme)
+        cache: SeriesCache to use, or None to always recompute
+
+    Returns:
+        dict: see build_series
+    """
+    sink = resolve_sink(sink, bucket_name, directory)
+    key = (sink.describe(), key_prefix, start, end, points, method)
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None:
+        newest, document = entry
+        closed = end is not None and end + SETTLE_TIME <= datetime.now(timezone.utc)
+        # An empty cached range has no newest run: look for any run in the range, with no lower bound if open
+        since = newest + timedelta(seconds=1) if newest else start
+        if closed or not list_snapshot_runs(sink, since, end, key_prefix):
+            cache.hits += 1
+            return document
+
+    matrix = load_snapshot_matrix(start, end, registry=registry, key_prefix=key_prefix, sink=sink)
+    document = build_series(matrix, points, method)
+    if cache is not None:
+        cache.misses += 1
+        newest = matrix.times[-1].astype(datetime).replace(tzinfo=timezone.utc) if len(matrix.times) else None
+        cache.put(key, newest, document)
+    return document
+
+
+def _parse_time(text):
+    if not text:
+        return None
+    return datetime.strptime(text, '%Y%m%d_%H%M%S' if '_' in text else '%Y%m%d').replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export downsampled wait-time series as JSON")
+    parser.add_argument('--bucket', help="S3 bucket holding the snapshots")
+    parser.add_argument('--output-dir', help="Local directory holding the snapshots")
+    parser.add_argument('--prefix', default='', help="Key prefix of a batch output namespace")
+    parser.add_argument('--start', help="Inclusive start (YYYYMMDD or YYYYMMDD_HHMMSS, UTC)")
+    parser.add_argument('--end', help="Exclusive end (YYYYMMDD or YYYYMMDD_HHMMSS, UTC)")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help="Points per lift")
+    parser.add_argument('--method', choices=METHODS, default="lttb", help="Downsampling method")
+    args = parser.parse_args()
+
+    if not (args.bucket or args.output_dir):
+        parser.error("--bucket or --output-dir is required")
+    document = export_series(_parse_time(args.start), _parse_time(args.end), args.points, args.method,
+                             bucket_name=args.bucket, directory=args.output_dir, key_prefix=args.prefix)
+    json.dump(document, sys.stdout, separators=(',', ':'))
+
+
+if __name__ == "__main__":
+    main()
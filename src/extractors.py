@@ -0,0 +1,150 @@
+import pandas as pd
+
+from lift_registry import lift_key
+from lift_schema import STATUS_DTYPE, STATUS_LABELS, normalize_status, normalize_wait_time, type_wait_time_df
+
+
+class Field:
+    """
+    One output column (or group of columns) read from a payload item.
+
+    Args:
+        columns: column name, or tuple of names when convert returns a tuple
+        source: key in the payload item
+        default: value used when the key is missing
+        convert: optional callable applied to the raw value
+    """
+
+    def __init__(self, columns, source, default=None, convert=None):
+        self.columns = columns if isinstance(columns, tuple) else (columns,)
+        self.source = source
+        self.default = default
+        self.convert = convert
+
+    def extract(self, item, row):
+        value = item.get(self.source, self.default)
+        if self.convert is not None:
+            value = self.convert(value)
+        if len(self.columns) == 1:
+            row[self.columns[0]] = value
+        else:
+            row.update(zip(self.columns, value))
+
+
+class Entity:
+    """
+    A kind of map feature (lifts, trails, POIs) and the fields to extract.
+
+    Args:
+        name: entity name, also the output key prefix (e.g. "trails")
+        collection: key of the item list in the map payload
+        fields: list of Field
+        id_column: column filled from an ID registry (e.g. "Lift ID"), or None
+        log_format: optional per-item log line, formatted with the raw item
+    """
+
+    def __init__(self, name, collection, fields, id_column=None, log_format=None):
+        self.name = name
+        self.collection = collection
+        self.fields = fields
+        self.id_column = id_column
+        self.log_format = log_format
+
+    @property
+    def columns(self):
+        columns = ["Map ID"] + ([self.id_column] if self.id_column else ["Key"])
+        for field in self.fields:
+            columns.extend(field.columns)
+        return columns
+
+
+class _RawItem(dict):
+    """Item view that renders missing keys as "N/A" in log lines"""
+
+    def __missing__(self, key):
+        return "N/A"
+
+
+def _status_columns(raw):
+    status, detail = normalize_status(raw)
+    return STATUS_LABELS[status], detail
+
+
+LIFTS = Entity("lifts", "lifts", [
+    Field("Lift", "name", "Unknown"),
+    Field(("Status", "Status Detail"), "status", "Unknown", _status_columns),
+    Field("Wait Time", "waitTime", "N/A", normalize_wait_time),
+], id_column="Lift ID", log_format="Lift: {name}, Status: {status}, Wait Time: {waitTime} minutes")
+
+TRAILS = Entity("trails", "trails", [
+    Field("Trail", "name", "Unknown"),
+    Field(("Status", "Status Detail"), "status", "Unknown", _status_columns),
+    Field("Difficulty", "difficulty"),
+    Field("Groomed", "groomed"),
+])
+
+POIS = Entity("pois", "pois", [
+    Field("POI", "name", "Unknown"),
+    Field("Type", "type"),
+    Field(("Status", "Status Detail"), "status", "Unknown", _status_columns),
+])
+
+# Entities extracted from every fetched payload, keyed by name
+ENTITIES = {entity.name: entity for entity in (LIFTS, TRAILS, POIS)}
+
+
+def register_entity(entity):
+    """Add (or replace) an entity so every scrape extracts it"""
+    ENTITIES[entity.name] = entity
+
+
+def extract_payload(payload, map_id, rows, registries=None, entities=None):
+    """
+    Extract every registered entity from one decoded map payload.
+
+    Each entity's collection is walked once; rows are appended to
+    rows[entity name] so several payloads can be accumulated.
+
+    Args:
+        payload: decoded JSON for one map
+        map_id: map the payload came from
+        rows: dict of entity name -> list of row dicts (filled in place)
+        registries: dict of entity name -> registry with lift_id(map_id, item),
+            used for entities that declare an id_column
+        entities: entities to extract (defaults to ENTITIES)
+    """
+    registries = registries or {}
+    for entity in (entities or ENTITIES).values():
+        entity_rows = rows.setdefault(entity.name, [])
+        registry = registries.get(entity.name)
+        items = payload.get(entity.collection) or []
+        # Stored registries assign all of a payload's new IDs in one write
+        if entity.id_column and hasattr(registry, "reserve"):
+            registry.reserve(map_id, items)
+
+        for item in items:
+            if entity.log_format:
+                print(entity.log_format.format_map(_RawItem(item)))
+
+            row = {"Map ID": map_id}
+            if entity.id_column and registry is not None:
+                row[entity.id_column] = registry.lift_id(map_id, item)
+            else:
+                row["Key"] = lift_key(item)
+            for field in entity.fields:
+                field.extract(item, row)
+            entity_rows.append(row)
+
+
+def rows_to_df(entity, entity_rows):
+    """Build a typed DataFrame for one entity's rows"""
+    df = pd.DataFrame(entity_rows, columns=entity.columns)
+    if "Status" in df.columns:
+        df["Status"] = df["Status"].astype(STATUS_DTYPE)
+        df["Status Detail"] = df["Status Detail"].astype("string")
+    if "Wait Time" in df.columns:
+        df = type_wait_time_df(df)
+    for column in ("Map ID", entity.id_column):
+        if column and column in df.columns:
+            df[column] = df[column].astype("int32")
+    return df
@@ -0,0 +1,136 @@
+import json
+import re
+
+import boto3
+
+import lease
+
+
+MAP_COSTS_KEY = "metrics/map_costs.json"
+
+# Last component of a fan-out batch's prefix, e.g. "west/maps-152-1446/" (see batch_prefix)
+BATCH_NAMESPACE_PATTERN = re.compile(r'maps(?:-\d+)+/$')
+
+# Cost assumed for maps that have never been measured (seconds)
+DEFAULT_MAP_COST = 2.0
+
+# Weight of the newest sample in the per-map moving average
+COST_SMOOTHING = 0.3
+
+
+def update_map_costs(costs, fetch_seconds, smoothing=COST_SMOOTHING):
+    """
+    Fold measured fetch times into a per-map cost table.
+
+    Args:
+        costs: dict of map ID (as str) -> smoothed seconds
+        fetch_seconds: dict of map ID -> seconds measured this run
+
+    Returns:
+        dict: the updated cost table
+    """
+    costs = dict(costs)
+    for map_id, seconds in fetch_seconds.items():
+        key = str(map_id)
+        previous = costs.get(key)
+        costs[key] = seconds if previous is None else (1 - smoothing) * previous + smoothing * seconds
+    return costs
+
+
+def plan_batches(map_ids, costs=None, budget_seconds=60.0, max_batch_size=25, overhead_seconds=1.0):
+    """
+    Split a resort list into batches whose predicted run time fits the budget.
+
+    Uses first-fit decreasing on measured per-map cost, so expensive maps
+    are spread out and cheap maps fill the remaining room. A map costing
+    more than the budget on its own gets a batch to itself.
+
+    Args:
+        map_ids: map IDs to scrape
+        costs: dict of map ID (as str) -> seconds, from update_map_costs
+        budget_seconds: target duration of one invocation
+        max_batch_size: upper bound on maps per invocation
+        overhead_seconds: fixed per-invocation cost (startup, uploads)
+
+    Returns:
+        list: lists of map IDs, one per invocation
+    """
+    costs = costs or {}
+    ordered = sorted(map_ids, key=lambda map_id: -costs.get(str(map_id), DEFAULT_MAP_COST))
+
+    batches = []
+    loads = []
+    for map_id in ordered:
+        cost = costs.get(str(map_id), DEFAULT_MAP_COST)
+        for index, batch in enumerate(batches):
+            if len(batch) < max_batch_size and loads[index] + cost <= budget_seconds:
+                batch.append(map_id)
+                loads[index] += cost
+                break
+        else:
+            batches.append([map_id])
+            loads.append(overhead_seconds + cost)
+
+    return batches
+
+
+def batch_prefix(base, map_ids):
+    """
+    Output namespace of one fan-out batch under a base prefix.
+
+    Concurrent invocations never share snapshot keys or the dedup index.
+    State keyed by lift or map ID (the lift registry, rollups, the event
+    log and latest.json) lives at the base (see shared_prefix), so it
+    follows a resort when a new plan moves it to another batch.
+    """
+    return f"{base}{lease.lease_name(map_ids)}/"
+
+
+def shared_prefix(prefix):
+    """Base prefix of a fan-out batch namespace (the prefix itself for any other prefix)"""
+    match = BATCH_NAMESPACE_PATTERN.search(prefix)
+    return prefix[:match.start()] if match and (match.start() == 0 or prefix[match.start() - 1] == '/') else prefix
+
+
+def batch_namespaces(sink, base=''):
+    """
+    Prefixes of the fan-out batch namespaces directly under a base, in key order.
+
+    Peeks at the first key of each namespace and skips past the rest,
+    so the cost is one listing per namespace rather than per object.
+    """
+    if shared_prefix(base) != base:
+        return []
+    head = f"{base}maps-"
+    namespaces = []
+    start_after = None
+    for key in iter(lambda: next(sink.list(head, start_after), None), None):
+        slash = key.find('/', len(head))
+        if slash < 0:
+            start_after = key
+            continue
+        namespace = key[:slash + 1]
+        if BATCH_NAMESPACE_PATTERN.fullmatch(namespace[len(base):]):
+            namespaces.append(namespace)
+        # '~' sorts after every character used in keys, so this skips the whole directory
+        start_after = namespace + '~'
+    return namespaces
+
+
+def batch_events(batches, output=None):
+    """Build one Lambda batch event per batch, each writing to its own namespace (batch_prefix)"""
+    output = dict(output or {})
+    base = output.get('prefix', '')
+    return [{"map_ids": list(batch), "output": dict(output, prefix=batch_prefix(base, batch))} for batch in batches]
+
+
+def invoke_batches(function_name, events):
+    """Invoke the scraper Lambda asynchronously once per batch event"""
+    lambda_client = boto3.client('lambda')
+    for event in events:
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps(event).encode('utf-8'),
+        )
+        print(f"Invoked {function_name} for maps {event['map_ids']}")
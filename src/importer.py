@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from analytics import ARCHIVE_PREFIX, TIMESTAMP_FORMAT, _with_lift_ids, archive_key, list_snapshot_runs
+from lift_registry import LiftRegistry
+from lift_schema import type_status_df, type_wait_time_df
+from sinks import LocalSink, S3Sink, df_to_csv, read_df, read_text, resolve_sink, write_text
+
+
+MANIFEST_KEY = "archive/manifest.json"
+ARCHIVE_COLUMNS = ["Time", "Map ID", "Lift ID", "Lift", "Status", "Status Detail", "Wait Time"]
+REGISTRY_KEY = "lifts.csv"
+
+
+def _typed_frame(df, registry, lock, kind):
+    """Type one status or wait time frame and key it by Lift ID"""
+    df = type_status_df(df) if kind == "status" else type_wait_time_df(df)
+    with lock:
+        return _with_lift_ids(df, registry)
+
+
+def join_snapshots(status_df, wait_time_df):
+    """
+    Join long-format status and wait rows on (Time, Lift ID) in one merge.
+
+    Returns:
+        DataFrame with ARCHIVE_COLUMNS, sorted by time and lift
+    """
+    if "Map ID" not in status_df.columns:
+        status_df = status_df.assign(**{"Map ID": 0})
+    joined = status_df[["Time", "Map ID", "Lift ID", "Lift", "Status", "Status Detail"]].merge(
+        wait_time_df[["Time", "Lift ID", "Wait Time"]], on=["Time", "Lift ID"], how="left"
+    )
+    joined["Map ID"] = joined["Map ID"].astype("int32")
+    return joined.sort_values(["Time", "Lift ID"], kind="stable").reset_index(drop=True)[ARCHIVE_COLUMNS]
+
+
+def read_day(source, runs, registry, lock):
+    """
+    Read every snapshot pair of one day and join them in a single vectorized merge.
+
+    Args:
+        runs: (timestamp, status key, wait time key) tuples; dedup markers
+            repeat earlier keys, which are read once
+    """
+    frames = {}
+
+    def frame(key):
+        if key not in frames:
+            frames[key] = read_df(source, key)
+        return frames[key]
+
+    labels = [timestamp.strftime(TIMESTAMP_FORMAT) for timestamp, _, _ in runs]
+    status_frames = [frame(status_key) for _, status_key, _ in runs]
+    wait_frames = [frame(wait_time_key) for _, _, wait_time_key in runs]
+
+    # Stamp and type the whole day at once rather than file by file
+    status_df = pd.concat(status_frames, ignore_index=True)
+    status_df["Time"] = np.repeat(labels, [len(df) for df in status_frames])
+    wait_time_df = pd.concat(wait_frames, ignore_index=True)
+    wait_time_df["Time"] = np.repeat(labels, [len(df) for df in wait_frames])
+    return join_snapshots(
+        _typed_frame(status_df, registry, lock, "status"), _typed_frame(wait_time_df, registry, lock, "wait")
+    )
+
+
+def read_history(source, status_key, wait_time_key, registry, lock):
+    """
+    Read the appended status.csv/wait_time.csv history written by parse_json.py.
+
+    Rows carrying a Time column are joined like snapshot pairs. Rows from
+    before parse_json.py recorded times cannot be placed on the timeline
+    and are returned separately.
+
+    Returns:
+        tuple: (dated DataFrame with ARCHIVE_COLUMNS, undated status rows, undated wait time rows)
+    """
+    status_df = read_df(source, status_key)
+    wait_time_df = read_df(source, wait_time_key)
+    if status_df is None or wait_time_df is None:
+        raise ValueError(f"History needs both {status_key} and {wait_time_key}")
+
+    parts = []
+    for df, kind in ((status_df, "status"), (wait_time_df, "wait")):
+        has_time = df["Time"].notna() if "Time" in df.columns else pd.Series(False, index=df.index)
+        dated = df[has_time].drop(columns=["Lift ID"], errors="ignore")
+        dated = dated.assign(Time=dated["Time"].astype(str))
+        # Older rows predate the Map ID/Lift ID columns, which are empty for them
+        undated = df[~has_time].drop(columns=["Time", "Lift ID"], errors="ignore").dropna(axis=1, how="all")
+        parts.append((_typed_frame(dated, registry, lock, kind), _typed_frame(undated, registry, lock, kind)))
+
+    (dated_status, undated_status), (dated_wait, undated_wait) = parts
+    return join_snapshots(dated_status, dated_wait), undated_status, undated_wait
+
+
+def import_archive(source, target, key_prefix='', max_workers=8, history=None, start=None, end=None):
+    """
+    Import legacy snapshot pairs (and optionally the appended history) into day partitions.
+
+    Each day becomes one long-format object archive/YYYYMMDD.csv in the
+    target (ARCHIVE_COLUMNS, one row per lift per snapshot), readable by
+    aggregate.aggregate_files. Days are imported in parallel, each written
+    in one atomic put. A manifest records how many source runs and
+    history rows each day was built from; rerunning after an interruption
+    skips days whose sources are unchanged.
+
+    Args:
+        source, target: sinks.Sink to read legacy files from and write partitions to
+        key_prefix: key prefix of the legacy files in the source
+        max_workers: days imported in parallel
+        history: optional (status key, wait time key) of parse_json.py history
+        start, end: optional range of snapshot times to import
+
+    Returns:
+        dict: days imported and skipped, rows written, seconds and rows per second
+    """
+    started = time.perf_counter()
+    lock = threading.Lock()
+    registry_df = read_df(target, REGISTRY_KEY)
+    if registry_df is None:
+        registry_df = read_df(source, key_prefix + REGISTRY_KEY)
+    registry = LiftRegistry() if registry_df is None else LiftRegistry.from_df(registry_df)
+
+    manifest_text = read_text(target, MANIFEST_KEY)
+    manifest = json.loads(manifest_text) if manifest_text else {}
+
+    days = {}
+    for run in list_snapshot_runs(source, start, end, key_prefix):
+        days.setdefault(run[0].strftime('%Y%m%d'), []).append(run)
+
+    history_days = {}
+    if history:
+        dated, undated_status, undated_wait = read_history(source, *history, registry, lock)
+        history_days = {day: rows for day, rows in dated.groupby(dated["Time"].str[:8])}
+        if not undated_status.empty or not undated_wait.empty:
+            print(f"{len(undated_status)} status and {len(undated_wait)} wait time history rows have no "
+                  f"timestamp; writing them to {ARCHIVE_PREFIX}undated/")
+            target.write_many([
+                (f"{ARCHIVE_PREFIX}undated/status.csv", df_to_csv(undated_status), 'text/csv'),
+                (f"{ARCHIVE_PREFIX}undated/wait_time.csv", df_to_csv(undated_wait), 'text/csv'),
+            ])
+
+    def sources(day):
+        history_rows = history_days.get(day)
+        return {"runs": len(days.get(day, [])), "history_rows": 0 if history_rows is None else len(history_rows)}
+
+    pending = [day for day in sorted(set(days) | set(history_days)) if manifest.get(day) != sources(day)]
+    skipped = len(set(days) | set(history_days)) - len(pending)
+    print(f"Importing {len(pending)} days ({skipped} already imported)")
+
+    def import_day(day):
+        parts = [read_day(source, days[day], registry, lock)] if day in days else []
+        if day in history_days:
+            parts.append(history_days[day])
+        partition = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        partition = partition.drop_duplicates(["Time", "Lift ID"]).sort_values(["Time", "Lift ID"], kind="stable")
+        target.write(archive_key(day), df_to_csv(partition), 'text/csv')
+        return day, len(partition)
+
+    rows = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(import_day, day) for day in pending]
+        for future in as_completed(futures):
+            day, day_rows = future.result()
+            rows += day_rows
+            # Persist new lift IDs before the day counts as done, so a resumed import reuses them
+            with lock:
+                if registry.dirty:
+                    target.write(REGISTRY_KEY, df_to_csv(registry.to_df()), 'text/csv')
+                    registry.dirty = False
+            # Record each finished day immediately so an interrupted import resumes after it
+            manifest[day] = sources(day)
+            write_text(target, MANIFEST_KEY, json.dumps(manifest, sort_keys=True))
+            elapsed = time.perf_counter() - started
+            print(f"Imported {day}: {day_rows} rows ({rows / elapsed:,.0f} rows/s)")
+
+    if registry.dirty:
+        target.write(REGISTRY_KEY, df_to_csv(registry.to_df()), 'text/csv')
+        registry.dirty = False
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "days": len(pending),
+        "skipped": skipped,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds else 0.0,
+    }
+    print(f"Import finished: {rows:,} rows in {seconds:.1f}s ({stats['rows_per_second']:,.0f} rows/s)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import legacy snapshot CSVs into day partitions")
+    parser.add_argument('--source-dir', help="Local directory holding status_/wait_time_ CSVs")
+    parser.add_argument('--source-bucket', help="S3 bucket holding status_/wait_time_ CSVs")
+    parser.add_argument('--prefix', default='', help="Key prefix of the legacy files")
+    parser.add_argument('--target-dir', help="Local directory to write archive/ partitions to")
+    parser.add_argument('--target-bucket', help="S3 bucket to write archive/ partitions to")
+    parser.add_argument('--history', nargs=2, metavar=('STATUS', 'WAIT_TIME'),
+                        help="Keys of the appended parse_json.py history (e.g. status.csv wait_time.csv)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="Days imported in parallel")
+    parser.add_argument('--compress', action='store_true', help="Gzip the partitions")
+    args = parser.parse_args()
+
+    if not (args.source_dir or args.source_bucket):
+        parser.error("--source-dir or --source-bucket is required")
+    if args.target_dir:
+        target = LocalSink(args.target_dir, compress=args.compress)
+    elif args.target_bucket:
+        target = S3Sink(args.target_bucket, compress=args.compress)
+    else:
+        parser.error("--target-dir or --target-bucket is required")
+
+    source = resolve_sink(bucket_name=args.source_bucket, directory=args.source_dir)
+    import_archive(source, target, args.prefix, args.workers, args.history)
+
+
+if __name__ == "__main__":
+    main()
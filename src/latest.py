@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Latest lift state: payload builder, in-memory response cache and a small HTTP server.
+
+Usage: python3 src/latest.py --bucket <bucket> [--prefix west/] [--port 8080] [--refresh 15]
+       python3 src/latest.py --output-dir output [--prefix west/]
+       python3 src/latest.py --file latest.json
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from sinks import resolve_sink
+
+
+LATEST_KEY = "latest.json"
+
+
+def build_latest(status_df, wait_time_df, timestamp):
+    """
+    Build the latest-state document from one scraped snapshot.
+
+    Returns:
+        dict: {"updated": ..., "resorts": {map_id: {"lifts": [...]}}}
+    """
+    merged = status_df.merge(wait_time_df[["Lift ID", "Wait Time"]], on="Lift ID", how="left")
+    details = merged["Status Detail"] if "Status Detail" in merged.columns else [None] * len(merged)
+
+    resorts = {}
+    for map_id, lift_id, name, status, detail, wait in zip(
+        merged["Map ID"], merged["Lift ID"], merged["Lift"], merged["Status"], details, merged["Wait Time"]
+    ):
+        resorts.setdefault(str(map_id), {"lifts": []})["lifts"].append({
+            "id": int(lift_id),
+            "name": name,
+            "status": str(status),
+            "detail": None if pd.isna(detail) else detail,
+            "wait": None if pd.isna(wait) else int(wait),
+        })
+    return {"updated": timestamp.isoformat(), "resorts": resorts}
+
+
+def merge_latest(current, document):
+    """
+    Merge one fan-out batch's document into the latest state shared by its base.
+
+    The batch's resorts replace their earlier entries and every other
+    resort is kept. Batches publish independently, so each resort carries
+    its own "updated" time.
+    """
+    current = current or {}
+    resorts = dict(current.get("resorts", {}))
+    for map_id, resort in document["resorts"].items():
+        resorts[map_id] = {"updated": document["updated"], **resort}
+    return {"updated": max(filter(None, [current.get("updated"), document["updated"]])), "resorts": resorts}
+
+
+class CachedBody:
+    """A response body with its gzip encoding and ETag computed once"""
+
+    def __init__(self, document):
+        self.raw = json.dumps(document, separators=(',', ':')).encode('utf-8')
+        self.gzipped = gzip.compress(self.raw, mtime=0)
+        self.etag = '"' + hashlib.sha1(self.raw).hexdigest() + '"'
+
+
+class LatestCache:
+    """
+    In-memory latest state, one precomputed body per path.
+
+    Paths are "/latest" for all resorts and "/latest/<map_id>" per resort.
+    Requests are served entirely from memory; only update() does work.
+    """
+
+    def __init__(self):
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def update(self, document):
+        """Replace the cached state; returns False if nothing changed"""
+        bodies = {"/latest": CachedBody(document)}
+        for map_id, resort in document.get("resorts", {}).items():
+            bodies[f"/latest/{map_id}"] = CachedBody({"updated": document.get("updated"), **resort})
+
+        current = self._bodies.get("/latest")
+        if current is not None and current.etag == bodies["/latest"].etag:
+            return False
+        with self._lock:
+            self._bodies = bodies
+        return True
+
+    def response(self, path, if_none_match=None, accept_encoding=''):
+        """
+        Return (status, headers, body) for a request.
+
+        Honors If-None-Match with 304 and serves the gzip body when accepted.
+        """
+        body = self._bodies.get(path.rstrip('/') or '/')
+        if body is None:
+            return 404, {'Content-Length': '0'}, b''
+
+        headers = {'ETag': body.etag, 'Cache-Control': 'max-age=15', 'Vary': 'Accept-Encoding'}
+        if if_none_match and body.etag in [tag.strip() for tag in if_none_match.split(',')]:
+            headers['Content-Length'] = '0'
+            return 304, headers, b''
+
+        headers['Content-Type'] = 'application/json'
+        if 'gzip' in accept_encoding:
+            headers['Content-Encoding'] = 'gzip'
+            payload = body.gzipped
+        else:
+            payload = body.raw
+        headers['Content-Length'] = str(len(payload))
+        return 200, headers, payload
+
+
+def make_handler(cache):
+    """Build a request handler class bound to a LatestCache"""
+
+    class LatestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; avoid the Nagle/delayed-ACK stall
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            status, headers, body = cache.response(
+                self.path, self.headers.get('If-None-Match'), self.headers.get('Accept-Encoding', '')
+            )
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate the cost of serving from memory
+            pass
+
+    return LatestHandler
+
+
+def poll_latest(cache, sink, key, version=None):
+    """
+    Read latest.json if it changed since `version` and update the cache.
+
+    Returns:
+        the version now cached
+    """
+    body, current = sink.read_if_changed(key, version)
+    if body is not None and cache.update(json.loads(body)):
+        print(f"Refreshed latest state from {sink.describe(key)} (version {current})")
+    return current if body is not None else version
+
+
+def refresh_latest(cache, sink, interval, prefix=''):
+    """Poll a namespace's latest.json and update the cache when it changes; errors never stop the loop"""
+    key = prefix + LATEST_KEY
+    version = None
+    while True:
+        try:
+            version = poll_latest(cache, sink, key, version)
+        except Exception as e:
+            print(f"ERROR: Failed to refresh latest state: {e}")
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the latest lift state from memory")
+    parser.add_argument('--bucket', help="S3 bucket holding latest.json")
+    parser.add_argument('--output-dir', help="Local output directory holding latest.json")
+    parser.add_argument('--prefix', default='', help="Output prefix whose latest.json to serve")
+    parser.add_argument('--file', help="Local latest.json to serve as is")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--refresh', type=float, default=15, help="Seconds between polls")
+    args = parser.parse_args()
+
+    cache = LatestCache()
+    if args.file:
+        with open(args.file, 'r') as f:
+            cache.update(json.load(f))
+    elif args.bucket or args.output_dir:
+        sink = resolve_sink(bucket_name=args.bucket, directory=args.output_dir)
+        threading.Thread(target=refresh_latest, args=(cache, sink, args.refresh, args.prefix), daemon=True).start()
+    else:
+        parser.error("--bucket, --output-dir or --file is required")
+
+    server = ThreadingHTTPServer(('', args.port), make_handler(cache))
+    print(f"Serving latest state on port {args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import fcntl
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from botocore.exceptions import ClientError
+
+from sinks import CONFLICT_CODES
+
+
+LEASE_PREFIX = "leases/"
+
+MISSING_CODES = ('NoSuchKey', '404')
+
+
+def lease_name(map_ids):
+    """Lease name for a set of maps scraped together"""
+    return "maps-" + "-".join(str(map_id) for map_id in sorted(map_ids))
+
+
+def time_bucket(now, bucket_seconds=60):
+    """Label of the schedule slot a run belongs to (e.g. 20260102_0930)"""
+    epoch = int(now.timestamp()) // bucket_seconds * bucket_seconds
+    return time.strftime('%Y%m%d_%H%M', time.gmtime(epoch))
+
+
+class S3Lease:
+    """
+    Conditional-write lease on one S3 object per resort.
+
+    The object records the owner, the time bucket being worked on, an
+    expiry and whether the run completed. acquire() decides:
+
+    - no lease object: create it with If-None-Match: * (one writer wins)
+    - active and unexpired: skip, another run is still working
+    - completed for this same bucket: skip, the slot was already done
+    - completed for an older bucket, or expired: take over with If-Match
+      on the ETag that was read, so only one of several late runs wins
+    """
+
+    def __init__(self, s3_client, bucket_name, name, bucket, ttl_seconds=300, owner=None, prefix='',
+                 clock=time.time):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = f"{prefix}{LEASE_PREFIX}{name}.json"
+        self.bucket = bucket
+        self.ttl_seconds = ttl_seconds
+        self.owner = owner or uuid.uuid4().hex
+        self.clock = clock
+        self.etag = None
+
+    def _body(self, completed=False, expires=None):
+        return json.dumps({
+            "owner": self.owner,
+            "bucket": self.bucket,
+            "expires": self.clock() + self.ttl_seconds if expires is None else expires,
+            "completed": completed,
+        })
+
+    def _put(self, completed=False, expires=None, **condition):
+        """Conditional put; returns the new ETag, or None if the condition failed"""
+        try:
+            response = self.s3_client.put_object(
+                Bucket=self.bucket_name, Key=self.key, Body=self._body(completed, expires),
+                ContentType='application/json', **condition
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in CONFLICT_CODES:
+                return None
+            raise
+        return response.get('ETag')
+
+    def acquire(self):
+        """Try to take the lease; returns True if this owner now holds it"""
+        self.etag = self._put(IfNoneMatch='*')
+        if self.etag:
+            return True
+
+        try:
+            current = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in MISSING_CODES:
+                # Deleted between our write and read; one fresh attempt
+                self.etag = self._put(IfNoneMatch='*')
+                return self.etag is not None
+            raise
+
+        held = json.loads(current['Body'].read())
+        if held.get('completed') and held.get('bucket') == self.bucket:
+            print(f"Lease {self.key}: bucket {self.bucket} already completed; skipping")
+            return False
+        if not held.get('completed') and held.get('expires', 0) > self.clock():
+            print(f"Lease {self.key} held by {held.get('owner')} for {held.get('bucket')}; skipping")
+            return False
+
+        self.etag = self._put(IfMatch=current['ETag'])
+        if self.etag is None:
+            print(f"Lease {self.key}: lost takeover race; skipping")
+            return False
+        if not held.get('completed'):
+            print(f"Took over expired lease {self.key} from {held.get('owner')}")
+        return True
+
+    def release(self, completed=True):
+        """
+        Give up the lease; a lease taken over in the meantime is left alone.
+
+        A finished run marks its bucket completed, so duplicates skip it. A
+        failed run (completed=False) expires the lease instead, so a retry
+        for the same bucket can take it over at once.
+        """
+        if self.etag is None:
+            return
+        expires = None if completed else self.clock()
+        if self._put(completed=completed, expires=expires, IfMatch=self.etag) is None:
+            print(f"Lease {self.key} was taken over before release")
+        self.etag = None
+
+
+class FileLease:
+    """
+    Local lock file for daemon mode.
+
+    The lock file is created with O_EXCL. A lock older than its TTL (left
+    by a crashed run) is replaced through an atomic rename. Acquire and
+    release run under an exclusive flock on the lock's directory, so the
+    expiry check and the takeover are one step and two runners can never
+    both take over the same expired lock.
+    """
+
+    def __init__(self, path, ttl_seconds=300, owner=None, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.owner = owner or uuid.uuid4().hex
+        self.clock = clock
+        self.held = False
+
+    def _body(self):
+        return json.dumps({"owner": self.owner, "expires": self.clock() + self.ttl_seconds})
+
+    def acquire(self):
+        """Try to take the lock; returns True if this owner now holds it"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._guard():
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return self._take_over_if_expired()
+            with os.fdopen(fd, 'w') as f:
+                f.write(self._body())
+        self.held = True
+        return True
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @contextmanager
+    def _guard(self):
+        """Exclusive flock on the lock's directory (released when the descriptor closes)"""
+        fd = os.open(os.path.dirname(self.path) or '.', os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _take_over_if_expired(self):
+        # Called under the guard: a runner that took over first has already written a fresh expiry
+        held = self._read()
+        if held.get('expires', 0) > self.clock():
+            print(f"Lock {self.path} held by {held.get('owner')}; skipping")
+            return False
+
+        tmp_path = f"{self.path}.{self.owner}"
+        with open(tmp_path, 'w') as f:
+            f.write(self._body())
+        os.replace(tmp_path, self.path)
+        self.held = True
+        return True
+
+    def release(self, completed=True):
+        """Remove the lock file if this owner still holds it (whether or not the run completed)"""
+        if self.held:
+            with self._guard():
+                if self._read().get('owner') == self.owner:
+                    try:
+                        os.remove(self.path)
+                    except FileNotFoundError:
+                        pass
+        self.held = False
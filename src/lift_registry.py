@@ -0,0 +1,89 @@
+import pandas as pd
+
+
+REGISTRY_COLUMNS = ["Lift ID", "Map ID", "Key", "Lift"]
+
+
+def lift_key(lift):
+    """Return the stable key for a lift: the API lift id, falling back to its name"""
+    lift_id = lift.get("id")
+    if lift_id is not None and lift_id != "":
+        return str(lift_id)
+    return lift.get("name", "Unknown")
+
+
+class LiftRegistry:
+    """
+    Maps (map ID, lift key) pairs to compact integer lift IDs.
+
+    IDs are assigned in order of first sighting and never reused, so they
+    stay stable across runs as long as the registry is persisted. The
+    current display name of each lift is kept in an interned name table
+    indexed by lift ID; a rename updates the table but keeps the ID.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.map_ids = []
+        self.keys = []
+        self.names = []
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.names)
+
+    def lift_id(self, map_id, lift):
+        """Return the integer ID for a lift dict from the given map, assigning one if new"""
+        key = lift_key(lift)
+        name = lift.get("name", "Unknown")
+        ident = (int(map_id), key)
+
+        lift_id = self._ids.get(ident)
+        if lift_id is None:
+            lift_id = len(self.names)
+            self._ids[ident] = lift_id
+            self.map_ids.append(int(map_id))
+            self.keys.append(key)
+            self.names.append(name)
+            self.dirty = True
+        elif self.names[lift_id] != name:
+            # Renamed lift: keep the ID, update the display name
+            self.names[lift_id] = name
+            self.dirty = True
+
+        return lift_id
+
+    def get(self, map_id, lift):
+        """Return the integer ID of a known lift, or None (never assigns one)"""
+        return self._ids.get((int(map_id), lift_key(lift)))
+
+    def name(self, lift_id):
+        """Return the current display name for a lift ID"""
+        return self.names[lift_id]
+
+    def map_id(self, lift_id):
+        """Return the map ID a lift belongs to"""
+        return self.map_ids[lift_id]
+
+    def to_df(self):
+        """Return the registry as a DataFrame (one row per lift ID)"""
+        return pd.DataFrame({
+            "Lift ID": range(len(self.names)),
+            "Map ID": self.map_ids,
+            "Key": self.keys,
+            "Lift": self.names,
+        }, columns=REGISTRY_COLUMNS)
+
+    @classmethod
+    def from_df(cls, df):
+        """Rebuild a registry from a DataFrame produced by to_df"""
+        registry = cls()
+        df = df.sort_values("Lift ID")
+        for lift_id, map_id, key, name in zip(df["Lift ID"], df["Map ID"], df["Key"], df["Lift"]):
+            if int(lift_id) != len(registry.names):
+                raise ValueError(f"Lift registry is not contiguous at ID {lift_id}")
+            registry._ids[(int(map_id), str(key))] = int(lift_id)
+            registry.map_ids.append(int(map_id))
+            registry.keys.append(str(key))
+            registry.names.append(name)
+        return registry
@@ -0,0 +1,115 @@
+import re
+from enum import IntEnum
+
+import numpy as np
+import pandas as pd
+
+
+class LiftStatus(IntEnum):
+    """Categorical lift status; values are the int8 codes used in typed columns"""
+    UNKNOWN = 0
+    OPEN = 1
+    LIMITED = 2
+    HOLD = 3
+    SCHEDULED = 4
+    CLOSED = 5
+
+
+STATUS_LABELS = {
+    LiftStatus.UNKNOWN: "Unknown",
+    LiftStatus.OPEN: "Open",
+    LiftStatus.LIMITED: "Limited",
+    LiftStatus.HOLD: "On Hold",
+    LiftStatus.SCHEDULED: "Scheduled",
+    LiftStatus.CLOSED: "Closed",
+}
+
+# Categories are ordered by enum value so category codes equal LiftStatus codes
+STATUS_DTYPE = pd.CategoricalDtype([STATUS_LABELS[s] for s in LiftStatus])
+WAIT_TIME_DTYPE = "Int16"
+ID_DTYPE = "int32"
+
+# Whole-word rules for free-text statuses, checked in order ("Not opening today" and
+# "Opening at 10am" must not count as open)
+_STATUS_KEYWORDS = [
+    (re.compile(r"\bholds?\b"), LiftStatus.HOLD),
+    (re.compile(r"\bclosed\b"), LiftStatus.CLOSED),
+    (re.compile(r"\bnot\s+(?:open|opening)\b"), LiftStatus.CLOSED),
+    (re.compile(r"\boffload\b"), LiftStatus.LIMITED),
+    (re.compile(r"\blimited\b"), LiftStatus.LIMITED),
+    (re.compile(r"\bscheduled\b"), LiftStatus.SCHEDULED),
+    (re.compile(r"\bexpected\b"), LiftStatus.SCHEDULED),
+    (re.compile(r"\b(?:re)?opening\b"), LiftStatus.SCHEDULED),
+    (re.compile(r"\bopen\b"), LiftStatus.OPEN),
+]
+
+_LABEL_LOOKUP = {label.lower(): status for status, label in STATUS_LABELS.items()}
+
+
+def normalize_status(raw):
+    """
+    Map a raw API status string to a LiftStatus.
+
+    Returns:
+        tuple: (LiftStatus, detail) where detail is the raw text when it is
+        not exactly a known label (e.g. "No Offload at KT-22"), else None
+    """
+    if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+        return LiftStatus.UNKNOWN, None
+
+    text = str(raw).strip()
+    status = _LABEL_LOOKUP.get(text.lower())
+    if status is not None:
+        return status, None
+
+    lowered = text.lower()
+    for pattern, keyword_status in _STATUS_KEYWORDS:
+        if pattern.search(lowered):
+            return keyword_status, text
+    return LiftStatus.UNKNOWN, text or None
+
+
+def normalize_wait_time(raw):
+    """Convert a raw wait time ("N/A", "5", 5, 5.0, None) to an int or None"""
+    if raw is None or isinstance(raw, bool):
+        return None
+    if isinstance(raw, (int, float)):
+        return None if pd.isna(raw) else int(raw)
+    try:
+        return int(float(str(raw).strip()))
+    except ValueError:
+        return None
+
+
+def type_status_df(df):
+    """Normalize a status DataFrame (typed or legacy free text) to the compact schema"""
+    df = df.copy()
+    if "Status Detail" not in df.columns:
+        # Parse each distinct raw status once; the last entry covers missing values
+        codes, uniques = pd.factorize(df["Status"])
+        parsed = [normalize_status(raw) for raw in uniques] + [normalize_status(None)]
+        df["Status"] = np.array([STATUS_LABELS[status] for status, _ in parsed], dtype=object)[codes]
+        df["Status Detail"] = np.array([detail for _, detail in parsed], dtype=object)[codes]
+    df["Status"] = df["Status"].astype(STATUS_DTYPE)
+    df["Status Detail"] = df["Status Detail"].astype("string")
+    for column in ("Map ID", "Lift ID"):
+        if column in df.columns:
+            df[column] = df[column].astype(ID_DTYPE)
+    return df
+
+
+def type_wait_time_df(df):
+    """Normalize a wait time DataFrame to a nullable integer column"""
+    df = df.copy()
+    codes, uniques = pd.factorize(df["Wait Time"])
+    waits = pd.array([normalize_wait_time(raw) for raw in uniques] + [None], dtype=WAIT_TIME_DTYPE)
+    df["Wait Time"] = waits.take(codes)
+    for column in ("Map ID", "Lift ID"):
+        if column in df.columns:
+            df[column] = df[column].astype(ID_DTYPE)
+    return df
+
+
+def status_codes(status):
+    """Return the int8 LiftStatus codes for a typed Status column"""
+    return status.astype(STATUS_DTYPE).cat.codes.to_numpy()
@@ -0,0 +1,154 @@
+import queue
+import threading
+import time
+
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class StageMetrics:
+    """Counters for one stage, updated by its workers"""
+
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        # Time workers spent blocked handing results to a full downstream queue
+        self.blocked_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+    def record(self, busy, blocked, depth, error=False):
+        with self._lock:
+            self.items += 1
+            self.errors += error
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def to_dict(self, wall_seconds):
+        capacity = wall_seconds * self.workers
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "blocked_seconds": round(self.blocked_seconds, 4),
+            "utilization": round(self.busy_seconds / capacity, 4) if capacity else 0.0,
+            "queue_size": self.queue_size,
+            "mean_queue_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "max_queue_depth": self.max_depth,
+        }
+
+
+class Stage:
+    """
+    One step of a Pipeline.
+
+    Args:
+        name: label used in metrics
+        func: callable(item) returning the item for the next stage, a list
+            of items (fan-out), or None to drop it
+        workers: threads running func concurrently
+        queue_size: capacity of this stage's input queue; a full queue
+            blocks the previous stage (backpressure)
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=8):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+
+
+class Pipeline:
+    """
+    Stages connected by bounded queues, each with its own worker threads.
+
+    An exception raised by a stage is recorded and the item dropped; the
+    first one is re-raised by run() after the pipeline drains.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.metrics = [StageMetrics(stage.name, stage.workers, stage.queue_size) for stage in stages]
+        self.wall_seconds = 0.0
+        self.errors = []
+
+    def _worker(self, index, inbox, outbox, results):
+        stage, metrics = self.stages[index], self.metrics[index]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            depth = inbox.qsize()
+            started = time.perf_counter()
+            try:
+                output = stage.func(item)
+                error = False
+            except Exception as e:
+                print(f"ERROR: Pipeline stage {stage.name} failed: {str(e)}")
+                self.errors.append(e)
+                output, error = None, True
+            busy = time.perf_counter() - started
+
+            outputs = output if isinstance(output, list) else ([] if output is None else [output])
+            for value in outputs:
+                if outbox is None:
+                    results.append(value)
+                else:
+                    outbox.put(value)
+            metrics.record(busy, time.perf_counter() - started - busy, depth, error)
+
+    def run(self, items):
+        """
+        Feed items through every stage.
+
+        Returns:
+            list: outputs of the last stage, in completion order
+        """
+        started = time.perf_counter()
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        results = []
+        groups = []
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(self.stages) else None
+            threads = [
+                threading.Thread(target=self._worker, args=(index, queues[index], outbox, results), daemon=True)
+                for _ in range(stage.workers)
+            ]
+            for thread in threads:
+                thread.start()
+            groups.append(threads)
+
+        for item in items:
+            queues[0].put(item)
+
+        # Drain stage by stage: once a stage's workers exit, nothing more reaches the next queue
+        for index, threads in enumerate(groups):
+            for _ in threads:
+                queues[index].put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        self.wall_seconds = time.perf_counter() - started
+        if self.errors:
+            raise self.errors[0]
+        return results
+
+    def report(self):
+        """Per-stage metrics as dicts (utilization is busy time over workers x wall time)"""
+        return [metrics.to_dict(self.wall_seconds) for metrics in self.metrics]
+
+    def bottleneck(self):
+        """Name of the stage with the highest utilization"""
+        return max(self.report(), key=lambda stage: stage["utilization"])["stage"] if self.stages else None
@@ -0,0 +1,242 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from analytics import list_snapshot_runs
+from fanout import shared_prefix
+from latest import LATEST_KEY
+from lift_schema import type_status_df, type_wait_time_df
+from rollups import snapshot_arrays
+from sinks import read_df, read_text
+
+
+# Snapshots kept per resort
+RECENT_CAPACITY = 10
+# How far back a cold start looks for snapshots to seed from; older warm state is reseeded
+SEED_WINDOW = timedelta(minutes=2 * RECENT_CAPACITY)
+# Stored in the int16 wait matrix where no wait was reported
+NO_WAIT = -1
+
+
+class SnapshotRing:
+    """
+    The last `capacity` snapshots of one resort in fixed-size arrays.
+
+    Row i of wait/status is one snapshot, column j is lift_ids[j]. New
+    lifts add a column; appending overwrites the oldest row in place.
+    known_wait/known_status hold each lift's last reported values, kept
+    after the lift stops appearing in the window.
+    """
+
+    def __init__(self, capacity=RECENT_CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.lift_ids = np.array([], dtype=np.int32)
+        self.wait = np.full((capacity, 0), NO_WAIT, dtype=np.int16)
+        self.status = np.full((capacity, 0), -1, dtype=np.int8)
+        self.known_wait = np.array([], dtype=np.int16)
+        self.known_status = np.array([], dtype=np.int8)
+        self.count = 0
+        self.head = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last_time(self):
+        """Epoch seconds of the newest snapshot, or None when empty"""
+        return int(self.times[(self.head - 1) % self.capacity]) if self.count else None
+
+    def _columns(self, lift_ids):
+        new = np.setdiff1d(lift_ids, self.lift_ids)
+        if len(new):
+            self.lift_ids = np.concatenate([self.lift_ids, new.astype(np.int32)])
+            self.wait = np.hstack([self.wait, np.full((self.capacity, len(new)), NO_WAIT, dtype=np.int16)])
+            self.status = np.hstack([self.status, np.full((self.capacity, len(new)), -1, dtype=np.int8)])
+            self.known_wait = np.concatenate([self.known_wait, np.full(len(new), NO_WAIT, dtype=np.int16)])
+            self.known_status = np.concatenate([self.known_status, np.full(len(new), -1, dtype=np.int8)])
+        order = np.argsort(self.lift_ids)
+        return order[np.searchsorted(self.lift_ids, lift_ids, sorter=order)]
+
+    def append(self, timestamp, lift_ids, codes, waits):
+        """
+        Add one snapshot; snapshots not newer than the last one are ignored.
+
+        Returns:
+            bool: whether the snapshot was added
+        """
+        seconds = int(timestamp.timestamp())
+        if self.count and seconds <= self.last_time:
+            return False
+        columns = self._columns(np.asarray(lift_ids, dtype=np.int32))
+        row = self.head
+        self.times[row] = seconds
+        self.wait[row] = NO_WAIT
+        self.status[row] = -1
+        waits = np.asarray(waits, dtype=np.float64)
+        self.wait[row, columns] = np.where(np.isnan(waits), NO_WAIT, waits).astype(np.int16)
+        self.status[row, columns] = codes
+        self.known_wait[columns] = self.wait[row, columns]
+        self.known_status[columns] = codes
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+        return True
+
+    def window(self, n=None):
+        """
+        The newest n snapshots (all held ones by default), oldest first.
+
+        Returns:
+            tuple: (datetime64[s] times, lift IDs, float32 wait n x L with NaN
+            for missing, int8 status n x L with -1 where absent)
+        """
+        n = len(self) if n is None else min(n, len(self))
+        rows = (self.head - n + np.arange(n)) % self.capacity
+        wait = self.wait[rows].astype(np.float32)
+        wait[self.wait[rows] == NO_WAIT] = np.nan
+        return self.times[rows].astype('datetime64[s]'), self.lift_ids, wait, self.status[rows]
+
+    def last_known(self):
+        """
+        Each lift's last reported status and wait, however long ago within the ring's life.
+
+        Returns:
+            tuple: (lift IDs, int8 status codes, float32 waits with NaN for missing)
+        """
+        seen = self.known_status >= 0
+        wait = self.known_wait[seen].astype(np.float32)
+        wait[self.known_wait[seen] == NO_WAIT] = np.nan
+        return self.lift_ids[seen], self.known_status[seen], wait
+
+    def wait_deltas(self):
+        """Per-lift wait change between the two newest snapshots (NaN where either is missing)"""
+        _, _, wait, _ = self.window(2)
+        if len(wait) < 2:
+            return np.full(len(self.lift_ids), np.nan, dtype=np.float32)
+        return wait[1] - wait[0]
+
+    def smoothed_wait(self, n=None):
+        """Per-lift mean wait over the newest n snapshots, ignoring gaps"""
+        _, _, wait, _ = self.window(n)
+        valid = ~np.isnan(wait)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(valid, wait, 0).sum(axis=0) / valid.sum(axis=0)
+
+
+class RecentSnapshots:
+    """
+    Rings of recent snapshots per resort, for one output namespace.
+
+    Kept at module level so warm invocations reuse it. After a cold start
+    it is seeded from storage on first use (see seed), so readers see the
+    same recent history warm or cold.
+    """
+
+    def __init__(self, capacity=RECENT_CAPACITY):
+        self.capacity = capacity
+        self.rings = {}
+        self.seeded = False
+
+    def ring(self, map_id):
+        if map_id not in self.rings:
+            self.rings[map_id] = SnapshotRing(self.capacity)
+        return self.rings[map_id]
+
+    def add(self, timestamp, status_df, wait_time_df):
+        """Split one multi-resort snapshot by Map ID and append it to each ring"""
+        lift_ids, codes, waits = snapshot_arrays(status_df, wait_time_df)
+        map_ids = status_df["Map ID"].to_numpy() if "Map ID" in status_df.columns \
+            else np.zeros(len(lift_ids), dtype=np.int32)
+        for map_id in np.unique(map_ids):
+            mask = map_ids == map_id
+            self.ring(int(map_id)).append(timestamp, lift_ids[mask], codes[mask], waits[mask])
+
+    @property
+    def last_time(self):
+        """Epoch seconds of the newest snapshot in any ring, or None when empty"""
+        times = [ring.last_time for ring in self.rings.values() if ring.count]
+        return max(times) if times else None
+
+    def last_known(self):
+        """Last reported (lift IDs, status codes, waits) of every lift in every ring"""
+        parts = [ring.last_known() for ring in self.rings.values()]
+        if not parts:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int8), np.array([], dtype=np.float32)
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def seed(self, sink, prefix, now):
+        """
+        Load the newest stored snapshots of this namespace.
+
+        Reads at most `capacity` runs from the last SEED_WINDOW. Resorts
+        with no run that recent (overnight, after an outage, or moved here
+        from another fan-out batch) start from their entry in the base's
+        latest.json, which is keyed by map ID, so readers still start from
+        each resort's current state.
+
+        Returns:
+            int: objects read from storage
+        """
+        runs = list_snapshot_runs(sink, now - SEED_WINDOW, None, prefix)[-self.capacity:]
+        frames = {}
+        for timestamp, status_key, wait_time_key in runs:
+            for key in {status_key, wait_time_key} - set(frames):
+                frames[key] = read_df(sink, key)
+            status_df, wait_time_df = frames[status_key], frames[wait_time_key]
+            # Only snapshots written with lift IDs can be lined up with new ones
+            if status_df is None or wait_time_df is None or not {"Map ID", "Lift ID"} <= set(status_df.columns):
+                continue
+            self.add(timestamp, type_status_df(status_df), type_wait_time_df(wait_time_df))
+
+        text = read_text(sink, shared_prefix(prefix) + LATEST_KEY)
+        document = json.loads(text) if text else {"resorts": {}}
+        for map_id, resort in document["resorts"].items():
+            if int(map_id) in self.rings or not resort["lifts"]:
+                continue
+            lifts_df = pd.DataFrame([
+                {"Map ID": int(map_id), "Lift ID": lift["id"], "Lift": lift["name"], "Status": lift["status"],
+                 "Status Detail": lift["detail"], "Wait Time": lift["wait"]}
+                for lift in resort["lifts"]
+            ])
+            timestamp = datetime.fromisoformat(resort.get("updated", document["updated"]))
+            self.add(timestamp, type_status_df(lifts_df), type_wait_time_df(lifts_df))
+        self.seeded = True
+        return len(frames) + (text is not None)
+
+
+# Recent snapshots per output namespace, kept across warm invocations
+_recent = {}
+
+# How often a lookup was served from memory rather than seeded from storage
+_stats = {"hits": 0, "misses": 0, "objects_read": 0}
+
+
+def recent_snapshots(sink, prefix, now):
+    """
+    Return the namespace's RecentSnapshots, seeding it from storage on first use after a cold start.
+
+    State older than SEED_WINDOW (a container idle overnight, or a
+    namespace a new plan has just moved resorts back to) is reseeded too.
+    """
+    recent = _recent.get(prefix)
+    if recent is not None and recent.seeded and (recent.last_time or 0) >= (now - SEED_WINDOW).timestamp():
+        _stats["hits"] += 1
+        return recent
+
+    _stats["misses"] += 1
+    recent = _recent[prefix] = RecentSnapshots()
+    _stats["objects_read"] += recent.seed(sink, prefix, now)
+    return recent
+
+
+def hit_rate():
+    """Fraction of lookups that avoided a storage read, or None before the first lookup"""
+    lookups = _stats["hits"] + _stats["misses"]
+    return _stats["hits"] / lookups if lookups else None
+
+
+def stats():
+    """Counters plus hit rate, for logs and metrics"""
+    return dict(_stats, hit_rate=hit_rate())
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from lift_schema import LiftStatus, status_codes
+
+
+HOURLY_PERIOD_FORMAT = '%Y%m%d_%H'
+DAILY_PERIOD_FORMAT = '%Y%m%d'
+
+ROLLUP_DTYPES = {
+    "Lift ID": "int32",
+    "Period": "string",
+    "Samples": "int32",
+    "Wait Samples": "int32",
+    "Wait Sum": "int64",
+    "Wait Min": "Int16",
+    "Wait Max": "Int16",
+    "Minutes Open": "int32",
+    "Transitions": "int32",
+    "Last Status": "int8",
+}
+ROLLUP_COLUMNS = list(ROLLUP_DTYPES)
+
+# Statuses that count as minutes open
+UP_STATUSES = [int(LiftStatus.OPEN), int(LiftStatus.LIMITED)]
+
+
+def hourly_rollup_key(timestamp):
+    """S3 key of the hourly rollup object holding every hour of the timestamp's day"""
+    return f"rollups/hourly/{timestamp.strftime('%Y%m%d')}.csv"
+
+
+def daily_rollup_key(timestamp):
+    """S3 key of the daily rollup object holding every day of the timestamp's month"""
+    return f"rollups/daily/{timestamp.strftime('%Y%m')}.csv"
+
+
+def empty_rollup():
+    """Return an empty rollup table with the rollup schema"""
+    return typed_rollup(pd.DataFrame(columns=ROLLUP_COLUMNS))
+
+
+def typed_rollup(df):
+    """Cast a rollup table (e.g. freshly read from CSV) to the rollup schema"""
+    df = df[ROLLUP_COLUMNS].copy()
+    df["Period"] = df["Period"].astype(str)
+    return df.astype(ROLLUP_DTYPES)
+
+
+def last_status(rollup_df):
+    """Return the most recent Last Status per lift as a Series indexed by Lift ID"""
+    if rollup_df.empty:
+        return pd.Series(dtype="int8")
+    latest = rollup_df.sort_values("Period").drop_duplicates("Lift ID", keep="last")
+    return latest.set_index("Lift ID")["Last Status"]
+
+
+def snapshot_arrays(status_df, wait_time_df):
+    """
+    Join one scraped snapshot into per-lift arrays.
+
+    Returns:
+        tuple: (lift IDs, LiftStatus codes, float wait times with NaN for missing)
+    """
+    merged = status_df[["Lift ID", "Status"]].merge(
+        wait_time_df[["Lift ID", "Wait Time"]], on="Lift ID", how="left"
+    )
+    waits = merged["Wait Time"].astype("Float64").to_numpy(dtype=np.float64, na_value=np.nan)
+    return merged["Lift ID"].to_numpy(), status_codes(merged["Status"]), waits
+
+
+def apply_snapshot(rollup_df, period, lift_ids, codes, waits, previous_status, minutes=1):
+    """
+    Fold one snapshot into the rows of a single period.
+
+    Only the rows for `period` are touched, so the cost is O(lifts)
+    regardless of how much history the table holds.
+
+    Args:
+        rollup_df: rollup table (hourly or daily)
+        period: period label the snapshot falls in
+        lift_ids, codes, waits: per-lift snapshot arrays from snapshot_arrays
+        previous_status: Series of the last known status per Lift ID
+        minutes: minutes represented by one snapshot
+
+    Returns:
+        DataFrame: the updated rollup table
+    """
+    in_period = rollup_df["Period"] == period
+    current = rollup_df[in_period].set_index("Lift ID")
+    others = rollup_df[~in_period]
+
+    # Rows for lifts seen this period; new lifts start from zeroed counters
+    rows = current.reindex(lift_ids)
+    new = rows["Samples"].isna().to_numpy()
+    for column in ("Samples", "Wait Samples", "Wait Sum", "Minutes Open", "Transitions"):
+        rows[column] = rows[column].fillna(0)
+
+    has_wait = ~np.isnan(waits)
+    previous = previous_status.reindex(lift_ids).to_numpy(dtype=np.float64, na_value=np.nan)
+    changed = ~np.isnan(previous) & (previous != codes)
+
+    rows["Period"] = period
+    rows["Samples"] += 1
+    rows["Wait Samples"] += has_wait
+    rows["Wait Sum"] += np.where(has_wait, waits, 0)
+    rows["Wait Min"] = np.fmin(rows["Wait Min"].to_numpy(dtype=np.float64, na_value=np.nan), waits)
+    rows["Wait Max"] = np.fmax(rows["Wait Max"].to_numpy(dtype=np.float64, na_value=np.nan), waits)
+    rows["Minutes Open"] += np.isin(codes, UP_STATUSES) * minutes
+    rows["Transitions"] += changed
+    rows["Last Status"] = codes
+
+    # Keep rows for lifts in this period that were absent from the snapshot
+    untouched = current[~current.index.isin(lift_ids)]
+    updated = pd.concat([untouched, rows]).reset_index(names="Lift ID")
+
+    print(f"Rollup {period}: updated {len(rows)} lifts ({int(new.sum())} new)")
+    return typed_rollup(pd.concat([others, updated], ignore_index=True))
+
+
+def add_means(rollup_df):
+    """Add a Wait Mean column (NaN where no wait time was reported)"""
+    df = rollup_df.copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df["Wait Mean"] = df["Wait Sum"].to_numpy(dtype=np.float64) / df["Wait Samples"].to_numpy()
+    return df
@@ -1,11 +1,71 @@
+import argparse
 import boto3
 import pandas as pd
 import requests
 import json
 import os
+import signal
+import sys
+import tempfile
+import threading
+import time
 from datetime import datetime, timezone
 from io import StringIO
 
+from batcher import MicroBatcher
+from lift_registry import LiftRegistry, lift_key
+from pipeline import Pipeline, Stage
+from sinks import (LocalSink, S3Sink, df_to_csv, member_key, read_df, read_text, sink_from_env, update_text, write_df,
+                   write_text)
+import rollups
+import events
+import latest
+import fanout
+import lease
+import dedup
+import extractors
+import recent
+import tuning
+
+
+MAP_URL = "https://vicomap-cdn.resorts-interactive.com/api/maps/{map_id}"
+MAP_IDS = [152, 1446]
+LIFT_REGISTRY_KEY = "lifts.csv"
+STATUS_COLUMNS = ["Map ID", "Lift ID", "Lift", "Status", "Status Detail"]
+WAIT_TIME_COLUMNS = ["Map ID", "Lift ID", "Lift", "Wait Time"]
+# Matches the Lambda timeout: a lease older than this belongs to a dead run
+LEASE_TTL_SECONDS = 300
+# Conditional registry writes before a run gives up on a contended registry
+REGISTRY_WRITE_ATTEMPTS = 8
+# Stage settings of a pipelined run (worker threads per stage, queue capacity)
+PIPELINE_DEFAULTS = {"fetch": 8, "extract": 2, "build": 2, "write": 2, "queue": 16}
+PIPELINE_METRICS_KEY = "metrics/pipeline.json"
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36'
+}
+
+# HTTP session reused across maps and warm invocations (keeps connections alive)
+_http_session = None
+
+# Response size of the calling thread's last fetch (fetch_payload reads it)
+_last_fetch = threading.local()
+
+# Derived-state updates of batched runs, applied when their namespace's batch is flushed:
+# prefix -> [(now, status_df, wait_time_df, detected events)], plus run cost records
+# (the cost table is shared by every namespace, so any flush writes it)
+_deferred = {}
+_deferred_runs = []
+_deferred_lock = threading.Lock()
+
+
+def get_http_session():
+    """Return the shared HTTP session, creating it on first use"""
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+        _http_session.headers.update(REQUEST_HEADERS)
+    return _http_session
+
 
 def get_version():
     """Read version from VERSION file"""
@@ -16,79 +76,772 @@ def get_version():
         return 'unknown'
 
 
-def fetch_json_from_url(url):
+def fetch_json_from_url(url, session=None):
     """Fetch JSON data from URL with proper headers"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers, timeout=30)
+    if session is None:
+        response = requests.get(url, headers=REQUEST_HEADERS, timeout=30)
+    else:
+        response = session.get(url, timeout=30)
     response.raise_for_status()
+    _last_fetch.bytes = len(response.content)
     return response.json()
 
 
-def scrape_lift_data():
-    """Scrape lift data from ski resort APIs"""
-    # URLs for the two ski resorts
-    urls = [
-        "https://vicomap-cdn.resorts-interactive.com/api/maps/152",
-        "https://vicomap-cdn.resorts-interactive.com/api/maps/1446"
-    ]
+def fetch_payload(url, session=None):
+    """
+    Fetch one map's JSON, timing it.
     
-    status_data = []
-    wait_time_data = []
+    Returns:
+        tuple: (data, seconds, response bytes or None when unknown)
+    """
+    _last_fetch.bytes = None
+    started = time.perf_counter()
+    data = fetch_json_from_url(url, session)
+    return data, time.perf_counter() - started, _last_fetch.bytes
+
+
+def scrape_lift_data(registry=None, map_ids=None, session=None, fetch_seconds=None, entities=None,
+                     fetch_bytes=None):
+    """
+    Scrape lift data from ski resort APIs
     
-    for url in urls:
+    Each payload is fetched and decoded once; every entity registered in
+    extractors.ENTITIES (lifts, trails, POIs) is extracted from it.
+    
+    Args:
+        registry: LiftRegistry used to assign lift IDs (a fresh one if None)
+        map_ids: map IDs to scrape (defaults to MAP_IDS)
+        session: optional requests.Session shared across fetches
+        fetch_seconds: optional dict filled with the fetch time per map ID
+        entities: optional dict filled with a DataFrame per non-lift entity
+        fetch_bytes: optional dict filled with the response size per map ID
+    """
+    if registry is None:
+        registry = LiftRegistry()
+    
+    rows = {}
+    
+    for map_id in map_ids or MAP_IDS:
+        url = MAP_URL.format(map_id=map_id)
         try:
-            data = fetch_json_from_url(url)
-            lifts = data.get("lifts", [])
+            data, seconds, size = fetch_payload(url, session)
+            if fetch_seconds is not None:
+                fetch_seconds[map_id] = seconds
+            if fetch_bytes is not None and size is not None:
+                fetch_bytes[map_id] = size
             
-            for lift in lifts:
-                name = lift.get("name", "Unknown")
-                status = lift.get("status", "Unknown")
-                wait_time = lift.get("waitTime", "N/A")
-                
-                print(f"Lift: {name}, Status: {status}, Wait Time: {wait_time} minutes")
-                
-                status_data.append({"Lift": name, "Status": status})
-                wait_time_data.append({"Lift": name, "Wait Time": wait_time})
+            extractors.extract_payload(data, map_id, rows, {"lifts": registry})
                 
         except Exception as e:
             print(f"Error fetching data from {url}: {e}")
             continue
     
-    # Create DataFrames
-    status_df = pd.DataFrame(status_data)
-    wait_time_df = pd.DataFrame(wait_time_data)
+    return snapshot_frames(rows, entities)
+
+
+def snapshot_frames(rows, entities=None):
+    """
+    Build the status and wait time DataFrames from extracted rows.
+    
+    Args:
+        rows: dict of entity name -> list of row dicts (see extractors.extract_payload)
+        entities: optional dict filled with a DataFrame per non-lift entity
+    """
+    # Create DataFrames with compact typed columns
+    lifts_df = extractors.rows_to_df(extractors.LIFTS, rows.get("lifts", []))
+    status_df = lifts_df[STATUS_COLUMNS].copy()
+    wait_time_df = lifts_df[WAIT_TIME_COLUMNS].copy()
+    
+    if entities is not None:
+        for name, entity in extractors.ENTITIES.items():
+            if name != extractors.LIFTS.name:
+                entities[name] = extractors.rows_to_df(entity, rows.get(name, []))
+    
+    # Canonical content hash, used to skip storing unchanged snapshots
+    status_df.attrs["snapshot_hash"] = dedup.snapshot_hash(status_df, wait_time_df)
     
     return status_df, wait_time_df
 
 
 def upload_df_to_s3(df, bucket_name, s3_key):
     """Upload DataFrame as CSV to S3"""
-    s3_client = boto3.client('s3')
+    write_df(S3Sink(bucket_name, boto3.client('s3')), df, s3_key)
+
+
+class StoredLiftRegistry:
+    """
+    A LiftRegistry kept in step with its stored copy, safe to share between concurrent runs.
+
+    A new lift's ID is written to storage before it is handed out, using a
+    conditional write on the version that was read. On a conflict the
+    newest copy is reloaded and the write retried. So two runs (fan-out
+    batches, pipelined batches) never give the same ID to different lifts.
+    Renames are saved the same way by save(). Thread-safe, so pipelined
+    extract workers can share one instance.
+    """
+
+    def __init__(self, sink, key):
+        self.sink = sink
+        self.key = key
+        self._renamed = {}
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self):
+        body, self.version = self.sink.read_versioned(self.key)
+        self.registry = LiftRegistry() if body is None else \
+            LiftRegistry.from_df(pd.read_csv(StringIO(body.decode('utf-8'))))
+
+    def _commit(self, additions):
+        """Register lifts (and this run's renames) on the newest stored copy and write it back"""
+        for _ in range(REGISTRY_WRITE_ATTEMPTS):
+            for map_id, item in list(additions) + list(self._renamed.values()):
+                self.registry.lift_id(map_id, item)
+            if not self.registry.dirty:
+                return
+            version = self.sink.write_if(self.key, df_to_csv(self.registry.to_df()), 'text/csv', self.version)
+            if version is not None:
+                self.version = version
+                self.registry.dirty = False
+                return
+            print(f"Lift registry {self.sink.describe(self.key)} changed concurrently; merging")
+            self._reload()
+        raise RuntimeError(f"Gave up writing {self.sink.describe(self.key)} after {REGISTRY_WRITE_ATTEMPTS} conflicts")
+
+    def reserve(self, map_id, items):
+        """Store IDs for every new lift of one payload in a single write (extractors call this first)"""
+        with self._lock:
+            new = [(map_id, item) for item in items if self.registry.get(map_id, item) is None]
+            if new:
+                self._commit(new)
+
+    def lift_id(self, map_id, item):
+        """Return the lift's ID, storing a new one first if the lift is new"""
+        with self._lock:
+            lift_id = self.registry.get(map_id, item)
+            if lift_id is None:
+                self._commit([(map_id, item)])
+                lift_id = self.registry.get(map_id, item)
+            elif self.registry.name(lift_id) != item.get("name", "Unknown"):
+                # Renamed: saved (and re-applied after any reload) by save()
+                self.registry.lift_id(map_id, item)
+                self._renamed[(int(map_id), lift_key(item))] = (map_id, item)
+            return lift_id
+
+    def save(self):
+        """Write pending renames, if any"""
+        with self._lock:
+            if self.registry.dirty:
+                self._commit([])
+            self._renamed.clear()
+
+    @property
+    def dirty(self):
+        return self.registry.dirty
+
+    @property
+    def names(self):
+        return self.registry.names
+
+    @property
+    def map_ids(self):
+        return self.registry.map_ids
+
+    def __len__(self):
+        return len(self.registry)
+
+    def to_df(self):
+        return self.registry.to_df()
+
+
+def lift_registry_key(prefix=''):
+    """Registry key for an output prefix; fan-out batch namespaces share their base's registry"""
+    return fanout.shared_prefix(prefix) + LIFT_REGISTRY_KEY
+
+
+def load_lift_registry(sink, prefix=''):
+    """Load the lift ID registry of an output prefix from the sink (empty if none is stored yet)"""
+    return StoredLiftRegistry(sink, lift_registry_key(prefix))
+
+
+def update_rollups(sink, status_df, wait_time_df, now, prefix=''):
+    """Fold one snapshot into the hourly and daily rollup objects stored next to the raw data"""
+    fold_rollups(sink, [(now, status_df, wait_time_df)], prefix)
+
+
+def fold_rollups(sink, snapshots, prefix=''):
+    """
+    Fold (now, status_df, wait_time_df) snapshots, oldest first, reading and writing each rollup object once.
+    
+    Rollup rows are keyed by Lift ID, so fan-out batches fold into their
+    base's rollups; each object gets one conditional read-modify-write.
+    """
+    base = fanout.shared_prefix(prefix)
+    arrays = [(now, *rollups.snapshot_arrays(status_df, wait_time_df)) for now, status_df, wait_time_df in snapshots]
+    previous_status = [None] * len(arrays)
+    
+    def fold(period_format, indexes):
+        def update(text):
+            df = rollups.empty_rollup() if text is None else rollups.typed_rollup(pd.read_csv(StringIO(text)))
+            for index in indexes:
+                now, lift_ids, codes, waits = arrays[index]
+                # The daily table spans the month, so it knows each lift's previous status
+                if period_format == rollups.DAILY_PERIOD_FORMAT:
+                    previous_status[index] = rollups.last_status(df)
+                df = rollups.apply_snapshot(df, now.strftime(period_format), lift_ids, codes, waits,
+                                            previous_status[index])
+            return df_to_csv(df)
+        return update
+    
+    # Daily tables first: the hourly folds use the previous statuses they found
+    for rollup_key, period_format in ((rollups.daily_rollup_key, rollups.DAILY_PERIOD_FORMAT),
+                                      (rollups.hourly_rollup_key, rollups.HOURLY_PERIOD_FORMAT)):
+        by_key = {}
+        for index, (now, *_) in enumerate(arrays):
+            by_key.setdefault(base + rollup_key(now), []).append(index)
+        for key, indexes in by_key.items():
+            update_text(sink, key, fold(period_format, indexes), 'text/csv')
+
+
+def record_events(sink, status_df, wait_time_df, now, prefix=''):
+    """
+    Detect status and wait-band transitions and append them to the day's event log.
+    
+    Nothing is written when no lift changed.
+    
+    Returns:
+        list: the new event dicts
+    """
+    found = detect_events(sink, status_df, wait_time_df, now, prefix)
+    write_events(sink, [(now, found)], prefix)
+    return found
+
+
+def detect_events(sink, status_df, wait_time_df, now, prefix=''):
+    """
+    Compare a snapshot with each lift's last reported state, then add it to the recent snapshots.
+    
+    The namespace's recent snapshots (recent.py) are the only copy of that
+    state: kept across warm invocations, and seeded from the stored
+    snapshots on first use after a cold start.
+    
+    Returns:
+        list: event dicts
+    """
+    snapshots = recent.recent_snapshots(sink, prefix, now)
+    lift_ids, codes, waits = snapshots.last_known()
+    previous = dict(zip(lift_ids.tolist(), zip(codes.tolist(), events.wait_bands(waits).tolist())))
+    found, _ = events.detect_transitions(previous, *rollups.snapshot_arrays(status_df, wait_time_df), now)
+    snapshots.add(now, status_df, wait_time_df)
+    
+    stats = recent.stats()
+    print(f"Recent snapshots: {stats['hits']} warm, {stats['misses']} seeded "
+          f"({stats['hit_rate']:.0%} served from memory, {stats['objects_read']} objects read)")
+    return found
+
+
+def write_events(sink, detected, prefix=''):
+    """
+    Append detected events to their days' event logs.
+    
+    Events are keyed by Lift ID, so fan-out batches append to their base's
+    log with a conditional read-modify-write.
+    
+    Args:
+        detected: (now, event dicts) per snapshot, oldest first; each day's
+            log is written once however many snapshots are folded
+    """
+    base = fanout.shared_prefix(prefix)
+    by_log = {}
+    for now, found in detected:
+        if found:
+            by_log.setdefault(base + events.event_log_key(now), []).extend(found)
+    for log_key, log_events in by_log.items():
+        new_df = events.events_to_df(log_events)
+        update_text(sink, log_key, lambda text: df_to_csv(
+            new_df if text is None else pd.concat([pd.read_csv(StringIO(text)), new_df], ignore_index=True)
+        ), 'text/csv')
+    if by_log:
+        print(f"Recorded {sum(len(log_events) for log_events in by_log.values())} events")
+
+
+def publish_latest(sink, status_df, wait_time_df, now, prefix=''):
+    """
+    Overwrite latest.json with the current state of every resort.
+    
+    A fan-out batch instead merges its resorts into its base's latest.json
+    (latest.merge_latest), so one document covers every batch.
+    """
+    document = latest.build_latest(status_df, wait_time_df, now)
+    base = fanout.shared_prefix(prefix)
+    if base == prefix:
+        write_text(sink, prefix + latest.LATEST_KEY, json.dumps(document, separators=(',', ':')))
+    else:
+        update_text(sink, base + latest.LATEST_KEY, lambda text: json.dumps(
+            latest.merge_latest(json.loads(text) if text else None, document), separators=(',', ':')
+        ))
+
+
+def record_costs(sink, *records):
+    """
+    Fold run cost records (tuning.run_record, oldest first) into the shared cost table.
+    
+    The table holds fanout.plan_batches' smoothed per-map fetch times and
+    the tuner's run history (see tuning.fold_run_costs).
+    """
+    # Concurrent batches share one cost table; a conditional write makes the read-modify-write safe
+    update_text(sink, fanout.MAP_COSTS_KEY, lambda text: json.dumps(
+        tuning.fold_run_costs(json.loads(text) if text else {}, records)
+    ))
+
+
+def save_run_costs(sink, record, deferred=False):
+    """Record one run's costs now, or hold them for the next batch flush (see flush_derived)"""
+    if deferred:
+        with _deferred_lock:
+            _deferred_runs.append(record)
+    else:
+        record_costs(sink, record)
+
+
+def flush_derived(sink, prefix=''):
+    """
+    Apply the derived-state updates held back by batched runs of a namespace.
+    
+    Called when the namespace's batch is flushed, so a batched poll writes
+    no rollups, events or cost table of its own: each object gets one
+    read-modify-write per batch instead of one per poll. latest.json is a
+    plain overwrite and is still published on every poll.
+    """
+    with _deferred_lock:
+        snapshots = _deferred.pop(prefix, [])
+        runs = list(_deferred_runs)
+        _deferred_runs.clear()
+    frames = [(now, status_df, wait_time_df) for now, status_df, wait_time_df, _ in snapshots]
+    
+    # Derived data; a failure here must not fail the flush
+    if frames:
+        try:
+            fold_rollups(sink, frames, prefix)
+        except Exception as e:
+            print(f"ERROR: Rollup update failed: {str(e)}")
+        
+        try:
+            write_events(sink, [(now, found) for now, _, _, found in snapshots], prefix)
+        except Exception as e:
+            print(f"ERROR: Event recording failed: {str(e)}")
+    
+    if runs:
+        try:
+            record_costs(sink, *runs)
+        except Exception as e:
+            print(f"ERROR: Run cost update failed: {str(e)}")
+
+
+def parse_batch_event(event):
+    """
+    Read the map IDs and output options from a Lambda event.
+    
+    Batch events look like {"map_ids": [152, 1446], "output": {"prefix": "west/", "combined": true}}.
+    Any other event (e.g. the EventBridge schedule) scrapes MAP_IDS with default output.
+    """
+    if not isinstance(event, dict):
+        event = {}
+    map_ids = [int(map_id) for map_id in event.get('map_ids') or MAP_IDS]
+    output = event.get('output') or {}
+    return map_ids, output.get('prefix', ''), bool(output.get('combined', False))
+
+
+def load_last_snapshot(sink, prefix=''):
+    """Return the index row of the last full snapshot (warm memory first, then the sink)"""
+    last_key = prefix + dedup.LAST_SNAPSHOT_KEY
+    if last_key not in dedup._last_snapshots:
+        text = read_text(sink, last_key)
+        dedup._last_snapshots[last_key] = dedup.last_from_json(text) if text else None
+    return dedup._last_snapshots[last_key]
+
+
+def append_index_row(sink, row, now, prefix=''):
+    """Append one run's entry to the day's snapshot index"""
+    key = prefix + dedup.index_key(now)
+    index_df = read_df(sink, key)
+    row_df = dedup.index_to_df([row])
+    index_df = row_df if index_df is None else pd.concat([index_df, row_df], ignore_index=True)
+    write_df(sink, index_df, key)
+
+
+def run_scrape(sink, map_ids, prefix, combined, now, batcher=None):
+    """
+    Scrape the given maps and write the snapshot and derived outputs to a sink.
+    
+    With a batcher (batcher.MicroBatcher) the snapshot and entity objects
+    are buffered into batch objects instead of being written one by one.
+    
+    Returns:
+        dict: Response with statusCode and body
+    """
+    # Scrape data
+    print("Starting scrape...")
+    print(f"Maps: {map_ids}")
+    started, cpu_started = time.perf_counter(), time.process_time()
+    fetch_seconds = {}
+    fetch_bytes = {}
+    entities = {}
+    with tuning.MemoryProbe() as memory:
+        registry = load_lift_registry(sink, prefix)
+        status_df, wait_time_df = scrape_lift_data(registry, map_ids, get_http_session(), fetch_seconds, entities,
+                                                   fetch_bytes)
+        response = store_snapshot(sink, registry, status_df, wait_time_df, entities, prefix, combined, now, batcher)
+    
+    try:
+        save_run_costs(sink, tuning.run_record(now, fetch_seconds, fetch_bytes, time.process_time() - cpu_started,
+                                               time.perf_counter() - started, 1, memory.result()),
+                       deferred=batcher is not None)
+    except Exception as e:
+        print(f"ERROR: Run cost update failed: {str(e)}")
+    
+    return response
+
+
+def store_snapshot(sink, registry, status_df, wait_time_df, entities, prefix, combined, now, batcher=None):
+    """
+    Write one scraped snapshot and its derived outputs to a sink.
+    
+    Batched snapshots are always combined. Their index is the batch footer,
+    so no index row is appended; index/last.json is written when the batch
+    is flushed (see batch_flushed), and so are the rollups, events and
+    cost table (see flush_derived). latest.json is published on every run.
+    
+    Returns:
+        dict: Response with statusCode and body
+    """
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
+    # Events are derived data; a failure here must not fail the scrape
+    try:
+        found = detect_events(sink, status_df, wait_time_df, now, prefix)
+    except Exception as e:
+        print(f"ERROR: Event detection failed: {str(e)}")
+        found = []
+    
+    if batcher is not None:
+        # Queued before the batcher sees this run, so the flush it may trigger includes it
+        with _deferred_lock:
+            _deferred.setdefault(prefix, []).append((now, status_df, wait_time_df, found))
+    
+    # Identical to the last stored snapshot: record an "unchanged since" marker instead
+    digest = status_df.attrs.get("snapshot_hash") or dedup.snapshot_hash(status_df, wait_time_df)
+    previous = load_last_snapshot(sink, prefix)
+    if previous and previous["Hash"] == digest:
+        print(f"Snapshot unchanged since {previous['Time']}; recording index marker")
+        if batcher is not None:
+            batcher.add_entry(now, f"marker_{timestamp}", kind="snapshot", hash=digest,
+                              status_key=previous["Status Key"], wait_time_key=previous["Wait Time Key"],
+                              unchanged_since=previous["Time"])
+        else:
+            append_index_row(sink, dedup.index_row(
+                now, digest, previous["Status Key"], previous["Wait Time Key"], previous["Time"]
+            ), now, prefix)
+    else:
+        # Store one combined object, or the status/wait_time pair
+        if batcher is not None:
+            snapshot_df = status_df.merge(wait_time_df[["Lift ID", "Wait Time"]], on="Lift ID", how="left")
+            status_key = wait_time_key = batcher.add(
+                now, f"snapshot_{timestamp}", df_to_csv(snapshot_df), kind="snapshot", hash=digest
+            )
+        elif combined:
+            status_key = wait_time_key = f"{prefix}snapshot_{timestamp}.csv"
+            snapshot_df = status_df.merge(wait_time_df[["Lift ID", "Wait Time"]], on="Lift ID", how="left")
+            write_df(sink, snapshot_df, status_key)
+        else:
+            status_key = f"{prefix}status_{timestamp}.csv"
+            wait_time_key = f"{prefix}wait_time_{timestamp}.csv"
+            sink.write_many([
+                (status_key, df_to_csv(status_df), 'text/csv'),
+                (wait_time_key, df_to_csv(wait_time_df), 'text/csv'),
+            ])
+        
+        row = dedup.index_row(now, digest, status_key, wait_time_key)
+        if batcher is None:
+            append_index_row(sink, row, now, prefix)
+            write_text(sink, prefix + dedup.LAST_SNAPSHOT_KEY, dedup.last_to_json(row))
+        dedup._last_snapshots[prefix + dedup.LAST_SNAPSHOT_KEY] = row
+    
+    # Other entities (trails, POIs) from the same payloads get one object each
+    outputs = []
+    for name, entity_df in entities.items():
+        if entity_df.empty:
+            continue
+        if batcher is not None:
+            batcher.add(now, f"{name}_{timestamp}", df_to_csv(entity_df), kind=name)
+        else:
+            outputs.append((f"{prefix}{name}_{timestamp}.csv", df_to_csv(entity_df), 'text/csv'))
+    
+    sink.write_many(outputs)
+    # New lifts were stored when they got their IDs; this writes renames
+    registry.save()
     
-    # Convert DataFrame to CSV string
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_content = csv_buffer.getvalue()
+    # Rollups and events are derived data; a failure here must not fail the scrape
+    if batcher is None:
+        try:
+            update_rollups(sink, status_df, wait_time_df, now, prefix)
+        except Exception as e:
+            print(f"ERROR: Rollup update failed: {str(e)}")
+        
+        try:
+            write_events(sink, [(now, found)], prefix)
+        except Exception as e:
+            print(f"ERROR: Event recording failed: {str(e)}")
+    
+    # Readers poll latest.json, so it stays current even between batch flushes
+    try:
+        publish_latest(sink, status_df, wait_time_df, now, prefix)
+    except Exception as e:
+        print(f"ERROR: Latest state update failed: {str(e)}")
     
-    # Upload to S3
-    s3_client.put_object(
-        Bucket=bucket_name,
-        Key=s3_key,
-        Body=csv_content,
-        ContentType='text/csv'
-    )
+    success_msg = f"Scraper completed. Uploaded {len(status_df)} lifts to {sink.describe(prefix)}"
+    print(success_msg)
     
-    print(f"Uploaded {s3_key} to s3://{bucket_name}/{s3_key}")
+    return {
+        'statusCode': 200,
+        'body': success_msg
+    }
+
+
+def parse_pipeline_event(event):
+    """
+    Read the batches and stage settings of a pipelined run from a Lambda event.
+
+    Pipelined events add {"pipeline": {"fetch": 8, "extract": 2, "build": 2, "write": 2, "queue": 16}}
+    (any subset) and may list several batches as {"batches": [batch event, ...]}.
+
+    Returns:
+        tuple: (list of (map_ids, prefix, combined), stage settings), or (None, None)
+        for an ordinary event
+    """
+    if not isinstance(event, dict) or event.get('pipeline') is None:
+        return None, None
+    settings = {name: int(value) for name, value in (event['pipeline'] or {}).items()
+                if name in PIPELINE_DEFAULTS}
+    batches = [parse_batch_event(batch) for batch in event.get('batches') or [event]]
+    return batches, dict(PIPELINE_DEFAULTS, **settings)
+
+
+def record_pipeline_metrics(sink, stages, now):
+    """Overwrite the per-stage metrics of the last pipelined run"""
+    document = {"time": now.strftime('%Y%m%d_%H%M%S'), "stages": stages}
+    write_text(sink, PIPELINE_METRICS_KEY, json.dumps(document))
+
+
+def run_pipeline(sink, batches, now, fetch=8, extract=2, build=2, write=2, queue=16, batchers=None):
+    """
+    Scrape batches as a staged fetch -> extract -> build -> write pipeline.
+
+    Maps are fetched concurrently and extracted as their payloads arrive;
+    once all of a batch's maps are in, its DataFrames are built (typed and
+    hashed) and then written (store_snapshot), while later maps are still
+    being fetched. Bounded queues between the
+    stages apply backpressure: a slow sink stops extraction, which stops
+    fetching. Per-stage utilization and queue depth are printed and
+    written to PIPELINE_METRICS_KEY; the run's costs go to
+    fanout.MAP_COSTS_KEY.
+
+    Args:
+        batches: list of (map_ids, prefix, combined); prefixes must differ
+        fetch, extract, build, write: worker threads per stage
+        queue: capacity of each stage's input queue
+        batchers: optional dict of prefix -> MicroBatcher (see run_scrape)
+
+    Returns:
+        dict: Response with statusCode, body, and per-stage metrics under "stages"
+    """
+    prefixes = [prefix for _, prefix, _ in batches]
+    if len(set(prefixes)) != len(prefixes):
+        raise ValueError("Batches in one pipelined run need distinct output prefixes")
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    session = get_http_session()
+    # Batches whose namespaces share a registry (fan-out batches under one base) share one instance
+    shared = {}
+    registries = [shared.setdefault(lift_registry_key(prefix), load_lift_registry(sink, prefix)) for prefix in prefixes]
+    pending = [{"rows": {}, "fetch_seconds": {}, "fetch_bytes": {}, "remaining": len(map_ids)}
+               for map_ids, _, _ in batches]
+    pending_lock = threading.Lock()
+
+    def fetch_map(item):
+        index, map_id = item
+        url = MAP_URL.format(map_id=map_id)
+        try:
+            data, seconds, size = fetch_payload(url, session)
+            return index, map_id, data, seconds, size
+        except Exception as e:
+            print(f"Error fetching data from {url}: {e}")
+            return index, map_id, None, None, None
+
+    def extract_map(item):
+        index, map_id, data, seconds, size = item
+        rows = {}
+        if data is not None:
+            extractors.extract_payload(data, map_id, rows, {"lifts": registries[index]})
+        return index, map_id, rows, seconds, size
+
+    def build_batch(item):
+        index, map_id, rows, seconds, size = item
+        with pending_lock:
+            batch = pending[index]
+            batch["rows"][map_id] = rows
+            if seconds is not None:
+                batch["fetch_seconds"][map_id] = seconds
+            if size is not None:
+                batch["fetch_bytes"][map_id] = size
+            batch["remaining"] -= 1
+            if batch["remaining"]:
+                return None
+
+        # Concatenate in batch order so output does not depend on fetch timing
+        map_ids, prefix, combined = batches[index]
+        merged = {}
+        for batch_map_id in map_ids:
+            for name, entity_rows in batch["rows"][batch_map_id].items():
+                merged.setdefault(name, []).extend(entity_rows)
+        entities = {}
+        status_df, wait_time_df = snapshot_frames(merged, entities)
+        return index, status_df, wait_time_df, entities
+
+    def write_batch(item):
+        index, status_df, wait_time_df, entities = item
+        _, prefix, combined = batches[index]
+        return store_snapshot(sink, registries[index], status_df, wait_time_df, entities, prefix, combined, now,
+                              (batchers or {}).get(prefix))
+
+    print(f"Starting pipelined scrape of {len(batches)} batches "
+          f"(fetch={fetch}, extract={extract}, build={build}, write={write}, queue={queue})")
+    stages = Pipeline([
+        Stage("fetch", fetch_map, fetch, queue),
+        Stage("extract", extract_map, extract, queue),
+        Stage("build", build_batch, build, queue),
+        Stage("write", write_batch, write, queue),
+    ])
+    items = [(index, map_id) for index, (map_ids, _, _) in enumerate(batches) for map_id in map_ids]
+    with tuning.MemoryProbe() as memory:
+        responses = stages.run(items)
+
+    report = stages.report()
+    for stage in report:
+        print(f"Stage {stage['stage']}: {stage['items']} items, {stage['utilization']:.0%} utilized, "
+              f"queue depth {stage['mean_queue_depth']} avg / {stage['max_queue_depth']} max "
+              f"of {stage['queue_size']}, {stage['blocked_seconds']:.2f}s blocked")
+    print(f"Pipeline bottleneck: {stages.bottleneck()} ({stages.wall_seconds:.2f}s)")
+
+    try:
+        record_pipeline_metrics(sink, report, now)
+    except Exception as e:
+        print(f"ERROR: Pipeline metrics update failed: {str(e)}")
+    
+    try:
+        fetch_seconds = {map_id: seconds for batch in pending for map_id, seconds in batch["fetch_seconds"].items()}
+        fetch_bytes = {map_id: size for batch in pending for map_id, size in batch["fetch_bytes"].items()}
+        save_run_costs(sink, tuning.run_record(now, fetch_seconds, fetch_bytes, time.process_time() - cpu_started,
+                                               time.perf_counter() - started, fetch, memory.result()),
+                       deferred=bool(batchers))
+    except Exception as e:
+        print(f"ERROR: Run cost update failed: {str(e)}")
+
+    success_msg = "; ".join(response['body'] for response in responses)
+    return {
+        'statusCode': 200,
+        'body': success_msg,
+        'stages': report
+    }
+
+
+def batch_flushed(sink, prefix):
+    """
+    Return an on_flush callback that points index/last.json at the batch's last stored snapshot.
+    
+    last.json is written only once the snapshot it names is durable, so a
+    cold start never dedups against a snapshot that was lost unflushed.
+    The derived state the batch's runs held back is applied at the same
+    time (flush_derived).
+    """
+    def on_flush(key, entries):
+        stored = [entry for entry in entries if entry.get("kind") == "snapshot" and "offset" in entry]
+        if stored:
+            entry = stored[-1]
+            row = dedup.index_row(
+                datetime.strptime(entry["time"], '%Y%m%d_%H%M%S'), entry["hash"],
+                member_key(key, entry["name"]), member_key(key, entry["name"])
+            )
+            write_text(sink, prefix + dedup.LAST_SNAPSHOT_KEY, dedup.last_to_json(row))
+        flush_derived(sink, prefix)
+    return on_flush
+
+
+def snapshot_batcher(sink, prefix='', max_members=60, max_age_seconds=600):
+    """Batcher for one output namespace, keeping index/last.json in step with its flushes"""
+    return MicroBatcher(sink, prefix, max_members=max_members, max_age_seconds=max_age_seconds,
+                        on_flush=batch_flushed(sink, prefix))
+
+
+def acquire_run_lease(sink, map_ids, prefix, now):
+    """
+    Take the lease for these maps and this schedule slot, or return None.
+    
+    S3 output uses the conditional-write S3 lease; local and in-memory
+    output use a lock file (in the output directory when there is one).
+    """
+    name = lease.lease_name(map_ids)
+    if isinstance(sink, S3Sink):
+        run_lease = lease.S3Lease(
+            sink.s3_client, sink.bucket_name, name, lease.time_bucket(now),
+            ttl_seconds=LEASE_TTL_SECONDS, prefix=prefix
+        )
+    else:
+        lock_path = sink.path(f"{prefix}{lease.LEASE_PREFIX}{name}.lock") if isinstance(sink, LocalSink) \
+            else os.path.join(tempfile.gettempdir(), f"scraper-{name}.lock")
+        run_lease = lease.FileLease(lock_path, ttl_seconds=LEASE_TTL_SECONDS)
+    return run_lease if run_lease.acquire() else None
+
+
+def run_pipelined_event(sink, batches, settings, now):
+    """Run the batches whose leases can be taken through run_pipeline, then release the leases"""
+    leased = []
+    for batch in batches:
+        run_lease = acquire_run_lease(sink, batch[0], batch[1], now)
+        if run_lease is None:
+            print(f"Skipping maps {batch[0]}: lease is held or already completed")
+        else:
+            leased.append((batch, run_lease))
+    if not leased:
+        skip_msg = "Scraper skipped. Every batch's lease is held or already completed"
+        print(skip_msg)
+        return {
+            'statusCode': 200,
+            'body': skip_msg
+        }
+    
+    try:
+        response = run_pipeline(sink, [batch for batch, _ in leased], now, **settings)
+    except Exception:
+        # Leave the slots open for a retry rather than marking them done
+        for _, run_lease in leased:
+            run_lease.release(completed=False)
+        raise
+    for _, run_lease in leased:
+        run_lease.release()
+    return response
 
 
 def lambda_handler(event, context):
     """
     AWS Lambda handler function that scrapes ski resort data and writes to S3.
     
+    Output goes to the sink configured by the environment (see
+    sink_from_env): S3_BUCKET, or OUTPUT_DIR to run offline.
+    
     Args:
-        event: Event data passed to the function
+        event: Event data passed to the function; a batch event selects the
+            map IDs and output options (see parse_batch_event), and a
+            "pipeline" key runs them staged (see parse_pipeline_event)
         context: Runtime information provided by AWS Lambda
         
     Returns:
@@ -98,11 +851,11 @@ def lambda_handler(event, context):
     version = get_version()
     print(f"Scraper version {version}")
     
-    # Get S3 bucket name from environment variable
-    bucket_name = os.environ.get('S3_BUCKET')
+    # Get the output sink (S3 bucket or local directory) from the environment
+    sink = sink_from_env()
     
-    if not bucket_name:
-        error_msg = "S3_BUCKET environment variable not set"
+    if sink is None:
+        error_msg = "S3_BUCKET environment variable not set (or OUTPUT_DIR for local output)"
         print(f"ERROR: {error_msg}")
         return {
             'statusCode': 500,
@@ -110,28 +863,33 @@ def lambda_handler(event, context):
         }
     
     # Generate timestamp for filenames
-    timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+    now = datetime.now(timezone.utc)
     
     try:
-        # Scrape data
-        print("Starting scrape...")
-        status_df, wait_time_df = scrape_lift_data()
+        batches, settings = parse_pipeline_event(event)
+        if batches is not None:
+            return run_pipelined_event(sink, batches, settings, now)
         
-        # Generate S3 keys
-        status_key = f"status_{timestamp}.csv"
-        wait_time_key = f"wait_time_{timestamp}.csv"
+        map_ids, prefix, combined = parse_batch_event(event)
         
-        # Upload to S3
-        upload_df_to_s3(status_df, bucket_name, status_key)
-        upload_df_to_s3(wait_time_df, bucket_name, wait_time_key)
+        # Skip if an overlapping run holds the lease or this slot already completed
+        run_lease = acquire_run_lease(sink, map_ids, prefix, now)
+        if run_lease is None:
+            skip_msg = f"Scraper skipped. Lease for maps {map_ids} is held or already completed"
+            print(skip_msg)
+            return {
+                'statusCode': 200,
+                'body': skip_msg
+            }
         
-        success_msg = f"Scraper completed. Uploaded {len(status_df)} lifts to s3://{bucket_name}/"
-        print(success_msg)
-        
-        return {
-            'statusCode': 200,
-            'body': success_msg
-        }
+        try:
+            response = run_scrape(sink, map_ids, prefix, combined, now)
+        except Exception:
+            # Leave the slot open for a retry rather than marking it done
+            run_lease.release(completed=False)
+            raise
+        run_lease.release()
+        return response
         
     except Exception as e:
         error_msg = f"Scraper failed: {str(e)}"
@@ -141,3 +899,84 @@ def lambda_handler(event, context):
             'body': error_msg
         }
 
+
+def run_daemon(sink, event=None, interval=60, lock_path='/tmp/scraper.lock', batch_snapshots=0,
+               batch_seconds=600):
+    """
+    Scrape on a fixed interval outside Lambda.
+    
+    A local lock file keeps overlapping runs (a slow run, or a second
+    daemon on the same host) from duplicating work.
+    
+    With batch_snapshots > 1, snapshots are coalesced into one batch
+    object per batch_snapshots runs (or batch_seconds, whichever comes
+    first). Buffered snapshots are flushed on exit, including SIGTERM.
+    """
+    map_ids, prefix, combined = parse_batch_event(event)
+    batches, settings = parse_pipeline_event(event)
+    print(f"Scraper version {get_version()} running every {interval}s")
+    
+    batchers = {}
+    if batch_snapshots > 1:
+        for batch_prefix in [batch[1] for batch in batches] if batches is not None else [prefix]:
+            batchers[batch_prefix] = snapshot_batcher(sink, batch_prefix, batch_snapshots, batch_seconds).start()
+        # Turn SIGTERM into SystemExit so the finally block below flushes
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    try:
+        while True:
+            started = time.time()
+            run_lease = lease.FileLease(lock_path, ttl_seconds=LEASE_TTL_SECONDS)
+            if run_lease.acquire():
+                completed = False
+                try:
+                    if batches is not None:
+                        run_pipeline(sink, batches, datetime.now(timezone.utc), batchers=batchers, **settings)
+                    else:
+                        run_scrape(sink, map_ids, prefix, combined, datetime.now(timezone.utc), batchers.get(prefix))
+                    completed = True
+                except Exception as e:
+                    print(f"ERROR: Scraper failed: {str(e)}")
+                finally:
+                    run_lease.release(completed)
+            
+            # Sleep until the next interval boundary
+            time.sleep(max(0.0, interval - (time.time() - started)))
+    finally:
+        for batch_prefix, run_batcher in batchers.items():
+            run_batcher.close()
+            # Costs of a run that ended after its batch's last flush
+            flush_derived(sink, batch_prefix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scraper outside Lambda")
+    parser.add_argument('--bucket', default=os.environ.get('S3_BUCKET'), help="S3 bucket (default: $S3_BUCKET)")
+    parser.add_argument('--output-dir', default=os.environ.get('OUTPUT_DIR'),
+                        help="Write to a local directory instead of S3 (default: $OUTPUT_DIR)")
+    parser.add_argument('--compress', action='store_true', help="Gzip every stored object")
+    parser.add_argument('--interval', type=int, default=60, help="Seconds between scrapes")
+    parser.add_argument('--lock-file', default='/tmp/scraper.lock', help="Lock file guarding overlapping runs")
+    parser.add_argument('--event', default='{}', help="Batch event JSON (map_ids, output, pipeline, batches)")
+    parser.add_argument('--batch-snapshots', type=int, default=0,
+                        help="Coalesce this many runs into one batch object (0 writes one object per run)")
+    parser.add_argument('--batch-seconds', type=int, default=600,
+                        help="Flush a batch once its oldest snapshot is this old")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Run fetch, extract, build and write as concurrent stages (default settings)")
+    args = parser.parse_args()
+    event = json.loads(args.event)
+    if args.pipeline:
+        event.setdefault('pipeline', {})
+    
+    if args.output_dir:
+        sink = LocalSink(args.output_dir, compress=args.compress)
+    elif args.bucket:
+        sink = S3Sink(args.bucket, compress=args.compress)
+    else:
+        parser.error("--bucket/S3_BUCKET or --output-dir/OUTPUT_DIR is required")
+    run_daemon(sink, event, args.interval, args.lock_file, args.batch_snapshots, args.batch_seconds)
+
+
+if __name__ == "__main__":
+    main()
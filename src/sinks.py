@@ -0,0 +1,545 @@
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import struct
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+import boto3
+import pandas as pd
+from botocore.exceptions import ClientError
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Batch objects end with the footer length and this magic (see pack_batch)
+BATCH_MAGIC = b'SNAPBAT1'
+BATCH_TRAILER = struct.Struct('>Q8s')
+# Separates a batch object's key from a member name, e.g. "batches/batch_20260101_080000.snap#snapshot_..."
+MEMBER_SEPARATOR = '#'
+# Suffix read first when opening a batch; holds the whole footer of typical batches
+BATCH_TAIL_BYTES = 64 * 1024
+
+# Error codes S3 returns when a conditional write loses the race
+CONFLICT_CODES = ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409')
+# Read-modify-write attempts before update_text gives up on a contended object
+UPDATE_ATTEMPTS = 8
+
+
+def _to_bytes(body):
+    return body.encode('utf-8') if isinstance(body, str) else body
+
+
+def _decode(body):
+    """Transparently gunzip compressed objects"""
+    if body is not None and body[:2] == GZIP_MAGIC:
+        return gzip.decompress(body)
+    return body
+
+
+def _version(stored):
+    """Version token of stored bytes (sinks without native ETags)"""
+    return None if stored is None else hashlib.sha1(stored).hexdigest()
+
+
+class Sink:
+    """
+    Storage backend for scraper output.
+
+    Keys are '/'-separated paths relative to the sink root. Bodies are
+    str or bytes; with compress=True they are gzipped on write (the key is
+    unchanged) and read() decompresses them transparently. raw=True stores
+    a body exactly as given, so read_range() offsets stay meaningful.
+    """
+
+    def __init__(self, compress=False):
+        self.compress = compress
+
+    def _encode(self, body, raw=False):
+        if self.compress and not raw:
+            return gzip.compress(_to_bytes(body), mtime=0)
+        return body
+
+    def write(self, key, body, content_type='text/csv', raw=False):
+        """Store one object"""
+        raise NotImplementedError
+
+    def write_many(self, items):
+        """Store several (key, body, content_type) objects"""
+        for key, body, content_type in items:
+            self.write(key, body, content_type)
+
+    def read(self, key):
+        """Return an object's bytes, or None if it does not exist"""
+        raise NotImplementedError
+
+    def read_range(self, key, start, end=None):
+        """
+        Return stored bytes [start, end) of an object (not decompressed), or None.
+
+        A negative start returns the last -start bytes, like an HTTP suffix range.
+        """
+        raise NotImplementedError
+
+    def open(self, key):
+        """
+        Return a readable binary stream of an object (decompressed), or None.
+
+        Backends that can stream override this so large objects are never
+        held in memory at once.
+        """
+        body = self.read(key)
+        return None if body is None else BytesIO(body)
+
+    def read_versioned(self, key):
+        """Return (bytes, version) of an object, or (None, None) if it does not exist"""
+        raise NotImplementedError
+
+    def read_if_changed(self, key, version):
+        """
+        Return (bytes, version) of an object that is no longer at `version`.
+
+        Returns (None, version) while it is unchanged and (None, None) if
+        it does not exist. Backends with conditional GETs override this so
+        polling an unchanged object transfers no body.
+        """
+        body, current = self.read_versioned(key)
+        return (None, current) if current == version else (body, current)
+
+    def write_if(self, key, body, content_type, version):
+        """
+        Store one object only if it is still at `version` (None: only if it does not exist).
+
+        Returns:
+            the new version, or None when another writer changed the object first
+        """
+        raise NotImplementedError
+
+    def list(self, prefix='', start_after=None):
+        """Yield keys starting with prefix in sorted order, after start_after when given"""
+        raise NotImplementedError
+
+    def describe(self, key=''):
+        """Human-readable location of a key, for logs"""
+        raise NotImplementedError
+
+
+class S3Sink(Sink):
+    """Objects in an S3 bucket"""
+
+    def __init__(self, bucket_name, s3_client=None, compress=False, max_workers=8):
+        super().__init__(compress)
+        self.bucket_name = bucket_name
+        self.s3_client = s3_client or boto3.client('s3')
+        self.max_workers = max_workers
+
+    def write(self, key, body, content_type='text/csv', raw=False):
+        params = {'Bucket': self.bucket_name, 'Key': key, 'Body': self._encode(body, raw), 'ContentType': content_type}
+        if self.compress and not raw:
+            params['ContentEncoding'] = 'gzip'
+        self.s3_client.put_object(**params)
+        print(f"Uploaded {key} to {self.describe(key)}")
+
+    def write_many(self, items):
+        # PUTs are independent, so overlap their network round trips
+        items = list(items)
+        if len(items) <= 1:
+            return super().write_many(items)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda item: self.write(*item), items))
+
+    def read(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        return _decode(response['Body'].read())
+
+    def read_versioned(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None, None
+            raise
+        return _decode(response['Body'].read()), response['ETag']
+
+    def read_if_changed(self, key, version):
+        params = {'Bucket': self.bucket_name, 'Key': key}
+        if version:
+            params['IfNoneMatch'] = version
+        try:
+            response = self.s3_client.get_object(**params)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code in ('304', 'NotModified'):
+                return None, version
+            if code in ('NoSuchKey', '404'):
+                return None, None
+            raise
+        return _decode(response['Body'].read()), response['ETag']
+
+    def write_if(self, key, body, content_type, version):
+        params = {'Bucket': self.bucket_name, 'Key': key, 'Body': self._encode(body), 'ContentType': content_type}
+        if self.compress:
+            params['ContentEncoding'] = 'gzip'
+        if version is None:
+            params['IfNoneMatch'] = '*'
+        else:
+            params['IfMatch'] = version
+        try:
+            response = self.s3_client.put_object(**params)
+        except ClientError as e:
+            if e.response['Error']['Code'] in CONFLICT_CODES:
+                return None
+            raise
+        print(f"Uploaded {key} to {self.describe(key)}")
+        return response['ETag']
+
+    def read_range(self, key, start, end=None):
+        byte_range = f"bytes={start}" if start < 0 else f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key, Range=byte_range)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        return response['Body'].read()
+
+    def open(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        if response.get('ContentEncoding') == 'gzip':
+            return gzip.GzipFile(fileobj=response['Body'])
+        return response['Body']
+
+    def list(self, prefix='', start_after=None):
+        params = {'Bucket': self.bucket_name, 'Prefix': prefix}
+        if start_after:
+            params['StartAfter'] = start_after
+        for page in self.s3_client.get_paginator('list_objects_v2').paginate(**params):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
+    def describe(self, key=''):
+        return f"s3://{self.bucket_name}/{key}"
+
+
+class LocalSink(Sink):
+    """
+    Files under a local directory.
+
+    With atomic=True each file is written to a temporary name and renamed
+    into place, so readers never see a partial file.
+    """
+
+    def __init__(self, directory, compress=False, atomic=True):
+        super().__init__(compress)
+        self.directory = directory
+        self.atomic = atomic
+
+    def path(self, key):
+        return os.path.join(self.directory, *key.split('/'))
+
+    def write(self, key, body, content_type='text/csv', raw=False):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = _to_bytes(self._encode(body, raw))
+        if self.atomic:
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                # Make the data durable before the rename publishes it
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(data)
+        print(f"Wrote {key} to {self.describe(key)}")
+
+    def read(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                return _decode(f.read())
+        except FileNotFoundError:
+            return None
+
+    def _stored(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def read_versioned(self, key):
+        stored = self._stored(key)
+        return _decode(stored), _version(stored)
+
+    def write_if(self, key, body, content_type, version):
+        directory = os.path.dirname(self.path(key))
+        os.makedirs(directory, exist_ok=True)
+        # An exclusive lock on the directory serializes writers across processes
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if _version(self._stored(key)) != version:
+                return None
+            self.write(key, body, content_type)
+            return _version(self._stored(key))
+        finally:
+            os.close(fd)
+
+    def read_range(self, key, start, end=None):
+        try:
+            with open(self.path(key), 'rb') as f:
+                if start < 0:
+                    size = f.seek(0, os.SEEK_END)
+                    f.seek(max(0, size + start))
+                    return f.read()
+                f.seek(start)
+                return f.read(-1 if end is None else end - start)
+        except FileNotFoundError:
+            return None
+
+    def open(self, key):
+        try:
+            f = open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+        if f.peek(2)[:2] == GZIP_MAGIC:
+            f.close()
+            return gzip.open(self.path(key), 'rb')
+        return f
+
+    def list(self, prefix='', start_after=None):
+        # Only walk the directory the prefix names (e.g. "index/" -> <root>/index)
+        keys = []
+        for root, _, files in os.walk(self.path(prefix.rsplit('/', 1)[0]) if '/' in prefix else self.directory):
+            relative = os.path.relpath(root, self.directory)
+            base = '' if relative == '.' else relative.replace(os.sep, '/') + '/'
+            keys.extend(base + name for name in files if not name.endswith('.tmp'))
+        for key in sorted(keys):
+            if key.startswith(prefix) and (start_after is None or key > start_after):
+                yield key
+
+    def describe(self, key=''):
+        return self.path(key)
+
+
+class MemorySink(Sink):
+    """Objects in a dict; for tests and for timing serialization without I/O"""
+
+    def __init__(self, compress=False):
+        super().__init__(compress)
+        self.objects = {}
+        self.content_types = {}
+        self._lock = threading.Lock()
+
+    def write(self, key, body, content_type='text/csv', raw=False):
+        with self._lock:
+            self.objects[key] = _to_bytes(self._encode(body, raw))
+            self.content_types[key] = content_type
+
+    def read(self, key):
+        with self._lock:
+            return _decode(self.objects.get(key))
+
+    def read_versioned(self, key):
+        with self._lock:
+            stored = self.objects.get(key)
+        return _decode(stored), _version(stored)
+
+    def write_if(self, key, body, content_type, version):
+        with self._lock:
+            if _version(self.objects.get(key)) != version:
+                return None
+            self.objects[key] = _to_bytes(self._encode(body))
+            self.content_types[key] = content_type
+            return _version(self.objects[key])
+
+    def read_range(self, key, start, end=None):
+        with self._lock:
+            body = self.objects.get(key)
+        if body is None:
+            return None
+        return body[max(0, len(body) + start):] if start < 0 else body[start:end]
+
+    def list(self, prefix='', start_after=None):
+        with self._lock:
+            keys = sorted(self.objects)
+        for key in keys:
+            if key.startswith(prefix) and (start_after is None or key > start_after):
+                yield key
+
+    def describe(self, key=''):
+        return f"memory://{key}"
+
+
+def sink_from_env():
+    """
+    Build the sink configured by the environment, or None.
+
+    OUTPUT_DIR selects a local directory; otherwise S3_BUCKET selects S3.
+    OUTPUT_COMPRESS=1 gzips every object.
+    """
+    compress = os.environ.get('OUTPUT_COMPRESS', '') in ('1', 'true', 'yes')
+    if os.environ.get('OUTPUT_DIR'):
+        return LocalSink(os.environ['OUTPUT_DIR'], compress=compress)
+    if os.environ.get('S3_BUCKET'):
+        return S3Sink(os.environ['S3_BUCKET'], compress=compress)
+    return None
+
+
+def resolve_sink(sink=None, bucket_name=None, directory=None):
+    """Return sink, or build one from a local directory or an S3 bucket name"""
+    if sink is not None:
+        return sink
+    if directory:
+        return LocalSink(directory)
+    if bucket_name:
+        return S3Sink(bucket_name)
+    raise ValueError("Either sink, bucket_name or directory is required")
+
+
+def member_key(batch_key, name):
+    """Key that addresses one member inside a batch object"""
+    return f"{batch_key}{MEMBER_SEPARATOR}{name}"
+
+
+def pack_batch(members, compress=False):
+    """
+    Build one batch object from several member bodies.
+
+    Layout: the member bodies back to back (each gzipped on its own when
+    compress is set), then a JSON footer listing every member with its
+    offset and length, then BATCH_TRAILER (footer length, BATCH_MAGIC).
+    A reader fetches the tail, then exactly one member's byte range.
+
+    Args:
+        members: list of (entry dict, body); entries are stored in the
+            footer as given, and body None records an entry with no bytes
+
+    Returns:
+        tuple: (object body to write with raw=True, footer entries)
+    """
+    parts = []
+    entries = []
+    offset = 0
+    for entry, body in members:
+        entry = dict(entry)
+        if body is not None:
+            data = gzip.compress(_to_bytes(body), mtime=0) if compress else _to_bytes(body)
+            entry.update(offset=offset, length=len(data))
+            parts.append(data)
+            offset += len(data)
+        entries.append(entry)
+    footer = json.dumps({"version": 1, "compression": "gzip" if compress else None, "entries": entries},
+                        separators=(',', ':')).encode('utf-8')
+    return b''.join(parts) + footer + BATCH_TRAILER.pack(len(footer), BATCH_MAGIC), entries
+
+
+# Footers of batch objects already read; batches are never rewritten, so entries stay valid
+_batch_footers = {}
+_BATCH_FOOTER_CACHE_SIZE = 1024
+
+
+def read_batch_footer(sink, key):
+    """Return a batch object's footer dict (usually one suffix range read), or None if it does not exist"""
+    location = sink.describe(key)
+    if location in _batch_footers:
+        return _batch_footers[location]
+
+    tail = sink.read_range(key, -BATCH_TAIL_BYTES)
+    if tail is None:
+        return None
+    length, magic = BATCH_TRAILER.unpack(tail[-BATCH_TRAILER.size:])
+    if magic != BATCH_MAGIC:
+        raise ValueError(f"{key} is not a batch object")
+    if length + BATCH_TRAILER.size > len(tail):
+        tail = sink.read_range(key, -(length + BATCH_TRAILER.size))
+    footer = json.loads(tail[-(length + BATCH_TRAILER.size):-BATCH_TRAILER.size])
+
+    if len(_batch_footers) >= _BATCH_FOOTER_CACHE_SIZE:
+        _batch_footers.clear()
+    _batch_footers[location] = footer
+    return footer
+
+
+def read_member(sink, key):
+    """Read one member of a batch object (batch key + MEMBER_SEPARATOR + name) with a range read"""
+    batch_key, name = key.rsplit(MEMBER_SEPARATOR, 1)
+    footer = read_batch_footer(sink, batch_key)
+    if footer is None:
+        return None
+    entry = next((entry for entry in footer["entries"] if entry["name"] == name), None)
+    if entry is None or "offset" not in entry:
+        return None
+    body = sink.read_range(batch_key, entry["offset"], entry["offset"] + entry["length"])
+    return gzip.decompress(body) if footer["compression"] == "gzip" else body
+
+
+def read_object(sink, key):
+    """Read an object, or a batch member when the key names one"""
+    if MEMBER_SEPARATOR in key:
+        return read_member(sink, key)
+    return sink.read(key)
+
+
+def df_to_csv(df):
+    """Serialize a DataFrame as CSV text"""
+    csv_buffer = StringIO()
+    df.to_csv(csv_buffer, index=False)
+    return csv_buffer.getvalue()
+
+
+def write_df(sink, df, key):
+    """Write a DataFrame as a CSV object"""
+    sink.write(key, df_to_csv(df), 'text/csv')
+
+
+def read_df(sink, key):
+    """Read a CSV object (or batch member) into a DataFrame, or return None if it does not exist"""
+    body = read_object(sink, key)
+    if body is None:
+        return None
+    return pd.read_csv(StringIO(body.decode('utf-8')))
+
+
+def write_text(sink, key, text, content_type='application/json'):
+    """Write a small text object"""
+    sink.write(key, text, content_type)
+
+
+def read_text(sink, key):
+    """Read an object (or batch member) as text, or return None if it does not exist"""
+    body = read_object(sink, key)
+    return None if body is None else body.decode('utf-8')
+
+
+def update_text(sink, key, update, content_type='application/json', attempts=UPDATE_ATTEMPTS):
+    """
+    Read-modify-write a text object with a conditional write, retrying when another writer got there first.
+
+    Args:
+        update: callable(current text or None) -> new text, or None to leave the object alone
+
+    Returns:
+        str: the text written (or None when update declined)
+    """
+    for _ in range(attempts):
+        body, version = sink.read_versioned(key)
+        text = update(None if body is None else body.decode('utf-8'))
+        if text is None or sink.write_if(key, text, content_type, version) is not None:
+            return text
+    raise RuntimeError(f"Gave up updating {sink.describe(key)} after {attempts} conflicting writes")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Fetch concurrency and resorts-per-invocation chosen from measured run costs.
+
+Usage: python3 src/tuning.py --bucket <bucket> [--maps 152,1446] [--max-fetch 16] [--max-batch-size 25]
+                             [--budget 60] [--memory-mb 512] [--invoke FUNCTION]
+       python3 src/tuning.py --output-dir ./output
+
+Without --invoke this only simulates: it prints the chosen settings and
+their projected throughput next to the current ones.
+"""
+import argparse
+import heapq
+import json
+import os
+import resource
+import statistics
+import threading
+
+import fanout
+from sinks import read_text, resolve_sink
+
+
+# Runs kept in the cost history (stored under "runs" in fanout.MAP_COSTS_KEY)
+COST_HISTORY_RUNS = 200
+
+# Bounds of the search and the per-invocation constraints (memory_mb matches the Lambda's memory size)
+TUNING_LIMITS = {
+    "max_fetch": 16,
+    "max_batch_size": 25,
+    "budget_seconds": 60.0,
+    "memory_mb": 512,
+    "overhead_seconds": 1.0,
+}
+
+# Share of memory_mb a planned invocation may use
+MEMORY_HEADROOM = 0.8
+
+# Decoded JSON takes several times its wire size; used until memory growth has been measured
+PAYLOAD_EXPANSION = 10
+
+# Settings projected within this fraction of the best total are treated as equal,
+# and the one with fewer fetch workers (then fewer invocations) wins
+TIE_TOLERANCE = 0.02
+
+# How often MemoryProbe samples resident memory during a run
+MEMORY_SAMPLE_SECONDS = 0.01
+
+
+def resident_memory_mb():
+    """Current resident memory of this process (the lifetime peak where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryProbe:
+    """
+    Memory used by one run, measured over a with block.
+
+    ru_maxrss is a lifetime high-water mark, so in a warm container it says
+    nothing about the current run. The probe records resident memory when
+    the block starts and ends, and its peak in between, sampled every
+    MEMORY_SAMPLE_SECONDS from a daemon thread. Reading /proc/self/statm
+    costs microseconds and nothing is traced, so the run itself runs at
+    full speed. The sampler stops when the block exits, even on an error.
+    """
+
+    def __enter__(self):
+        self.rss_before_mb = self.rss_peak_mb = resident_memory_mb()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="memory-probe", daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(MEMORY_SAMPLE_SECONDS):
+            self.rss_peak_mb = max(self.rss_peak_mb, resident_memory_mb())
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._sampler.join()
+        self.rss_after_mb = resident_memory_mb()
+        self.rss_peak_mb = max(self.rss_peak_mb, self.rss_after_mb)
+        return False
+
+    def result(self):
+        """The run's memory signals for run_record"""
+        return {
+            "rss_before_mb": round(self.rss_before_mb, 1),
+            "rss_after_mb": round(self.rss_after_mb, 1),
+            "rss_peak_mb": round(self.rss_peak_mb, 1),
+        }
+
+
+def run_record(now, fetch_seconds, fetch_bytes, cpu_seconds, wall_seconds, fetch_workers, memory):
+    """
+    Cost signals of one run.
+
+    Args:
+        now: run timestamp
+        fetch_seconds: dict of map ID -> fetch latency
+        fetch_bytes: dict of map ID -> response bytes (maps missing here have no size)
+        cpu_seconds: process CPU time spent by the run
+        wall_seconds: duration of the run
+        fetch_workers: maps fetched at once (1 for a sequential run)
+        memory: MemoryProbe.result() of the run
+
+    Returns:
+        dict: record for append_run
+    """
+    return dict({
+        "time": now.strftime('%Y%m%d_%H%M%S'),
+        "fetch": int(fetch_workers),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "wall_seconds": round(wall_seconds, 4),
+        "maps": {
+            str(map_id): {"seconds": round(seconds, 4), "bytes": fetch_bytes.get(map_id)}
+            for map_id, seconds in fetch_seconds.items()
+        },
+    }, **memory)
+
+
+def append_run(runs, record, keep=COST_HISTORY_RUNS):
+    """Add a record to the cost history, dropping the oldest beyond keep"""
+    return (list(runs) + [record])[-keep:]
+
+
+def fold_run_costs(table, records):
+    """
+    Add run records to the cost table stored at fanout.MAP_COSTS_KEY.
+
+    The table keeps the smoothed per-map fetch times fanout.plan_batches
+    uses under "maps" and the run history the tuner fits under "runs", so
+    one conditional write updates both.
+
+    Returns:
+        dict: {"maps": {map ID: seconds}, "runs": [record, ...]}
+    """
+    # A table without "maps" is the flat per-map table written before run records were folded in
+    maps = table["maps"] if "maps" in table else dict(table)
+    runs = table.get("runs", [])
+    for record in records:
+        maps = fanout.update_map_costs(maps, {map_id: cost["seconds"] for map_id, cost in record["maps"].items()})
+        runs = append_run(runs, record)
+    return {"maps": maps, "runs": runs}
+
+
+def fetch_makespan(latencies, workers):
+    """Time for `workers` fetchers to work through latencies in order, each taking the next map when free"""
+    if not latencies:
+        return 0.0
+    free_at = [0.0] * max(1, min(workers, len(latencies)))
+    for latency in latencies:
+        heapq.heapreplace(free_at, free_at[0] + latency)
+    return max(free_at)
+
+
+def cost_model(runs, limits=None):
+    """
+    Fit the cost model the tuner projects with from recorded runs.
+
+    - Latency and bytes per map are medians over all runs.
+    - CPU per map is the median of each run's CPU time / maps. The GIL
+      serializes it, so it bounds how much concurrency can help.
+    - Fixed overhead per invocation is the median of what each run's wall
+      time leaves over after its fetches.
+    - Memory is the largest resident size a run started from, plus the
+      largest rise to the run's peak per concurrent fetch seen (MemoryProbe).
+      Until a run has been probed, growth is estimated from payload size.
+      Records without per-run memory (lifetime peaks) are ignored for it.
+
+    Returns:
+        dict: {"maps": {id: {"seconds", "bytes"}}, "cpu_per_map", "overhead_seconds",
+        "base_memory_mb", "memory_per_fetch_mb", "runs"}
+    """
+    limits = dict(TUNING_LIMITS, **(limits or {}))
+    samples = {}
+    for run in runs:
+        for map_id, cost in run["maps"].items():
+            sample = samples.setdefault(map_id, {"seconds": [], "bytes": []})
+            sample["seconds"].append(cost["seconds"])
+            if cost.get("bytes") is not None:
+                sample["bytes"].append(cost["bytes"])
+    maps = {
+        map_id: {"seconds": statistics.median(sample["seconds"]),
+                 "bytes": statistics.median(sample["bytes"]) if sample["bytes"] else None}
+        for map_id, sample in samples.items()
+    }
+
+    measured = [run for run in runs if run["maps"]]
+    cpu_per_map = statistics.median(run["cpu_seconds"] / len(run["maps"]) for run in measured) if measured else 0.0
+    overheads = [
+        run["wall_seconds"] - max(fetch_makespan([cost["seconds"] for cost in run["maps"].values()], run["fetch"]),
+                                  cpu_per_map * len(run["maps"]))
+        for run in measured
+    ]
+    overhead = max(0.0, statistics.median(overheads)) if overheads else limits["overhead_seconds"]
+
+    probed = [run for run in measured if "rss_peak_mb" in run]
+    base_memory = max((run["rss_before_mb"] for run in probed), default=0.0)
+    growth = [(run["rss_peak_mb"] - run["rss_before_mb"]) / min(run["fetch"], len(run["maps"])) for run in probed]
+    per_fetch = max(growth, default=0.0)
+    if per_fetch <= 0:
+        sizes = [cost["bytes"] for cost in maps.values() if cost["bytes"] is not None]
+        per_fetch = statistics.median(sizes) * PAYLOAD_EXPANSION / (1024 * 1024) if sizes else 0.0
+
+    return {
+        "maps": maps,
+        "cpu_per_map": cpu_per_map,
+        "overhead_seconds": overhead,
+        "base_memory_mb": base_memory,
+        "memory_per_fetch_mb": per_fetch,
+        "runs": len(runs),
+    }
+
+
+def map_seconds(model, map_id):
+    """Projected fetch latency of one map (fanout.DEFAULT_MAP_COST if never measured)"""
+    cost = model["maps"].get(str(map_id))
+    return fanout.DEFAULT_MAP_COST if cost is None else cost["seconds"]
+
+
+def invocation_seconds(model, map_ids, fetch):
+    """Projected duration of one invocation scraping map_ids with `fetch` concurrent fetches"""
+    fetching = fetch_makespan([map_seconds(model, map_id) for map_id in map_ids], fetch)
+    return model["overhead_seconds"] + max(fetching, model["cpu_per_map"] * len(map_ids))
+
+
+def invocation_memory_mb(model, map_count, fetch):
+    """Projected peak memory of one invocation"""
+    return model["base_memory_mb"] + model["memory_per_fetch_mb"] * min(fetch, map_count)
+
+
+def project(model, batches, fetch, limits=None):
+    """
+    Projected cost of scraping batches (one invocation each) with `fetch` concurrent fetches.
+
+    Returns:
+        dict: settings, per-invocation seconds, total (billed) and wall
+        seconds, peak memory, maps per billed second, and whether every
+        invocation fits the time budget and memory limit
+    """
+    limits = dict(TUNING_LIMITS, **(limits or {}))
+    seconds = [invocation_seconds(model, batch, fetch) for batch in batches]
+    memory = max((invocation_memory_mb(model, len(batch), fetch) for batch in batches), default=0.0)
+    maps = sum(len(batch) for batch in batches)
+    total = sum(seconds)
+    return {
+        "fetch": fetch,
+        "batch_size": max((len(batch) for batch in batches), default=0),
+        "batches": [list(batch) for batch in batches],
+        "invocations": len(batches),
+        "invocation_seconds": seconds,
+        "total_seconds": total,
+        "wall_seconds": max(seconds, default=0.0),
+        "peak_memory_mb": memory,
+        "maps_per_second": maps / total if total else 0.0,
+        "feasible": max(seconds, default=0.0) <= limits["budget_seconds"]
+                    and memory <= limits["memory_mb"] * MEMORY_HEADROOM,
+    }
+
+
+def choose_settings(model, map_ids, limits=None):
+    """
+    Pick the fetch concurrency and resorts per invocation with the least total duration.
+
+    Every fetch worker count up to max_fetch and batch size up to
+    max_batch_size is projected. Batches come from fanout.plan_batches
+    on each map's share of a worker (its latency / workers, never below
+    the CPU it costs). Settings are kept only when every invocation fits
+    budget_seconds and the memory limit. Among those, the least total
+    invocation time wins; near-ties go to fewer workers, then fewer
+    invocations. When nothing fits, the same rule picks among all
+    settings and the result has feasible=False.
+
+    Returns:
+        dict: the chosen projection (see project)
+    """
+    limits = dict(TUNING_LIMITS, **(limits or {}))
+    candidates = []
+    seen = set()
+    for fetch in range(1, limits["max_fetch"] + 1):
+        shares = {str(map_id): max(map_seconds(model, map_id) / fetch, model["cpu_per_map"]) for map_id in map_ids}
+        for size in range(1, limits["max_batch_size"] + 1):
+            batches = fanout.plan_batches(map_ids, shares, limits["budget_seconds"], size, model["overhead_seconds"])
+            signature = (fetch, tuple(tuple(batch) for batch in batches))
+            if signature not in seen:
+                seen.add(signature)
+                candidates.append(project(model, batches, fetch, limits))
+
+    pool = [candidate for candidate in candidates if candidate["feasible"]] or candidates
+    best = min(candidate["total_seconds"] for candidate in pool)
+    near = [candidate for candidate in pool if candidate["total_seconds"] <= best * (1 + TIE_TOLERANCE)]
+    return min(near, key=lambda candidate: (candidate["fetch"], candidate["invocations"], candidate["total_seconds"]))
+
+
+def tuned_events(choice, output=None):
+    """Batch events applying a choice: one pipelined invocation per batch with the chosen fetch workers"""
+    return [dict(event, pipeline={"fetch": choice["fetch"]})
+            for event in fanout.batch_events(choice["batches"], output)]
+
+
+def load_runs(sink):
+    """Recorded run costs, oldest first"""
+    text = read_text(sink, fanout.MAP_COSTS_KEY)
+    return json.loads(text).get("runs", []) if text else []
+
+
+def format_projection(label, projection):
+    """One-line summary of a projection"""
+    fits = "" if projection["feasible"] else "  (exceeds budget or memory)"
+    return (f"{label:<8} fetch={projection['fetch']:<3} resorts/invocation={projection['batch_size']:<3} "
+            f"invocations={projection['invocations']:<3} total={projection['total_seconds']:.1f}s "
+            f"wall={projection['wall_seconds']:.1f}s peak={projection['peak_memory_mb']:.0f}MB "
+            f"{projection['maps_per_second']:.2f} maps/s{fits}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Choose scraper concurrency and batch size from recorded run costs")
+    parser.add_argument('--bucket', help="S3 bucket holding metrics/map_costs.json")
+    parser.add_argument('--output-dir', help="Local directory holding metrics/map_costs.json")
+    parser.add_argument('--maps', help="Comma-separated map IDs (default: every recorded map)")
+    parser.add_argument('--max-fetch', type=int, default=TUNING_LIMITS["max_fetch"], help="Most fetch workers")
+    parser.add_argument('--max-batch-size', type=int, default=TUNING_LIMITS["max_batch_size"],
+                        help="Most resorts per invocation")
+    parser.add_argument('--budget', type=float, default=TUNING_LIMITS["budget_seconds"],
+                        help="Longest an invocation may run (seconds)")
+    parser.add_argument('--memory-mb', type=int, default=TUNING_LIMITS["memory_mb"], help="Lambda memory size")
+    parser.add_argument('--current-fetch', type=int, default=1, help="Fetch workers used today")
+    parser.add_argument('--current-batch-size', type=int, default=0,
+                        help="Resorts per invocation used today (0: all in one invocation)")
+    parser.add_argument('--prefix', default='', help="Output prefix of the tuned batch events")
+    parser.add_argument('--invoke', metavar='FUNCTION', help="Apply: invoke FUNCTION once per tuned batch")
+    args = parser.parse_args()
+
+    if not (args.bucket or args.output_dir):
+        parser.error("--bucket or --output-dir is required")
+    runs = load_runs(resolve_sink(None, args.bucket, args.output_dir))
+    if not runs:
+        parser.error(f"No run costs recorded in {fanout.MAP_COSTS_KEY} yet")
+    limits = {"max_fetch": args.max_fetch, "max_batch_size": args.max_batch_size,
+              "budget_seconds": args.budget, "memory_mb": args.memory_mb}
+    model = cost_model(runs, limits)
+    map_ids = [int(map_id) for map_id in args.maps.split(',')] if args.maps else sorted(int(m) for m in model["maps"])
+
+    size = args.current_batch_size or len(map_ids)
+    current = project(model, [map_ids[i:i + size] for i in range(0, len(map_ids), size)], args.current_fetch, limits)
+    choice = choose_settings(model, map_ids, limits)
+
+    print(f"Cost model from {model['runs']} runs: {len(model['maps'])} maps, "
+          f"{model['cpu_per_map'] * 1000:.0f}ms CPU/map, {model['overhead_seconds']:.2f}s overhead, "
+          f"{model['base_memory_mb']:.0f}MB + {model['memory_per_fetch_mb']:.1f}MB per concurrent fetch")
+    print(format_projection("current", current))
+    print(format_projection("tuned", choice))
+    events = tuned_events(choice, {"prefix": args.prefix} if args.prefix else None)
+    if args.invoke:
+        fanout.invoke_batches(args.invoke, events)
+    else:
+        print(json.dumps(events))
+
+
+if __name__ == "__main__":
+    main()
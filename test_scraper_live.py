@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from scraper import scrape_lift_data
+from sinks import LocalSink, write_df
 
 if __name__ == "__main__":
     print("=" * 70)
@@ -50,8 +51,9 @@ if __name__ == "__main__":
                 print(f"  {status}: {count}")
         
         # Optionally save to local CSV files for inspection
-        status_df.to_csv('status_test.csv', index=False)
-        wait_time_df.to_csv('wait_time_test.csv', index=False)
+        output = LocalSink('.')
+        write_df(output, status_df, 'status_test.csv')
+        write_df(output, wait_time_df, 'wait_time_test.csv')
         print()
         print("📁 Saved to status_test.csv and wait_time_test.csv")
         
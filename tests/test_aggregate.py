@@ -0,0 +1,130 @@
+"""
+Unit tests for aggregate.py
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from aggregate import DEFAULT_MAX_LIFTS, MIN_CHUNK_ROWS, ROW_BYTES, WaitAggregate, aggregate_archive, aggregate_files, plan_memory
+from analytics import iter_snapshot_days, load_snapshot_matrix
+from batcher import MicroBatcher
+from sinks import LocalSink, df_to_csv, write_df
+from test_analytics import write_snapshot
+
+
+def random_archive(directory, snapshots=40, lifts=12, seed=0):
+    """Write a minute of snapshots per step with random statuses and waits"""
+    rng = np.random.default_rng(seed)
+    for minute in range(snapshots):
+        rows = [
+            (lift_id, rng.choice(["Open", "Closed", "On Hold"]), None if rng.random() < 0.2 else int(rng.integers(0, 40)))
+            for lift_id in range(lifts)
+        ]
+        write_snapshot(directory, f"20260101_{8 + minute // 60:02d}{minute % 60:02d}00", rows)
+
+
+def test_archive_matches_in_memory_matrix(tmp_path):
+    """Test that streamed partials give the same answers as load_snapshot_matrix"""
+    random_archive(tmp_path)
+    # Two more runs recorded only as markers repeating the first snapshot
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    pd.DataFrame([
+        {"Time": f"20260101_09{minute:02d}00", "Hash": "h", "Status Key": "status_20260101_080000.csv",
+         "Wait Time Key": "wait_time_20260101_080000.csv", "Unchanged Since": "20260101_080000"}
+        for minute in (10, 11)
+    ]).to_csv(index_dir / "20260101.csv", index=False)
+
+    matrix = load_snapshot_matrix(directory=str(tmp_path))
+    aggregate = aggregate_archive(directory=str(tmp_path), max_workers=3)
+
+    assert list(aggregate.lift_ids) == list(matrix.lift_ids)
+    assert aggregate.samples[0] == matrix.wait.shape[1] == 42
+    np.testing.assert_allclose(aggregate.percentile([10, 50, 90, 99]), matrix.percentile([10, 50, 90, 99]), rtol=1e-6)
+    np.testing.assert_allclose(aggregate.uptime_fraction(), matrix.uptime_fraction())
+    np.testing.assert_allclose(aggregate.mean_wait(), np.nanmean(matrix.wait, axis=1), rtol=1e-6)
+    np.testing.assert_array_equal(aggregate.wait_max[aggregate.lift_ids], np.nanmax(matrix.wait, axis=1))
+
+
+def test_archive_streams_one_day_at_a_time(tmp_path):
+    """Test that days are listed separately, empty days are skipped and cross-day runs still count"""
+    random_archive(tmp_path, snapshots=5)
+    sink = LocalSink(str(tmp_path))
+    # A batch opened before midnight whose second snapshot falls on the next day
+    with MicroBatcher(sink, max_members=100) as batcher:
+        for timestamp in ("20260105_235500", "20260106_000500"):
+            snapshot_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "Lift 0", "Status": "Open",
+                                         "Status Detail": None, "Wait Time": 7}])
+            batcher.add(datetime.strptime(timestamp, "%Y%m%d_%H%M%S").replace(tzinfo=timezone.utc),
+                        f"snapshot_{timestamp}", df_to_csv(snapshot_df), kind="snapshot")
+    # A marker weeks later repeating the first day's opening snapshot
+    write_df(sink, pd.DataFrame([{"Time": "20260201_090000", "Hash": "h", "Status Key": "status_20260101_080000.csv",
+                                  "Wait Time Key": "wait_time_20260101_080000.csv",
+                                  "Unchanged Since": "20260101_080000"}]), "index/20260201.csv")
+
+    days = [day.strftime("%Y%m%d") for day, _ in iter_snapshot_days(sink)]
+    assert days == ["20260101", "20260105", "20260106", "20260201"]
+
+    matrix = load_snapshot_matrix(sink=sink)
+    aggregate = aggregate_archive(sink=sink, max_workers=2)
+
+    assert aggregate.samples[0] == matrix.wait.shape[1] == 8
+    np.testing.assert_allclose(aggregate.percentile([50, 90]), matrix.percentile([50, 90]), rtol=1e-6)
+    np.testing.assert_allclose(aggregate.uptime_fraction(), matrix.uptime_fraction())
+
+
+def test_chunked_files_match_single_pass(tmp_path):
+    """Test that a long-format file read in many small chunks sums to one pass"""
+    rng = np.random.default_rng(1)
+    rows = 5000
+    df = pd.DataFrame({
+        "Lift ID": rng.integers(0, 30, rows),
+        "Status": rng.choice(["Open", "Closed"], rows),
+        "Wait Time": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(0, 60, rows)),
+    })
+    sink = LocalSink(str(tmp_path))
+    write_df(sink, df.iloc[:3000], "history_a.csv")
+    write_df(sink, df.iloc[3000:], "history_b.csv")
+
+    # Enough for one worker and the smallest chunk size only
+    memory_limit = 2 * WaitAggregate.partial_bytes(DEFAULT_MAX_LIFTS) + MIN_CHUNK_ROWS * ROW_BYTES
+    assert plan_memory(memory_limit, 4) == (1, MIN_CHUNK_ROWS)
+    chunked = aggregate_files(["history_a.csv", "history_b.csv"], sink=sink, memory_limit=memory_limit)
+
+    expected = WaitAggregate()
+    expected.add(df["Lift ID"], np.where(df["Status"] == "Open", 1, 5), df["Wait Time"])
+    np.testing.assert_array_equal(chunked.histogram[:30], expected.histogram)
+    np.testing.assert_array_equal(chunked.up_samples[:30], expected.up_samples)
+    np.testing.assert_allclose(chunked.percentile(50), expected.percentile(50))
+
+
+def test_merge_is_order_independent():
+    """Test that merging partials in any order gives the same aggregate"""
+    first, second = WaitAggregate(), WaitAggregate()
+    first.add([0, 1], [1, 5], [5, np.nan])
+    second.add([3, 0], [1, 1], [20, 1], weight=2)
+
+    left = WaitAggregate().merge(first).merge(second)
+    right = WaitAggregate().merge(second).merge(first)
+
+    np.testing.assert_array_equal(left.histogram, right.histogram)
+    assert list(left.lift_ids) == [0, 1, 3]
+    assert left.wait_min[0] == 1 and left.wait_max[0] == 5
+    assert list(left.samples[[0, 1, 3]]) == [3, 1, 2]
+
+
+def test_plan_memory_drops_workers_before_failing():
+    """Test that a tight cap reduces parallelism and a tiny cap is rejected"""
+    workers, chunk_rows = plan_memory(16 * 1024 * 1024, 16)
+
+    assert 1 <= workers < 16
+    assert chunk_rows >= MIN_CHUNK_ROWS
+    with pytest.raises(ValueError):
+        plan_memory(1024 * 1024, 4)
@@ -0,0 +1,229 @@
+"""
+Unit tests for analytics.py
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import Mock
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from analytics import (SnapshotMatrix, frames_to_matrix, load_archive_matrix, load_snapshot_matrix, list_snapshot_keys,
+                       pair_snapshot_keys)
+from lift_registry import LiftRegistry
+from lift_schema import LiftStatus
+from sinks import LocalSink, MemorySink, S3Sink
+
+
+def write_snapshot(directory, timestamp, rows):
+    """Write a status/wait_time CSV pair in the Lambda's naming scheme"""
+    pd.DataFrame(
+        [{"Map ID": 152, "Lift ID": lift_id, "Lift": f"Lift {lift_id}", "Status": status, "Status Detail": None}
+         for lift_id, status, _ in rows]
+    ).to_csv(directory / f"status_{timestamp}.csv", index=False)
+    pd.DataFrame(
+        [{"Map ID": 152, "Lift ID": lift_id, "Lift": f"Lift {lift_id}", "Wait Time": wait}
+         for lift_id, _, wait in rows]
+    ).to_csv(directory / f"wait_time_{timestamp}.csv", index=False)
+
+
+def test_pair_snapshot_keys_filters_range_and_unpaired():
+    """Test that keys are paired by timestamp and filtered to the range"""
+    keys = [
+        "status_20260101_080000.csv", "wait_time_20260101_080000.csv",
+        "status_20260101_080100.csv", "wait_time_20260101_080100.csv",
+        "status_20260101_080200.csv",
+        "lifts.csv",
+    ]
+    start = datetime(2026, 1, 1, 8, 1, tzinfo=timezone.utc)
+    
+    pairs = pair_snapshot_keys(keys, start=start)
+    
+    assert pairs == [(start, "status_20260101_080100.csv", "wait_time_20260101_080100.csv")]
+
+
+def test_list_snapshot_keys_uses_start_after():
+    """Test that S3 listing skips ahead to the start of the range"""
+    paginator = Mock()
+    paginator.paginate.side_effect = [
+        [{"Contents": [{"Key": "status_20260101_080000.csv"}]}],
+        [{"Contents": [{"Key": "wait_time_20260101_080000.csv"}]}],
+        [{"Contents": []}],
+    ]
+    s3_client = Mock()
+    s3_client.get_paginator.return_value = paginator
+    start = datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc)
+    
+    pairs = list_snapshot_keys(S3Sink("test-bucket", s3_client=s3_client), start=start)
+    
+    assert len(pairs) == 1
+    assert paginator.paginate.call_args_list[0][1]["StartAfter"] == "status_20260101_080000"
+
+
+def test_load_snapshot_matrix_from_directory(tmp_path):
+    """Test that a local archive loads into a lift x time matrix"""
+    write_snapshot(tmp_path, "20260101_080000", [(0, "Open", 5), (1, "Closed", None)])
+    write_snapshot(tmp_path, "20260101_080100", [(0, "Open", 7), (1, "Open", 2)])
+    
+    matrix = load_snapshot_matrix(directory=str(tmp_path))
+    
+    assert list(matrix.lift_ids) == [0, 1]
+    assert matrix.names == ["Lift 0", "Lift 1"]
+    assert matrix.wait.shape == (2, 2)
+    assert matrix.wait[0].tolist() == [5, 7]
+    assert np.isnan(matrix.wait[1, 0])
+    assert matrix.status[1].tolist() == [LiftStatus.CLOSED, LiftStatus.OPEN]
+    assert matrix.uptime_fraction().tolist() == [1.0, 0.5]
+
+
+def test_load_legacy_snapshots_by_name(tmp_path):
+    """Test that legacy name-only CSVs are keyed through the registry"""
+    pd.DataFrame({"Lift": ["KT-22"], "Status": ["Open"]}).to_csv(tmp_path / "status_20260101_080000.csv", index=False)
+    pd.DataFrame({"Lift": ["KT-22"], "Wait Time": ["N/A"]}).to_csv(tmp_path / "wait_time_20260101_080000.csv", index=False)
+    
+    matrix = load_snapshot_matrix(directory=str(tmp_path))
+    
+    assert matrix.names == ["KT-22"]
+    assert np.isnan(matrix.wait[0, 0])
+
+
+def test_frames_to_matrix_mixes_legacy_and_typed_frames():
+    """Test that legacy and current frames concatenated together keep their statuses and waits"""
+    legacy = pd.DataFrame({"Lift": ["KT-22"], "Status": ["No Offload at KT-22"], "Wait Time": ["7"]})
+    typed = pd.DataFrame({"Map ID": [152], "Lift ID": [5], "Lift": ["Gondola"], "Status": ["Closed"],
+                          "Status Detail": [None], "Wait Time": pd.array([None], dtype="Int16")})
+    snapshots = [
+        (datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc), legacy, legacy),
+        (datetime(2026, 1, 1, 8, 1, tzinfo=timezone.utc), typed, typed),
+    ]
+    
+    matrix = frames_to_matrix(snapshots)
+    
+    assert matrix.names == ["KT-22", "Gondola"]
+    assert list(matrix.status[:, 0]) == [LiftStatus.LIMITED, -1]
+    assert list(matrix.status[:, 1]) == [-1, LiftStatus.CLOSED]
+    assert matrix.wait[0, 0] == 7 and np.isnan(matrix.wait[1, 1])
+
+
+def test_legacy_names_join_live_lift_ids():
+    """Test that legacy rows reuse registered IDs by name and only unmatched names get new ones"""
+    registry = LiftRegistry()
+    kt22 = registry.lift_id(152, {"id": "kt22", "name": "KT-22"})
+    registry.lift_id(152, {"id": "a", "name": "Red Dog"})
+    registry.lift_id(153, {"id": "b", "name": "Red Dog"})
+    red_dog_west = registry.lift_id(154, {"id": "c", "name": "Red Dog"})
+    legacy = pd.DataFrame({"Lift": ["KT-22", "Red Dog", "Summit"], "Status": ["Open"] * 3, "Wait Time": ["5"] * 3})
+    mapped = pd.DataFrame({"Map ID": [154, 152], "Lift": ["Red Dog", "KT-22"], "Status": ["Open"] * 2,
+                           "Wait Time": ["5"] * 2})
+    snapshots = [
+        (datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc), legacy, legacy),
+        (datetime(2026, 1, 1, 8, 1, tzinfo=timezone.utc), mapped, mapped),
+    ]
+    
+    matrix = frames_to_matrix(snapshots, registry)
+    
+    # KT-22 matches across maps, Red Dog only on its own map; Summit and the ambiguous Red Dog are new
+    assert len(registry) == 6
+    assert sorted(matrix.lift_ids) == sorted([kt22, red_dog_west, 4, 5])
+    assert registry.map_id(4) == 0 and registry.name(5) == "Summit"
+
+
+def make_matrix(wait_rows, status_rows=None):
+    """Build a matrix with one-minute spacing from nested lists"""
+    wait = np.array(wait_rows, dtype=np.float32)
+    status = np.array(status_rows if status_rows else np.ones(wait.shape), dtype=np.int8)
+    times = np.datetime64('2026-01-01T08:00:00', 's') + np.arange(wait.shape[1]) * np.timedelta64(60, 's')
+    return SnapshotMatrix(times, np.arange(wait.shape[0], dtype=np.int32), [], wait, status)
+
+
+def test_rolling_mean_ignores_gaps():
+    """Test rolling mean over a window with missing values"""
+    matrix = make_matrix([[2, np.nan, 4, 6]])
+    
+    assert matrix.rolling_mean(2)[0].tolist() == [2, 2, 4, 5]
+
+
+def test_percentile_matches_numpy():
+    """Test vectorized percentiles against np.nanpercentile"""
+    rng = np.random.default_rng(1)
+    wait = rng.integers(0, 30, size=(3, 50)).astype(np.float32)
+    wait[rng.random(wait.shape) < 0.3] = np.nan
+    wait[2] = np.nan
+    matrix = make_matrix(wait)
+    
+    result = matrix.percentile([10, 50, 90])
+    
+    expected = np.nanpercentile(wait[:2], [10, 50, 90], axis=1).T
+    np.testing.assert_allclose(result[:2], expected, rtol=1e-5)
+    assert np.isnan(result[2]).all()
+
+
+def test_resample_mean_hourly():
+    """Test hourly means across an hour boundary"""
+    matrix = make_matrix([[1, 3, 10]])
+    matrix.times = np.array(['2026-01-01T08:58', '2026-01-01T08:59', '2026-01-01T09:00'], dtype='datetime64[s]')
+    
+    buckets, means = matrix.resample_mean(3600)
+    
+    assert buckets.tolist() == [np.datetime64('2026-01-01T08:00', 's').item(), np.datetime64('2026-01-01T09:00', 's').item()]
+    assert means[0].tolist() == [2, 10]
+
+
+def test_load_combined_snapshots(tmp_path):
+    """Test that combined snapshot objects from batch invocations load like pairs"""
+    pd.DataFrame([
+        {"Map ID": 7, "Lift ID": 0, "Lift": "A", "Status": "Open", "Status Detail": None, "Wait Time": 4}
+    ]).to_csv(tmp_path / "snapshot_20260101_080000.csv", index=False)
+    write_snapshot(tmp_path, "20260101_080100", [(0, "Closed", None)])
+    
+    matrix = load_snapshot_matrix(directory=str(tmp_path))
+    
+    assert matrix.wait.shape == (1, 2)
+    assert matrix.wait[0, 0] == 4
+    assert matrix.status[0].tolist() == [LiftStatus.OPEN, LiftStatus.CLOSED]
+
+
+def test_load_expands_unchanged_markers(tmp_path):
+    """Test that deduplicated minutes are filled from the snapshot they repeat"""
+    write_snapshot(tmp_path, "20260101_080000", [(0, "Open", 5)])
+    (tmp_path / "index").mkdir()
+    pd.DataFrame([
+        {"Time": "20260101_080000", "Hash": "h", "Status Key": "status_20260101_080000.csv",
+         "Wait Time Key": "wait_time_20260101_080000.csv", "Unchanged Since": ""},
+        {"Time": "20260101_080100", "Hash": "h", "Status Key": "status_20260101_080000.csv",
+         "Wait Time Key": "wait_time_20260101_080000.csv", "Unchanged Since": "20260101_080000"},
+    ]).to_csv(tmp_path / "index" / "20260101.csv", index=False)
+    
+    matrix = load_snapshot_matrix(directory=str(tmp_path))
+    
+    assert matrix.times.tolist() == [
+        datetime(2026, 1, 1, 8, 0), datetime(2026, 1, 1, 8, 1)
+    ]
+    assert matrix.wait[0].tolist() == [5, 5]
+
+
+def test_load_archive_matrix_matches_snapshot_loader(tmp_path):
+    """Test that reading the importer's day partitions gives the same matrix as reading each run"""
+    from importer import import_archive
+    write_snapshot(tmp_path, "20260101_080000", [(0, "Open", 5), (1, "Closed", None)])
+    write_snapshot(tmp_path, "20260101_080100", [(0, "Open", 7), (1, "Open", 2)])
+    write_snapshot(tmp_path, "20260102_090000", [(0, "Closed", None)])
+    target = MemorySink()
+    import_archive(LocalSink(str(tmp_path)), target)
+    
+    expected = load_snapshot_matrix(directory=str(tmp_path))
+    matrix = load_archive_matrix(sink=target)
+    
+    assert matrix.times.tolist() == expected.times.tolist()
+    assert list(matrix.lift_ids) == list(expected.lift_ids) and matrix.names == expected.names
+    np.testing.assert_array_equal(matrix.wait, expected.wait)
+    np.testing.assert_array_equal(matrix.status, expected.status)
+    
+    # Ranges cut through partitions at the snapshot level
+    start = datetime(2026, 1, 1, 8, 1, tzinfo=timezone.utc)
+    ranged = load_archive_matrix(start, sink=target)
+    assert ranged.times.tolist() == [datetime(2026, 1, 1, 8, 1), datetime(2026, 1, 2, 9, 0)]
+    assert ranged.wait[:, 0].tolist() == [7, 2]
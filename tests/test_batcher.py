@@ -0,0 +1,94 @@
+"""
+Unit tests for batcher.py
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from batcher import MicroBatcher, batch_key
+from sinks import LocalSink, MemorySink, df_to_csv, read_batch_footer, read_df, read_text
+
+
+START = datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def snapshot_csv(minute):
+    return df_to_csv(pd.DataFrame([{"Lift ID": 0, "Wait Time": minute}]))
+
+
+def test_flushes_one_object_per_batch():
+    """Test that members are written together once the batch is full and read back by key"""
+    sink = MemorySink()
+    flushed = []
+    batcher = MicroBatcher(sink, "west/", max_members=3, on_flush=lambda key, entries: flushed.append(key))
+
+    keys = [batcher.add(START + timedelta(minutes=i), f"snapshot_{i}", snapshot_csv(i)) for i in range(4)]
+
+    assert list(sink.objects) == [batch_key(START, "west/")]
+    assert flushed == [batch_key(START, "west/")]
+    assert len(batcher) == 1
+    assert list(read_df(sink, keys[1])["Wait Time"]) == [1]
+    # The fourth member opened a new batch, readable after close
+    assert batcher.close() == batch_key(START + timedelta(minutes=3), "west/")
+    assert list(read_df(sink, keys[3])["Wait Time"]) == [3]
+
+
+def test_member_reads_use_byte_ranges(tmp_path):
+    """Test that a reader seeks to one member instead of downloading the batch"""
+    sink = LocalSink(str(tmp_path), compress=True)
+    batcher = MicroBatcher(sink, max_members=100)
+    keys = [batcher.add(START + timedelta(minutes=i), f"snapshot_{i}", snapshot_csv(i)) for i in range(50)]
+    batcher.add_entry(START + timedelta(minutes=50), "marker_50", kind="snapshot", status_key=keys[49])
+    batcher.flush()
+
+    with patch.object(sink, 'read', side_effect=AssertionError("whole-object read")):
+        assert list(read_df(sink, keys[37])["Wait Time"]) == [37]
+    footer = read_batch_footer(sink, batch_key(START))
+    assert footer["compression"] == "gzip"
+    assert footer["entries"][-1] == {"kind": "snapshot", "status_key": keys[49], "name": "marker_50",
+                                     "time": "20260101_085000"}
+    assert read_text(sink, keys[0]).startswith("Lift ID")
+
+
+def test_flushes_on_age_and_keeps_buffer_on_failure():
+    """Test the time threshold, and that a failed flush is retried rather than dropped"""
+    sink = MemorySink()
+    clock = FakeClock()
+    batcher = MicroBatcher(sink, max_members=100, max_age_seconds=60, clock=clock)
+    batcher.add(START, "snapshot_0", snapshot_csv(0))
+
+    clock.now = 30
+    assert batcher.flush_if_due() is None
+
+    clock.now = 61
+    with patch.object(sink, 'write', side_effect=IOError("throttled")):
+        with pytest.raises(IOError):
+            batcher.flush_if_due()
+    assert len(batcher) == 1
+
+    assert batcher.flush_if_due() == batch_key(START)
+    assert len(batcher) == 0 and batcher.members_written == 1
+
+
+def test_batch_never_spans_more_than_an_hour():
+    """Test that a gap in runs starts a new batch, so readers can bound their listing"""
+    sink = MemorySink()
+    batcher = MicroBatcher(sink, max_members=100)
+    batcher.add(START, "snapshot_0", snapshot_csv(0))
+    batcher.add(START + timedelta(hours=2), "snapshot_1", snapshot_csv(1))
+
+    assert list(sink.objects) == [batch_key(START)]
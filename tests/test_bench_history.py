@@ -0,0 +1,68 @@
+"""
+Unit tests for benchmarks/history.py
+"""
+import sys
+from pathlib import Path
+import numpy as np
+
+# Add benchmarks to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from history import compare, format_report, load_history, mann_whitney_p, record_run
+
+
+MACHINE = {"id": "machine-a"}
+
+
+def run(version, cold, maps, machine=MACHINE):
+    return {"time": "20260101_000000", "version": version, "machine": machine,
+            "metrics": {"cold_handler_seconds": cold, "maps_per_second": maps}}
+
+
+def test_mann_whitney_separates_shifted_samples():
+    """Test that a clear shift is significant and identical distributions are not"""
+    rng = np.random.default_rng(0)
+    baseline = rng.normal(1.0, 0.02, 25)
+
+    assert mann_whitney_p(rng.normal(1.2, 0.02, 5), baseline) < 0.01
+    assert mann_whitney_p(rng.normal(1.0, 0.02, 5), baseline) > 0.05
+    assert mann_whitney_p([1.0, 1.0], [1.0, 1.0, 1.0]) == 1.0
+
+
+def test_compare_flags_regressions_in_the_worse_direction():
+    """Test that slower latency and lower throughput are regressions, against same-machine runs only"""
+    history = [run("0.10", [1.0, 1.01, 0.99, 1.02, 0.98], [20, 20.5, 19.5, 20.2, 19.8]) for _ in range(5)]
+    # A much faster machine must not become the baseline
+    history.append(run("0.10", [0.1] * 5, [200] * 5, machine={"id": "machine-b"}))
+    history.append(run("0.11", [1.3, 1.31, 1.29, 1.32, 1.28], [24, 24.5, 23.5, 24.2, 23.8]))
+
+    current, baseline, rows = compare(history)
+
+    verdicts = {row["metric"]: row["verdict"] for row in rows}
+    assert verdicts == {"cold_handler_seconds": "REGRESSION", "maps_per_second": "improved"}
+    assert len(baseline) == 5 and current["version"] == "0.11"
+    assert "REGRESSION" in format_report(current, baseline, rows)
+
+
+def test_small_changes_are_not_flagged():
+    """Test that a significant but tiny change stays below the minimum effect"""
+    history = [run("0.10", [1.0, 1.001, 1.002, 1.003, 1.004], [20] * 5) for _ in range(5)]
+    history.append(run("0.11", [1.02, 1.021, 1.022, 1.023, 1.024], [20] * 5))
+
+    _, _, rows = compare(history)
+
+    assert {row["verdict"] for row in rows} == {"ok"}
+
+
+def test_record_and_load_round_trip(tmp_path):
+    """Test that runs are appended with version and machine fingerprint"""
+    path = tmp_path / "results" / "history.jsonl"
+
+    record_run({"import_seconds": [0.3, 0.31]}, path, version="0.11")
+    record_run({"import_seconds": [0.32]}, path, version="0.12")
+
+    history = load_history(path)
+    assert [record["version"] for record in history] == ["0.11", "0.12"]
+    assert history[0]["machine"]["id"] == history[1]["machine"]["id"]
+    assert history[0]["metrics"]["import_seconds"] == [0.3, 0.31]
+    assert compare([])[0] is None
@@ -0,0 +1,126 @@
+"""
+Unit tests for cube.py
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from analytics import SnapshotMatrix
+from cube import WaitCube
+from lift_registry import LiftRegistry
+from lift_schema import LiftStatus
+from sinks import MemorySink, df_to_csv, write_df
+
+
+START = datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def fake_loader(calls):
+    """Loader returning one snapshot per minute with wait = minute offset"""
+    def loader(range_start, range_end):
+        calls.append((range_start, range_end))
+        minutes = int((range_end - range_start).total_seconds() // 60)
+        offsets = int((range_start - START).total_seconds() // 60) + np.arange(minutes)
+        times = np.datetime64(START.replace(tzinfo=None), 's') + offsets * np.timedelta64(60, 's')
+        wait = np.vstack([offsets, np.full(minutes, np.nan)]).astype(np.float32)
+        status = np.vstack([np.full(minutes, LiftStatus.OPEN), np.full(minutes, LiftStatus.CLOSED)]).astype(np.int8)
+        return SnapshotMatrix(times, np.array([0, 2], dtype=np.int32), ["A", "C"], wait, status)
+    return loader
+
+
+def test_create_and_reopen(tmp_path):
+    """Test that a cube persists its layout and starts empty"""
+    WaitCube.create(str(tmp_path), START, START + timedelta(days=1), max_lifts=8)
+    
+    cube = WaitCube(str(tmp_path), mode='r')
+    
+    assert cube.minutes == 1440
+    assert cube.wait.shape == (8, 1440)
+    assert (cube.wait == -1).all()
+    assert cube.missing_ranges(START, START + timedelta(hours=1)) == [(START, START + timedelta(hours=1))]
+
+
+def test_ensure_fetches_only_missing_ranges(tmp_path):
+    """Test that repeated ensure calls only refetch unfilled minutes"""
+    cube = WaitCube.create(str(tmp_path), START, START + timedelta(days=1), max_lifts=8)
+    now = START + timedelta(days=2)
+    calls = []
+    loader = fake_loader(calls)
+    
+    cube.ensure(START + timedelta(minutes=10), START + timedelta(minutes=20), loader, now=now)
+    cube.ensure(START, START + timedelta(minutes=30), loader, now=now)
+    
+    assert calls == [
+        (START + timedelta(minutes=10), START + timedelta(minutes=20)),
+        (START, START + timedelta(minutes=10)),
+        (START + timedelta(minutes=20), START + timedelta(minutes=30)),
+    ]
+    assert cube.ensure(START, START + timedelta(minutes=30), loader, now=now) == 0
+
+
+def test_ensure_does_not_mark_future_minutes(tmp_path):
+    """Test that minutes after now stay unfilled for a later refresh"""
+    cube = WaitCube.create(str(tmp_path), START, START + timedelta(hours=1), max_lifts=8)
+    
+    cube.ensure(START, START + timedelta(hours=1), fake_loader([]), now=START + timedelta(minutes=5))
+    
+    assert cube.missing_ranges(START, START + timedelta(hours=1)) == [
+        (START + timedelta(minutes=5), START + timedelta(hours=1))
+    ]
+
+
+def test_query_is_zero_copy_and_persisted(tmp_path):
+    """Test that queries are views onto the mapped file and data survives reopen"""
+    cube = WaitCube.create(str(tmp_path), START, START + timedelta(hours=1), max_lifts=8)
+    cube.ensure(START, START + timedelta(hours=1), fake_loader([]), now=START + timedelta(hours=2))
+    
+    reopened = WaitCube(str(tmp_path), mode='r')
+    wait, status = reopened.query(START + timedelta(minutes=5), START + timedelta(minutes=8))
+    
+    assert np.shares_memory(wait, reopened.wait)
+    assert wait[0].tolist() == [5, 6, 7]
+    assert wait[2].tolist() == [-1, -1, -1]
+    assert status[2].tolist() == [LiftStatus.CLOSED] * 3
+    assert status[1].tolist() == [-1, -1, -1]
+    assert reopened.names == {0: "A", 2: "C"}
+
+
+def test_to_matrix_for_analytics(tmp_path):
+    """Test conversion of a cube range to a SnapshotMatrix"""
+    cube = WaitCube.create(str(tmp_path), START, START + timedelta(hours=1), max_lifts=8)
+    cube.ensure(START, START + timedelta(hours=1), fake_loader([]), now=START + timedelta(hours=2))
+    
+    matrix = cube.to_matrix(START, START + timedelta(minutes=4))
+    
+    assert matrix.lift_ids.tolist() == [0, 2]
+    assert matrix.rolling_mean(2)[0].tolist() == [0, 0.5, 1.5, 2.5]
+    assert np.isnan(matrix.wait[1]).all()
+
+
+def test_default_loader_keeps_stored_lift_ids(tmp_path):
+    """Test that legacy files land on the stored registry's rows, and new names keep one row across ensures"""
+    registry = LiftRegistry()
+    for name in ("Gondola", "KT-22"):
+        registry.lift_id(152, {"name": name})
+    sink = MemorySink()
+    sink.write('lifts.csv', df_to_csv(registry.to_df()))
+    for minute, rows in ((0, [("KT-22", "Open", 5)]), (20, [("KT-22", "Open", 7), ("Headwall", "Open", 3)])):
+        stamp = (START + timedelta(minutes=minute)).strftime('%Y%m%d_%H%M%S')
+        write_df(sink, pd.DataFrame([{"Lift": lift, "Status": status} for lift, status, _ in rows]), f"status_{stamp}.csv")
+        write_df(sink, pd.DataFrame([{"Lift": lift, "Wait Time": wait} for lift, _, wait in rows]), f"wait_time_{stamp}.csv")
+    cube = WaitCube.create(str(tmp_path), START, START + timedelta(hours=1), max_lifts=8)
+    now = START + timedelta(hours=2)
+    
+    cube.ensure(START, START + timedelta(minutes=10), sink=sink, now=now)
+    cube.ensure(START + timedelta(minutes=10), START + timedelta(minutes=30), sink=sink, now=now)
+    
+    wait, _ = cube.query(START, START + timedelta(minutes=30))
+    assert wait[1, 0] == 5 and wait[1, 20] == 7
+    assert wait[2, 20] == 3
+    assert cube.names == {1: "KT-22", 2: "Headwall"}
+
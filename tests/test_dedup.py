@@ -0,0 +1,55 @@
+"""
+Unit tests for dedup.py
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from dedup import expand_index, index_row, index_to_df, last_from_json, last_to_json, snapshot_hash
+from lift_schema import type_status_df, type_wait_time_df
+
+
+def frames(rows):
+    """Typed status/wait frames from (lift_id, status, wait) rows"""
+    status_df = type_status_df(pd.DataFrame(
+        [{"Map ID": 152, "Lift ID": i, "Lift": f"Lift {i}", "Status": status} for i, status, _ in rows]
+    ))
+    wait_time_df = type_wait_time_df(pd.DataFrame(
+        [{"Map ID": 152, "Lift ID": i, "Lift": f"Lift {i}", "Wait Time": wait} for i, _, wait in rows]
+    ))
+    return status_df, wait_time_df
+
+
+def test_hash_ignores_row_order():
+    """Test that the canonical hash does not depend on row order"""
+    first = snapshot_hash(*frames([(0, "Open", 5), (1, "Closed", None)]))
+    second = snapshot_hash(*frames([(1, "Closed", None), (0, "Open", 5)]))
+    
+    assert first == second
+
+
+def test_hash_changes_with_content():
+    """Test that status, wait and missing-wait changes all change the hash"""
+    base = snapshot_hash(*frames([(0, "Open", 5)]))
+    
+    assert snapshot_hash(*frames([(0, "Closed", 5)])) != base
+    assert snapshot_hash(*frames([(0, "Open", 6)])) != base
+    assert snapshot_hash(*frames([(0, "Open", None)])) != base
+
+
+def test_markers_expand_to_full_snapshot_keys():
+    """Test that index markers resolve to the snapshot they repeat"""
+    first = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+    second = datetime(2026, 1, 2, 9, 31, tzinfo=timezone.utc)
+    full = index_row(first, "abc", "status_20260102_093000.csv", "wait_time_20260102_093000.csv")
+    marker = index_row(second, "abc", full["Status Key"], full["Wait Time Key"], full["Time"])
+    
+    assert last_from_json(last_to_json(full)) == full
+    assert expand_index(index_to_df([full, marker])) == [
+        ("20260102_093000", "status_20260102_093000.csv", "wait_time_20260102_093000.csv"),
+        ("20260102_093100", "status_20260102_093000.csv", "wait_time_20260102_093000.csv"),
+    ]
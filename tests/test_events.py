@@ -0,0 +1,58 @@
+"""
+Unit tests for events.py
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from events import detect_transitions, events_to_df, find_events, wait_bands
+from lift_schema import LiftStatus
+
+
+NOW = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+
+
+def test_wait_bands():
+    """Test that wait times map to band lower bounds"""
+    assert wait_bands([0, 9, 10, 25, 45, np.nan]).tolist() == [0, 0, 10, 20, 30, -1]
+
+
+def test_status_transition_detected():
+    """Test that a status change emits one status event"""
+    previous = {0: (int(LiftStatus.CLOSED), -1)}
+    
+    found, state = detect_transitions(previous, [0], [LiftStatus.OPEN], [np.nan], NOW)
+    
+    assert found == [{"Time": "20260102_093000", "Lift ID": 0, "Event": "status", "From": "Closed", "To": "Open"}]
+    assert state == {0: (int(LiftStatus.OPEN), -1)}
+
+
+def test_wait_threshold_crossing_detected():
+    """Test that only band crossings emit wait events"""
+    previous = {0: (int(LiftStatus.OPEN), 0)}
+    
+    same_band, _ = detect_transitions(previous, [0], [LiftStatus.OPEN], [8], NOW)
+    crossed, _ = detect_transitions(previous, [0], [LiftStatus.OPEN], [12], NOW)
+    
+    assert same_band == []
+    assert [(e["Event"], e["From"], e["To"]) for e in crossed] == [("wait", "0", "10")]
+
+
+def test_new_lift_emits_initial_status():
+    """Test that a lift seen for the first time records its initial status"""
+    found, _ = detect_transitions({}, [3], [LiftStatus.HOLD], [np.nan], NOW)
+    
+    assert [(e["From"], e["To"]) for e in found] == [("", "On Hold")]
+
+
+def test_find_when_a_lift_opened():
+    """Test finding when a lift opened in an event log"""
+    found, _ = detect_transitions({0: (5, -1)}, [0], [LiftStatus.OPEN], [np.nan], NOW)
+    log = events_to_df(found)
+    
+    assert find_events(log, 0, to="Open")["Time"].tolist() == ["20260102_093000"]
+    assert find_events(log, 1).empty
@@ -0,0 +1,141 @@
+"""
+Unit tests for export.py
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+import numpy as np
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from analytics import SnapshotMatrix
+from export import SeriesCache, build_series, export_series, lttb_indices, minmax_indices
+from sinks import LocalSink, MemorySink
+from test_analytics import write_snapshot
+
+
+def reference_lttb(x, y, points):
+    """Textbook single-series LTTB, one point at a time"""
+    bucket_size = (len(x) - 2) / (points - 2)
+    chosen = [0]
+    a = 0
+    for i in range(points - 2):
+        lo = int(np.floor(i * bucket_size)) + 1
+        hi = int(np.floor((i + 1) * bucket_size)) + 1
+        next_lo, next_hi = hi, min(int(np.floor((i + 2) * bucket_size)) + 1, len(x))
+        if i == points - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        chosen.append(a)
+    chosen.append(len(x) - 1)
+    return chosen
+
+
+def test_lttb_matches_reference_for_every_lift():
+    """Test that the vectorized walk picks the same points as the one-series algorithm"""
+    rng = np.random.default_rng(0)
+    seconds = np.arange(1000, dtype=np.float64) * 60
+    wait = rng.integers(0, 40, size=(3, 1000)).astype(np.float64)
+
+    indices = lttb_indices(seconds, wait, 50)
+
+    assert indices.shape == (3, 50)
+    for row in range(3):
+        assert list(indices[row]) == reference_lttb(seconds, wait[row], 50)
+
+
+def test_lttb_skips_gaps():
+    """Test that missing waits are only chosen for buckets with no reported wait"""
+    seconds = np.arange(100, dtype=np.float64)
+    wait = np.full((1, 100), np.nan)
+    wait[0, ::7] = np.arange(15)
+
+    indices = lttb_indices(seconds, wait, 10)[0]
+
+    assert all(index % 7 == 0 for index in indices[1:-1])
+
+
+def test_minmax_keeps_every_extreme():
+    """Test that each bucket contributes its min and max in time order"""
+    wait = np.array([[5, 1, 9, 3, np.nan, np.nan, 4, 8]], dtype=np.float32)
+
+    indices = minmax_indices(wait, 4)
+
+    assert list(indices[0]) == [1, 2, 6, 7]
+    assert list(minmax_indices(wait, 100)[0]) == list(range(8))
+
+
+def test_build_series_returns_fixed_points_per_lift():
+    """Test the document shape for a range longer than the point budget"""
+    times = np.datetime64('2026-01-01T08:00:00', 's') + np.arange(600) * np.timedelta64(60, 's')
+    wait = np.tile(np.arange(600, dtype=np.float32) % 30, (2, 1))
+    wait[1, :300] = np.nan
+    matrix = SnapshotMatrix(times, np.array([0, 4], dtype=np.int32), ["KT-22", "Gold Coast"], wait,
+                            np.zeros((2, 600), dtype=np.int8))
+
+    document = build_series(matrix, points=100)
+
+    assert document["points"] == 100
+    assert [len(lift["times"]) for lift in document["lifts"]] == [100, 100]
+    assert document["lifts"][1]["waits"][0] is None
+    assert document["lifts"][0]["times"][0] == document["start"]
+    with pytest.raises(ValueError):
+        build_series(matrix, method="mean")
+
+
+def test_export_cache_invalidated_by_new_snapshots(tmp_path):
+    """Test that repeated loads hit the cache until a newer snapshot is stored"""
+    for minute in range(5):
+        write_snapshot(tmp_path, f"20260101_08{minute:02d}00", [(0, "Open", minute), (1, "Closed", None)])
+    sink = LocalSink(str(tmp_path))
+    cache = SeriesCache()
+    closed_end = datetime(2026, 1, 1, 8, 3, tzinfo=timezone.utc)
+
+    first = export_series(points=3, sink=sink, cache=cache)
+    assert export_series(points=3, sink=sink, cache=cache) is first
+    export_series(end=closed_end, points=3, sink=sink, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    write_snapshot(tmp_path, "20260101_080500", [(0, "Open", 25), (1, "Open", 5)])
+
+    refreshed = export_series(points=3, sink=sink, cache=cache)
+    assert refreshed is not first and refreshed["lifts"][0]["waits"][-1] == 25
+    # A range that ended long ago is served from cache without listing the sink
+    with patch.object(sink, 'list', side_effect=AssertionError("listed a closed range")):
+        export_series(end=closed_end, points=3, sink=sink, cache=cache)
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_export_cache_rechecks_recently_ended_ranges(tmp_path):
+    """Test that a range ending within SETTLE_TIME still picks up late snapshots (e.g. a batch flush)"""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    write_snapshot(tmp_path, (now - timedelta(minutes=5)).strftime('%Y%m%d_%H%M%S'), [(0, "Open", 5)])
+    sink = LocalSink(str(tmp_path))
+    cache = SeriesCache()
+
+    first = export_series(now - timedelta(hours=1), now, points=3, sink=sink, cache=cache)
+    write_snapshot(tmp_path, (now - timedelta(minutes=2)).strftime('%Y%m%d_%H%M%S'), [(0, "Open", 9)])
+
+    refreshed = export_series(now - timedelta(hours=1), now, points=3, sink=sink, cache=cache)
+    assert refreshed is not first and refreshed["lifts"][0]["waits"][-1] == 9
+
+
+def test_export_cache_handles_empty_open_ranges(tmp_path):
+    """Test that a cached empty result with no start rechecks the whole range instead of overflowing"""
+    sink = LocalSink(str(tmp_path))
+    cache = SeriesCache()
+
+    empty = export_series(sink=sink, cache=cache)
+    assert export_series(sink=sink, cache=cache) is empty
+    assert export_series(sink=MemorySink(), cache=cache)["lifts"] == []
+
+    write_snapshot(tmp_path, "20260101_080000", [(0, "Open", 5)])
+    assert export_series(sink=sink, cache=cache)["lifts"][0]["waits"][-1] == 5
+
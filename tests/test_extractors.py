@@ -0,0 +1,74 @@
+"""
+Unit tests for extractors.py
+"""
+import sys
+from pathlib import Path
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import extractors
+from extractors import ENTITIES, Entity, Field, extract_payload, register_entity, rows_to_df
+from lift_registry import LiftRegistry
+
+
+PAYLOAD = {
+    "lifts": [{"id": 9, "name": "KT-22", "status": "No Offload at KT-22", "waitTime": "12"}],
+    "trails": [{"name": "Mainline", "status": "Open", "difficulty": "black", "groomed": True}],
+    "pois": [{"id": 3, "name": "High Camp", "type": "lodge", "status": "Closed"}],
+}
+
+
+def test_extract_all_entities_in_one_call(capsys):
+    """Test that lifts, trails and POIs are all extracted from one payload"""
+    rows = {}
+    registry = LiftRegistry()
+    
+    extract_payload(PAYLOAD, 152, rows, {"lifts": registry})
+    
+    assert rows["lifts"] == [{
+        "Map ID": 152, "Lift ID": 0, "Lift": "KT-22",
+        "Status": "Limited", "Status Detail": "No Offload at KT-22", "Wait Time": 12,
+    }]
+    assert rows["trails"][0] == {
+        "Map ID": 152, "Key": "Mainline", "Trail": "Mainline",
+        "Status": "Open", "Status Detail": None, "Difficulty": "black", "Groomed": True,
+    }
+    assert rows["pois"][0]["Key"] == "3"
+    assert "Lift: KT-22, Status: No Offload at KT-22, Wait Time: 12 minutes" in capsys.readouterr().out
+
+
+def test_missing_collections_and_fields_use_defaults():
+    """Test that absent collections produce no rows and absent fields use defaults"""
+    rows = {}
+    
+    extract_payload({"lifts": [{}]}, 152, rows, {"lifts": LiftRegistry()})
+    
+    assert rows["trails"] == []
+    assert rows["lifts"][0]["Lift"] == "Unknown"
+    assert rows["lifts"][0]["Wait Time"] is None
+
+
+def test_rows_to_df_types_columns():
+    """Test that entity frames use the compact typed schema"""
+    rows = {}
+    extract_payload(PAYLOAD, 152, rows, {"lifts": LiftRegistry()})
+    
+    lifts_df = rows_to_df(ENTITIES["lifts"], rows["lifts"])
+    trails_df = rows_to_df(ENTITIES["trails"], rows["trails"])
+    
+    assert str(lifts_df["Wait Time"].dtype) == "Int16"
+    assert isinstance(trails_df["Status"].dtype, pd.CategoricalDtype)
+    assert list(trails_df.columns) == ENTITIES["trails"].columns
+
+
+def test_register_entity_adds_output(monkeypatch):
+    """Test that a newly registered entity is extracted without other changes"""
+    monkeypatch.setattr(extractors, "ENTITIES", dict(ENTITIES))
+    register_entity(Entity("parking", "parking", [Field("Lot", "name"), Field("Spaces", "spaces", 0)]))
+    rows = {}
+    
+    extract_payload({"parking": [{"name": "Lot A", "spaces": 40}]}, 152, rows, {"lifts": LiftRegistry()})
+    
+    assert rows["parking"] == [{"Map ID": 152, "Key": "Lot A", "Lot": "Lot A", "Spaces": 40}]
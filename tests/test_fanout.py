@@ -0,0 +1,81 @@
+"""
+Unit tests for fanout.py
+"""
+import json
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fanout import batch_events, batch_namespaces, invoke_batches, plan_batches, shared_prefix, update_map_costs
+from sinks import MemorySink
+
+
+def test_update_map_costs_smooths_samples():
+    """Test that new samples are blended into existing costs"""
+    costs = update_map_costs({}, {152: 2.0})
+    costs = update_map_costs(costs, {152: 4.0, 1446: 1.0})
+    
+    assert costs == {"152": 2.0 * 0.7 + 4.0 * 0.3, "1446": 1.0}
+
+
+def test_plan_batches_respects_budget():
+    """Test that each batch's predicted cost fits the budget"""
+    costs = {str(i): float(i) for i in range(1, 11)}
+    
+    batches = plan_batches(list(range(1, 11)), costs, budget_seconds=12, overhead_seconds=1)
+    
+    assert sorted(m for batch in batches for m in batch) == list(range(1, 11))
+    for batch in batches:
+        assert 1 + sum(costs[str(m)] for m in batch) <= 12
+    assert len(batches) == 5
+
+
+def test_plan_batches_caps_size_and_isolates_expensive_maps():
+    """Test max batch size and maps that exceed the budget alone"""
+    batches = plan_batches([1, 2, 3, 4, 5], {"1": 100.0}, budget_seconds=60, max_batch_size=2)
+    
+    assert [1] in batches
+    assert all(len(batch) <= 2 for batch in batches)
+    assert len(batches) == 3
+
+
+@patch('fanout.boto3')
+def test_invoke_batches_sends_async_events(mock_boto3):
+    """Test that each batch becomes one asynchronous invocation"""
+    lambda_client = Mock()
+    mock_boto3.client.return_value = lambda_client
+    
+    invoke_batches('scraper', batch_events([[152], [1446, 7]], {"combined": True}))
+    
+    assert lambda_client.invoke.call_count == 2
+    second = lambda_client.invoke.call_args_list[1][1]
+    assert second['InvocationType'] == 'Event'
+    assert json.loads(second['Payload']) == {"map_ids": [1446, 7], "output": {"combined": True, "prefix": "maps-7-1446/"}}
+
+
+def test_batch_events_give_each_batch_its_own_namespace():
+    """Test that concurrent batches never share an output prefix, but share the base's registry"""
+    events = batch_events([[152], [1446, 7]], {"prefix": "west/"})
+    
+    assert [event["output"]["prefix"] for event in events] == ["west/maps-152/", "west/maps-7-1446/"]
+    assert shared_prefix("west/maps-7-1446/") == "west/"
+    assert shared_prefix("maps-152/") == ""
+    assert shared_prefix("west/") == "west/"
+    assert shared_prefix("roadmaps-1/") == "roadmaps-1/"
+
+
+def test_batch_namespaces_peeks_one_key_per_namespace():
+    """Test that namespaces are found without listing every object in them"""
+    sink = MemorySink()
+    for key in ['west/maps-152-1446/status_1.csv', 'west/maps-152-1446/status_2.csv', 'west/maps-152-14460/index/a.csv',
+                'west/maps-7/latest.json', 'west/maps-notes/a.txt', 'west/maps-readme.txt', 'east/maps-9/a.csv']:
+        sink.write(key, 'x')
+    sink.list = Mock(wraps=sink.list)
+    
+    assert batch_namespaces(sink, 'west/') == ['west/maps-152-1446/', 'west/maps-152-14460/', 'west/maps-7/']
+    assert sink.list.call_count == 6
+    assert batch_namespaces(sink, 'west/maps-7/') == []
+
@@ -0,0 +1,101 @@
+"""
+Unit tests for importer.py
+"""
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from aggregate import aggregate_files
+from importer import MANIFEST_KEY, archive_key, import_archive
+from sinks import MemorySink, read_df, read_text, write_df
+
+
+def legacy_pair(sink, timestamp, rows):
+    """Write a pair in the original Lift/Status and Lift/Wait Time layout"""
+    write_df(sink, pd.DataFrame([{"Lift": lift, "Status": status} for lift, status, _ in rows]),
+             f"status_{timestamp}.csv")
+    write_df(sink, pd.DataFrame([{"Lift": lift, "Wait Time": wait} for lift, _, wait in rows]),
+             f"wait_time_{timestamp}.csv")
+
+
+@pytest.fixture
+def source():
+    sink = MemorySink()
+    legacy_pair(sink, "20260101_080000", [("KT-22", "Open", 5), ("Gold Coast", "No Offload at KT-22", "N/A")])
+    legacy_pair(sink, "20260101_080100", [("KT-22", "Closed", "N/A"), ("Gold Coast", "Open", 10)])
+    legacy_pair(sink, "20260102_080000", [("KT-22", "Open", 15)])
+    return sink
+
+
+def test_import_partitions_by_day_with_typed_columns(source):
+    """Test that pairs are joined, typed and written as one partition per day"""
+    target = MemorySink()
+
+    stats = import_archive(source, target, max_workers=2)
+
+    assert stats["days"] == 2 and stats["rows"] == 5
+    day = read_df(target, archive_key("20260101"))
+    assert list(day.columns) == ["Time", "Map ID", "Lift ID", "Lift", "Status", "Status Detail", "Wait Time"]
+    assert list(day["Time"].astype(str)) == ["20260101_080000"] * 2 + ["20260101_080100"] * 2
+    gold_coast = day[day["Lift"] == "Gold Coast"].iloc[0]
+    assert (gold_coast["Status"], gold_coast["Status Detail"]) == ("Limited", "No Offload at KT-22")
+    assert pd.isna(gold_coast["Wait Time"])
+    # Lift IDs are stable across days and the registry is saved with the archive
+    assert list(read_df(target, "lifts.csv")["Lift"]) == ["KT-22", "Gold Coast"]
+    assert set(read_df(target, archive_key("20260102"))["Lift ID"]) == {0}
+
+    # Partitions are long-format, so the chunked aggregator reads them directly
+    summary = aggregate_files([archive_key("20260101"), archive_key("20260102")], sink=target)
+    assert list(summary.samples[:2]) == [3, 2]
+
+
+def test_import_resumes_after_interruption(source):
+    """Test that a rerun skips finished days and redoes only the interrupted one"""
+    target = MemorySink()
+    original_write = target.write
+
+    def fail_on_second_day(key, body, content_type='text/csv'):
+        if key == archive_key("20260102"):
+            raise IOError("disk full")
+        original_write(key, body, content_type)
+
+    with patch.object(target, 'write', side_effect=fail_on_second_day):
+        with pytest.raises(IOError):
+            import_archive(source, target, max_workers=1)
+    assert set(json.loads(read_text(target, MANIFEST_KEY))) == {"20260101"}
+
+    stats = import_archive(source, target, max_workers=1)
+    assert (stats["days"], stats["skipped"]) == (1, 1)
+
+    # New snapshots for an imported day cause that day to be rebuilt
+    legacy_pair(source, "20260102_080100", [("KT-22", "Open", 20)])
+    assert import_archive(source, target)["days"] == 1
+    assert len(read_df(target, archive_key("20260102"))) == 2
+
+
+def test_import_history_splits_dated_and_undated_rows():
+    """Test that parse_json.py history is re-keyed by name and undated rows are kept aside"""
+    source = MemorySink()
+    write_df(source, pd.DataFrame([
+        {"Lift": "KT-22", "Status": "Open"},
+        {"Time": "20260103_090000", "Map ID": 152, "Lift ID": 7, "Lift": "KT-22", "Status": "Closed",
+         "Status Detail": None},
+    ]), "status.csv")
+    write_df(source, pd.DataFrame([
+        {"Lift": "KT-22", "Wait Time": "5"},
+        {"Time": "20260103_090000", "Map ID": 152, "Lift ID": 7, "Lift": "KT-22", "Wait Time": 12},
+    ]), "wait_time.csv")
+    target = MemorySink()
+
+    stats = import_archive(source, target, history=("status.csv", "wait_time.csv"))
+
+    assert stats["rows"] == 1
+    row = read_df(target, archive_key("20260103")).iloc[0]
+    assert (row["Lift ID"], row["Status"], row["Wait Time"]) == (0, "Closed", 12)
+    assert list(read_df(target, "archive/undated/status.csv")["Status"]) == ["Open"]
@@ -0,0 +1,121 @@
+"""
+Unit tests for latest.py
+"""
+import gzip
+import http.client
+import json
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock, patch
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from latest import LatestCache, build_latest, make_handler, poll_latest, refresh_latest
+from sinks import MemorySink
+
+
+NOW = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+
+
+def sample_document():
+    """Latest document for two lifts at two resorts"""
+    status_df = pd.DataFrame([
+        {"Map ID": 152, "Lift ID": 0, "Lift": "KT-22", "Status": "Limited", "Status Detail": "No Offload"},
+        {"Map ID": 1446, "Lift ID": 1, "Lift": "Gondola", "Status": "Closed", "Status Detail": None},
+    ])
+    wait_time_df = pd.DataFrame([
+        {"Map ID": 152, "Lift ID": 0, "Lift": "KT-22", "Wait Time": 12},
+        {"Map ID": 1446, "Lift ID": 1, "Lift": "Gondola", "Wait Time": None},
+    ])
+    return build_latest(status_df, wait_time_df, NOW)
+
+
+def test_build_latest_groups_by_resort():
+    """Test that the document is keyed by map ID with typed lift entries"""
+    document = sample_document()
+    
+    assert document["updated"] == NOW.isoformat()
+    assert document["resorts"]["152"]["lifts"] == [
+        {"id": 0, "name": "KT-22", "status": "Limited", "detail": "No Offload", "wait": 12}
+    ]
+    assert document["resorts"]["1446"]["lifts"][0]["wait"] is None
+
+
+def test_cache_etag_and_not_modified():
+    """Test ETag revalidation and gzip negotiation"""
+    cache = LatestCache()
+    assert cache.update(sample_document())
+    assert not cache.update(sample_document())
+    
+    status, headers, body = cache.response("/latest/152", accept_encoding="gzip, deflate")
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body))["lifts"][0]["name"] == "KT-22"
+    
+    status, _, body = cache.response("/latest/152", if_none_match=headers["ETag"])
+    assert status == 304
+    assert body == b''
+    
+    assert cache.response("/latest/999")[0] == 404
+
+
+def test_http_server_serves_from_cache():
+    """Test the HTTP handler end to end over a keep-alive connection"""
+    cache = LatestCache()
+    cache.update(sample_document())
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(cache))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        connection.request('GET', '/latest')
+        response = connection.getresponse()
+        body = json.loads(response.read())
+        etag = response.getheader('ETag')
+        
+        connection.request('GET', '/latest', headers={'If-None-Match': etag})
+        revalidated = connection.getresponse()
+        revalidated.read()
+        
+        assert response.status == 200
+        assert set(body["resorts"]) == {"152", "1446"}
+        assert revalidated.status == 304
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_poll_reads_compressed_latest_through_the_sink():
+    """Test polling a namespace's gzipped latest.json and skipping it while unchanged"""
+    sink = MemorySink(compress=True)
+    sink.write('west/latest.json', json.dumps(sample_document()), 'application/json')
+    cache = LatestCache()
+    
+    version = poll_latest(cache, sink, 'west/latest.json')
+    
+    assert cache.response("/latest/152")[0] == 200
+    assert poll_latest(cache, sink, 'west/latest.json', version) == version
+    assert poll_latest(LatestCache(), sink, 'missing/latest.json') is None
+
+
+def test_refresh_survives_any_error():
+    """Test that connection and decode errors are logged and the next poll still runs"""
+    sink = MemorySink()
+    sink.write('latest.json', json.dumps(sample_document()), 'application/json')
+    flaky = Mock(wraps=sink)
+    flaky.read_if_changed.side_effect = [OSError("Could not connect"), (b'{not json', 'v0'), sink.read_if_changed('latest.json', None)]
+    cache = LatestCache()
+    
+    with patch('latest.time.sleep', side_effect=[None, None, KeyboardInterrupt]):
+        with pytest.raises(KeyboardInterrupt):
+            refresh_latest(cache, flaky, 15)
+    
+    assert flaky.read_if_changed.call_count == 3
+    assert cache.response("/latest")[0] == 200
+
@@ -0,0 +1,186 @@
+"""
+Unit tests for lease.py against an in-process S3 stand-in
+"""
+import hashlib
+import io
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from botocore.exceptions import ClientError
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from lease import FileLease, S3Lease, lease_name, time_bucket
+
+
+class FakeS3:
+    """Minimal S3 stand-in supporting If-None-Match/If-Match conditional puts"""
+    
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+    
+    def _error(self, code):
+        return ClientError({'Error': {'Code': code}}, 'Operation')
+    
+    def put_object(self, Bucket, Key, Body, IfNoneMatch=None, IfMatch=None, **kwargs):
+        with self.lock:
+            current = self.objects.get((Bucket, Key))
+            if IfNoneMatch == '*' and current is not None:
+                raise self._error('PreconditionFailed')
+            if IfMatch is not None and (current is None or current[1] != IfMatch):
+                raise self._error('PreconditionFailed')
+            body = Body.encode('utf-8') if isinstance(Body, str) else Body
+            etag = '"' + hashlib.md5(body + str(time.perf_counter_ns()).encode()).hexdigest() + '"'
+            self.objects[(Bucket, Key)] = (body, etag)
+            return {'ETag': etag}
+    
+    def get_object(self, Bucket, Key):
+        with self.lock:
+            if (Bucket, Key) not in self.objects:
+                raise self._error('NoSuchKey')
+            body, etag = self.objects[(Bucket, Key)]
+            return {'Body': io.BytesIO(body), 'ETag': etag}
+
+
+class FakeClock:
+    """Manually advanced clock"""
+    
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+def make_lease(s3, bucket, clock, owner):
+    return S3Lease(s3, 'test-bucket', 'maps-152', bucket, ttl_seconds=300, owner=owner, clock=clock)
+
+
+def test_lease_name_and_time_bucket():
+    """Test lease naming and schedule slot labels"""
+    assert lease_name([1446, 152]) == "maps-152-1446"
+    assert time_bucket(datetime(2026, 1, 2, 9, 30, 59, tzinfo=timezone.utc)) == "20260102_0930"
+
+
+def test_overlapping_run_skips_until_release():
+    """Test that a second run skips while the first holds the lease"""
+    s3, clock = FakeS3(), FakeClock()
+    first = make_lease(s3, "20260102_0930", clock, "first")
+    second = make_lease(s3, "20260102_0931", clock, "second")
+    
+    assert first.acquire()
+    assert not second.acquire()
+    
+    first.release()
+    assert second.acquire()
+
+
+def test_completed_slot_is_not_repeated():
+    """Test that a duplicate invocation for a finished slot skips"""
+    s3, clock = FakeS3(), FakeClock()
+    first = make_lease(s3, "20260102_0930", clock, "first")
+    assert first.acquire()
+    first.release()
+    
+    duplicate = make_lease(s3, "20260102_0930", clock, "duplicate")
+    
+    assert not duplicate.acquire()
+
+
+def test_failed_run_leaves_slot_open_for_retry():
+    """Test that releasing without completion lets a retry for the same slot run at once"""
+    s3, clock = FakeS3(), FakeClock()
+    failed = make_lease(s3, "20260102_0930", clock, "failed")
+    assert failed.acquire()
+    failed.release(completed=False)
+    
+    retry = make_lease(s3, "20260102_0930", clock, "retry")
+    
+    assert retry.acquire()
+
+
+def test_expired_lease_is_taken_over_and_old_release_is_ignored():
+    """Test takeover after the TTL and that the slow run's release does not clobber it"""
+    s3, clock = FakeS3(), FakeClock()
+    slow = make_lease(s3, "20260102_0930", clock, "slow")
+    assert slow.acquire()
+    
+    clock.now += 301
+    late = make_lease(s3, "20260102_0935", clock, "late")
+    assert late.acquire()
+    
+    slow.release()
+    blocked = make_lease(s3, "20260102_0936", clock, "blocked")
+    assert not blocked.acquire()
+
+
+def test_concurrent_slow_runs_only_one_works():
+    """Test that many overlapping invocations produce exactly one worker"""
+    s3, clock = FakeS3(), FakeClock()
+    worked = []
+    barrier = threading.Barrier(8)
+    
+    def invocation(index):
+        run_lease = make_lease(s3, "20260102_0930", clock, f"run-{index}")
+        barrier.wait()
+        if run_lease.acquire():
+            time.sleep(0.05)  # simulated slow fetch and upload
+            worked.append(index)
+            run_lease.release()
+    
+    threads = [threading.Thread(target=invocation, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(worked) == 1
+
+
+def test_file_lease(tmp_path):
+    """Test the daemon-mode lock file: exclusion, release and stale takeover"""
+    clock = FakeClock()
+    path = str(tmp_path / "locks" / "scraper.lock")
+    first = FileLease(path, ttl_seconds=300, owner="first", clock=clock)
+    second = FileLease(path, ttl_seconds=300, owner="second", clock=clock)
+    
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    
+    clock.now += 301
+    third = FileLease(path, ttl_seconds=300, owner="third", clock=clock)
+    assert third.acquire()
+    second.release()
+    assert Path(path).exists()
+
+
+def test_concurrent_file_lease_takeover_has_one_winner(tmp_path):
+    """Test that runners racing to take over an expired lock file produce exactly one holder"""
+    clock = FakeClock()
+    path = str(tmp_path / "scraper.lock")
+    assert FileLease(path, ttl_seconds=300, owner="crashed", clock=clock).acquire()
+    clock.now += 301
+    
+    winners = []
+    barrier = threading.Barrier(8)
+    
+    def runner(index):
+        file_lease = FileLease(path, ttl_seconds=300, owner=f"run-{index}", clock=clock)
+        barrier.wait()
+        if file_lease.acquire():
+            winners.append(file_lease.owner)
+    
+    threads = [threading.Thread(target=runner, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(winners) == 1
+    assert FileLease(path, owner="reader")._read()['owner'] == winners[0]
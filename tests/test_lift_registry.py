@@ -0,0 +1,65 @@
+"""
+Unit tests for lift_registry.py
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from lift_registry import LiftRegistry, lift_key
+
+
+def test_same_name_on_different_maps_gets_different_ids():
+    """Test that lifts sharing a name across resorts do not collide"""
+    registry = LiftRegistry()
+    
+    first = registry.lift_id(152, {"name": "Gondola"})
+    second = registry.lift_id(1446, {"name": "Gondola"})
+    
+    assert first != second
+    assert registry.map_id(first) == 152
+    assert registry.map_id(second) == 1446
+
+
+def test_ids_are_stable_and_compact():
+    """Test that repeated lookups return the same compact ID"""
+    registry = LiftRegistry()
+    
+    ids = [registry.lift_id(152, {"name": name}) for name in ["A", "B", "A", "C", "B"]]
+    
+    assert ids == [0, 1, 0, 2, 1]
+    assert len(registry) == 3
+
+
+def test_rename_keeps_id_when_api_id_present():
+    """Test that a renamed lift keeps its ID and updates the name table"""
+    registry = LiftRegistry()
+    
+    original = registry.lift_id(152, {"id": 77, "name": "Base to Base Gondola"})
+    registry.dirty = False
+    renamed = registry.lift_id(152, {"id": 77, "name": "Base to Base Gondola to Palisades"})
+    
+    assert original == renamed
+    assert registry.name(renamed) == "Base to Base Gondola to Palisades"
+    assert registry.dirty
+
+
+def test_lift_key_falls_back_to_name():
+    """Test that lifts without an API id are keyed by name"""
+    assert lift_key({"id": 12, "name": "KT-22"}) == "12"
+    assert lift_key({"name": "KT-22"}) == "KT-22"
+
+
+def test_round_trip_through_dataframe():
+    """Test that a registry survives to_df/from_df unchanged"""
+    registry = LiftRegistry()
+    registry.lift_id(152, {"name": "A"})
+    registry.lift_id(1446, {"id": 5, "name": "B"})
+    
+    restored = LiftRegistry.from_df(registry.to_df())
+    
+    assert not restored.dirty
+    assert restored.lift_id(1446, {"id": 5, "name": "B"}) == 1
+    assert restored.lift_id(152, {"name": "A"}) == 0
+    assert not restored.dirty
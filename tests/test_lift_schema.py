@@ -0,0 +1,58 @@
+"""
+Unit tests for lift_schema.py
+"""
+import sys
+from pathlib import Path
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from lift_schema import (
+    LiftStatus, normalize_status, normalize_wait_time, status_codes, type_status_df, type_wait_time_df
+)
+
+
+def test_normalize_status_known_labels():
+    """Test that exact labels map to their status without detail text"""
+    assert normalize_status("Open") == (LiftStatus.OPEN, None)
+    assert normalize_status("closed") == (LiftStatus.CLOSED, None)
+    assert normalize_status("On Hold") == (LiftStatus.HOLD, None)
+    assert normalize_status(None) == (LiftStatus.UNKNOWN, None)
+
+
+def test_normalize_status_keeps_free_text_detail():
+    """Test that free-text statuses are categorized and the raw text kept"""
+    assert normalize_status("No Offload at KT-22") == (LiftStatus.LIMITED, "No Offload at KT-22")
+    assert normalize_status("Wind Hold") == (LiftStatus.HOLD, "Wind Hold")
+    assert normalize_status("Something new") == (LiftStatus.UNKNOWN, "Something new")
+
+
+def test_normalize_status_matches_whole_words():
+    """Test that openings announced in free text are not counted as open"""
+    assert normalize_status("Not opening today")[0] == LiftStatus.CLOSED
+    assert normalize_status("Opening at 10am")[0] == LiftStatus.SCHEDULED
+    assert normalize_status("Reopening soon")[0] == LiftStatus.SCHEDULED
+    assert normalize_status("Open - Chairs Only")[0] == LiftStatus.OPEN
+    assert normalize_status("Open, No Offload")[0] == LiftStatus.LIMITED
+
+
+def test_normalize_wait_time():
+    """Test that wait times become ints or None"""
+    assert normalize_wait_time(5) == 5
+    assert normalize_wait_time("12") == 12
+    assert normalize_wait_time(7.0) == 7
+    assert normalize_wait_time("N/A") is None
+    assert normalize_wait_time(None) is None
+    assert normalize_wait_time(float("nan")) is None
+
+
+def test_type_legacy_frames():
+    """Test that legacy free-text CSV frames normalize to the compact schema"""
+    status_df = type_status_df(pd.DataFrame({"Lift": ["A", "B"], "Status": ["Open", "No Offload at KT-22"]}))
+    wait_time_df = type_wait_time_df(pd.DataFrame({"Lift": ["A", "B"], "Wait Time": ["5", "N/A"]}))
+    
+    assert list(status_codes(status_df["Status"])) == [LiftStatus.OPEN, LiftStatus.LIMITED]
+    assert status_df.iloc[1]["Status Detail"] == "No Offload at KT-22"
+    assert str(wait_time_df["Wait Time"].dtype) == "Int16"
+    assert wait_time_df["Wait Time"].isna().tolist() == [False, True]
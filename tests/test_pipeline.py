@@ -0,0 +1,71 @@
+"""
+Unit tests for pipeline.py
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_every_stage():
+    """Test that each item passes every stage, with lists fanning out and None dropping"""
+    pipeline = Pipeline([
+        Stage("double", lambda item: [item, item], workers=3, queue_size=2),
+        Stage("odd", lambda item: item if item % 2 else None, workers=2, queue_size=2),
+    ])
+
+    results = pipeline.run(range(10))
+
+    assert sorted(results) == sorted([1, 1, 3, 3, 5, 5, 7, 7, 9, 9])
+    report = {stage["stage"]: stage for stage in pipeline.report()}
+    assert report["double"]["items"] == 10 and report["odd"]["items"] == 20
+
+
+def test_slow_sink_applies_backpressure():
+    """Test that a slow last stage fills its queue and blocks the stage feeding it"""
+    in_flight = []
+    lock = threading.Lock()
+
+    def slow_write(item):
+        with lock:
+            in_flight.append(item)
+        time.sleep(0.01)
+        return item
+
+    pipeline = Pipeline([
+        Stage("fetch", lambda item: item, workers=4, queue_size=2),
+        Stage("write", slow_write, workers=1, queue_size=3),
+    ])
+
+    pipeline.run(range(30))
+
+    fetch, write = pipeline.report()
+    # Items never piled up beyond the queue bound; fetch waited on the sink instead
+    assert write["max_queue_depth"] <= 3
+    assert fetch["blocked_seconds"] > 0.1
+    assert write["utilization"] > fetch["utilization"]
+    assert pipeline.bottleneck() == "write"
+
+
+def test_stage_error_is_raised_after_drain():
+    """Test that a failing item does not stop the others and the error is re-raised"""
+    seen = []
+
+    def fail_on_three(item):
+        if item == 3:
+            raise ValueError("bad payload")
+        seen.append(item)
+        return item
+
+    pipeline = Pipeline([Stage("extract", fail_on_three, workers=2)])
+
+    with pytest.raises(ValueError):
+        pipeline.run(range(6))
+    assert sorted(seen) == [0, 1, 2, 4, 5]
+    assert pipeline.report()[0]["errors"] == 1
@@ -0,0 +1,147 @@
+"""
+Unit tests for recent.py
+"""
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import recent
+from latest import LATEST_KEY, build_latest, merge_latest
+from lift_schema import type_status_df, type_wait_time_df
+from sinks import MemorySink, write_df
+from recent import SnapshotRing, recent_snapshots
+
+
+START = datetime(2026, 1, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def frames(rows):
+    """Typed status/wait frames from (map_id, lift_id, status, wait) rows"""
+    status_df = pd.DataFrame([{"Map ID": m, "Lift ID": i, "Lift": f"Lift {i}", "Status": s} for m, i, s, _ in rows])
+    wait_time_df = pd.DataFrame([{"Map ID": m, "Lift ID": i, "Lift": f"Lift {i}", "Wait Time": w} for m, i, _, w in rows])
+    return type_status_df(status_df), type_wait_time_df(wait_time_df)
+
+
+@pytest.fixture(autouse=True)
+def cold_container():
+    """Start every test as a cold start with zeroed metrics"""
+    recent._recent.clear()
+    recent._stats.update(hits=0, misses=0, objects_read=0)
+    yield
+    recent._recent.clear()
+
+
+def test_ring_keeps_newest_snapshots_in_order():
+    """Test that the ring overwrites the oldest row and returns oldest first"""
+    ring = SnapshotRing(capacity=3)
+    for minute in range(5):
+        ring.append(START + timedelta(minutes=minute), [0], [1], [float(minute)])
+
+    times, lift_ids, wait, status = ring.window()
+
+    assert len(ring) == 3
+    assert list(wait[:, 0]) == [2, 3, 4]
+    assert times[-1] == np.datetime64('2026-01-02T09:04:00')
+    # Repeats of the newest snapshot are ignored
+    assert not ring.append(START + timedelta(minutes=4), [0], [1], [9.0])
+
+
+def test_ring_deltas_and_smoothing_handle_new_lifts_and_gaps():
+    """Test wait deltas and smoothed waits when lifts appear or stop reporting"""
+    ring = SnapshotRing(capacity=4)
+    ring.append(START, [0], [1], [10.0])
+    ring.append(START + timedelta(minutes=1), [0, 1], [1, 1], [14.0, np.nan])
+
+    _, lift_ids, _, status = ring.window()
+
+    assert list(lift_ids) == [0, 1]
+    assert list(status[0]) == [1, -1]
+    deltas = ring.wait_deltas()
+    assert deltas[0] == 4 and np.isnan(deltas[1])
+    assert ring.smoothed_wait()[0] == 12
+
+
+def store(sink, timestamp, rows):
+    """Write one snapshot pair the way the scraper names it"""
+    stamp = timestamp.strftime('%Y%m%d_%H%M%S')
+    status_df, wait_time_df = frames(rows)
+    write_df(sink, status_df, f'status_{stamp}.csv')
+    write_df(sink, wait_time_df, f'wait_time_{stamp}.csv')
+
+
+def test_ring_remembers_lifts_that_left_the_window():
+    """Test that last_known keeps a lift's values after it stops reporting"""
+    ring = SnapshotRing(capacity=2)
+    ring.append(START, [0, 1], [1, 2], [10.0, 5.0])
+    for minute in range(1, 4):
+        ring.append(START + timedelta(minutes=minute), [0], [1], [float(minute)])
+
+    lift_ids, status, wait = ring.last_known()
+
+    assert list(lift_ids) == [0, 1]
+    assert list(status) == [1, 2]
+    assert list(wait) == [3, 5]
+
+
+def test_cold_start_seeds_from_storage_then_stays_warm():
+    """Test that the first lookup after a cold start reads the newest stored runs and later ones hit memory"""
+    sink = MemorySink()
+    for minute in range(3):
+        store(sink, START + timedelta(minutes=minute), [(152, 0, "Open", minute), (1446, 1, "Closed", None)])
+    now = START + timedelta(minutes=3)
+
+    snapshots = recent_snapshots(sink, '', now)
+
+    assert len(snapshots.ring(152)) == 3
+    assert snapshots.ring(152).wait_deltas()[0] == 1
+    assert recent_snapshots(sink, '', now) is snapshots
+    assert recent_snapshots(sink, 'west/', now) is not snapshots
+    assert recent.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "objects_read": 6}
+
+
+def test_seeding_is_bounded_by_capacity():
+    """Test that a cold start reads at most `capacity` runs, however many are stored"""
+    sink = MemorySink()
+    for minute in range(recent.RECENT_CAPACITY + 5):
+        store(sink, START + timedelta(minutes=minute), [(152, 0, "Open", minute)])
+
+    snapshots = recent_snapshots(sink, '', START + timedelta(minutes=recent.RECENT_CAPACITY + 5))
+
+    assert len(snapshots.ring(152)) == recent.RECENT_CAPACITY
+    assert recent.stats()["objects_read"] == 2 * recent.RECENT_CAPACITY
+    _, _, wait, _ = snapshots.ring(152).window()
+    assert wait[-1, 0] == recent.RECENT_CAPACITY + 4
+
+
+def test_seeding_falls_back_to_the_base_latest_state():
+    """Test that resorts without recent runs in the namespace start from the base's latest.json"""
+    sink = MemorySink()
+    store(sink, START, [(152, 0, "Open", 5)])
+    status_df, wait_time_df = frames([(152, 0, "Open", 5), (1446, 1, "Closed", None)])
+    sink.write(LATEST_KEY, json.dumps(merge_latest(None, build_latest(status_df, wait_time_df, START))))
+
+    snapshots = recent_snapshots(sink, 'maps-152/', START + timedelta(hours=12))
+
+    lift_ids, status, wait = snapshots.last_known()
+    assert list(lift_ids) == [0, 1]
+    assert wait[0] == 5 and np.isnan(wait[1])
+    assert snapshots.ring(1446).last_time == int(START.timestamp())
+    assert recent.stats()["objects_read"] == 1
+
+
+def test_stale_warm_state_is_reseeded():
+    """Test that rings idle for longer than the seed window are rebuilt from storage"""
+    sink = MemorySink()
+    snapshots = recent_snapshots(sink, '', START)
+    snapshots.add(START, *frames([(152, 0, "Open", 5)]))
+
+    assert recent_snapshots(sink, '', START + recent.SEED_WINDOW) is snapshots
+    assert recent_snapshots(sink, '', START + 2 * recent.SEED_WINDOW) is not snapshots
+    assert recent.stats()["misses"] == 2
@@ -0,0 +1,75 @@
+"""
+Unit tests for rollups.py
+"""
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rollups import add_means, apply_snapshot, empty_rollup, last_status, snapshot_arrays, typed_rollup
+from lift_schema import LiftStatus
+
+
+def fold(rollup_df, period, snapshot):
+    """Apply a list of (lift_id, status, wait) rows as one snapshot"""
+    status_df = pd.DataFrame([{"Lift ID": lift_id, "Status": status} for lift_id, status, _ in snapshot])
+    wait_time_df = pd.DataFrame([{"Lift ID": lift_id, "Wait Time": wait} for lift_id, _, wait in snapshot])
+    lift_ids, codes, waits = snapshot_arrays(status_df, wait_time_df)
+    return apply_snapshot(rollup_df, period, lift_ids, codes, waits, last_status(rollup_df))
+
+
+def test_rollup_accumulates_wait_statistics():
+    """Test min/mean/max wait and minutes open across snapshots"""
+    rollup = empty_rollup()
+    rollup = fold(rollup, "20260101_08", [(0, "Open", 4), (1, "Closed", None)])
+    rollup = fold(rollup, "20260101_08", [(0, "Open", 10), (1, "Closed", None)])
+    
+    rows = add_means(rollup).set_index("Lift ID")
+    
+    assert rows.loc[0, "Samples"] == 2
+    assert rows.loc[0, "Wait Min"] == 4
+    assert rows.loc[0, "Wait Max"] == 10
+    assert rows.loc[0, "Wait Mean"] == 7
+    assert rows.loc[0, "Minutes Open"] == 2
+    assert rows.loc[1, "Minutes Open"] == 0
+    assert pd.isna(rows.loc[1, "Wait Min"])
+    assert np.isnan(rows.loc[1, "Wait Mean"])
+
+
+def test_rollup_counts_transitions_across_periods():
+    """Test that status changes are counted, including across a period boundary"""
+    rollup = empty_rollup()
+    rollup = fold(rollup, "20260101_08", [(0, "Closed", None)])
+    rollup = fold(rollup, "20260101_08", [(0, "Open", 0)])
+    rollup = fold(rollup, "20260101_09", [(0, "On Hold", None)])
+    
+    rows = rollup.set_index("Period")
+    
+    assert rows.loc["20260101_08", "Transitions"] == 1
+    assert rows.loc["20260101_09", "Transitions"] == 1
+    assert rows.loc["20260101_09", "Last Status"] == LiftStatus.HOLD
+
+
+def test_rollup_only_touches_current_period():
+    """Test that earlier periods are left unchanged"""
+    rollup = fold(empty_rollup(), "20260101_08", [(0, "Open", 3)])
+    before = rollup.copy()
+    
+    rollup = fold(rollup, "20260101_09", [(0, "Open", 8)])
+    
+    earlier = rollup[rollup["Period"] == "20260101_08"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(earlier, before)
+    assert len(rollup) == 2
+
+
+def test_rollup_survives_csv_round_trip(tmp_path):
+    """Test that a rollup written to CSV reads back with the same schema"""
+    rollup = fold(empty_rollup(), "20260101", [(0, "Open", 3), (1, "Closed", None)])
+    rollup.to_csv(tmp_path / "daily.csv", index=False)
+    
+    restored = typed_rollup(pd.read_csv(tmp_path / "daily.csv"))
+    
+    pd.testing.assert_frame_equal(restored, rollup)
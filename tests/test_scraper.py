@@ -1,35 +1,72 @@
 """
 Unit tests for scraper.py Lambda function
 """
+import json
 import sys
 import os
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import pandas as pd
+import pytest
+from datetime import datetime, timezone
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from scraper import lambda_handler, scrape_lift_data, upload_df_to_s3
+from scraper import PIPELINE_METRICS_KEY, lambda_handler, load_lift_registry, store_snapshot, run_scrape, snapshot_batcher, parse_batch_event, parse_pipeline_event, publish_latest, record_events, scrape_lift_data, update_rollups, upload_df_to_s3
+import dedup
+import events
+import fanout
+import recent
+import scraper
+from sinks import MemorySink, read_df, read_text, write_df
+
+
+@pytest.fixture
+def derived_outputs():
+    """Patch the post-upload steps (rollups, events, latest state)"""
+    with patch('scraper.update_rollups') as rollups, \
+            patch('scraper.write_events') as record, \
+            patch('scraper.publish_latest') as publish:
+        yield {'rollups': rollups, 'events': record, 'latest': publish}
+
+
+@pytest.fixture
+def memory_sink():
+    """Send the handler's output to an in-memory sink, with no warm state from other tests"""
+    sink = MemorySink()
+    dedup._last_snapshots.clear()
+    recent._recent.clear()
+    with patch('scraper.sink_from_env', return_value=sink):
+        yield sink
+    dedup._last_snapshots.clear()
+    recent._recent.clear()
+    scraper._deferred.clear()
+    scraper._deferred_runs.clear()
+
+
+@pytest.fixture
+def run_lease():
+    """Patch the S3 lease so the handler always acquires it"""
+    with patch('scraper.acquire_run_lease') as acquire:
+        yield acquire
 
 
-@patch.dict(os.environ, {'S3_BUCKET': 'test-bucket'})
 @patch('scraper.scrape_lift_data')
-@patch('scraper.upload_df_to_s3')
 @patch('scraper.get_version')
-def test_lambda_handler_success(mock_get_version, mock_upload, mock_scrape, capsys):
+def test_lambda_handler_success(mock_get_version, mock_scrape, memory_sink, derived_outputs, run_lease, capsys):
     """Test that lambda_handler scrapes and uploads to S3 successfully"""
     # Mock version
     mock_get_version.return_value = '0.4'
     
     # Mock scrape_lift_data to return sample DataFrames
     status_df = pd.DataFrame([
-        {"Lift": "Lift 1", "Status": "Open"},
-        {"Lift": "Lift 2", "Status": "Closed"}
+        {"Map ID": 152, "Lift ID": 0, "Lift": "Lift 1", "Status": "Open"},
+        {"Map ID": 152, "Lift ID": 1, "Lift": "Lift 2", "Status": "Closed"}
     ])
     wait_time_df = pd.DataFrame([
-        {"Lift": "Lift 1", "Wait Time": 5},
-        {"Lift": "Lift 2", "Wait Time": "N/A"}
+        {"Map ID": 152, "Lift ID": 0, "Lift": "Lift 1", "Wait Time": 5},
+        {"Map ID": 152, "Lift ID": 1, "Lift": "Lift 2", "Wait Time": None}
     ])
     mock_scrape.return_value = (status_df, wait_time_df)
     
@@ -39,8 +76,14 @@ def test_lambda_handler_success(mock_get_version, mock_upload, mock_scrape, caps
     # Verify scrape was called
     mock_scrape.assert_called_once()
     
-    # Verify upload was called twice (status and wait_time)
-    assert mock_upload.call_count == 2
+    # Verify the status and wait_time objects were written
+    snapshot_keys = [key for key in memory_sink.objects if key.startswith(("status_", "wait_time_"))]
+    assert len(snapshot_keys) == 2
+    
+    # Verify derived outputs were updated from the same snapshot
+    derived_outputs['rollups'].assert_called_once()
+    derived_outputs['events'].assert_called_once()
+    derived_outputs['latest'].assert_called_once()
     
     # Verify response
     assert response['statusCode'] == 200
@@ -73,10 +116,9 @@ def test_lambda_handler_missing_bucket(mock_get_version, capsys):
     assert "ERROR: S3_BUCKET environment variable not set" in captured.out
 
 
-@patch.dict(os.environ, {'S3_BUCKET': 'test-bucket'})
 @patch('scraper.scrape_lift_data')
 @patch('scraper.get_version')
-def test_lambda_handler_scrape_error(mock_get_version, mock_scrape, capsys):
+def test_lambda_handler_scrape_error(mock_get_version, mock_scrape, memory_sink, run_lease, capsys):
     """Test that lambda_handler handles scraping errors gracefully"""
     # Mock version
     mock_get_version.return_value = '0.4'
@@ -110,7 +152,7 @@ def test_scrape_lift_data(mock_fetch, capsys):
         },
         {
             "lifts": [
-                {"name": "Lift C", "status": "Open", "waitTime": 10}
+                {"name": "Lift C", "status": "No Offload at KT-22", "waitTime": "10"}
             ]
         }
     ]
@@ -121,14 +163,25 @@ def test_scrape_lift_data(mock_fetch, capsys):
     # Verify DataFrames have correct structure
     assert len(status_df) == 3
     assert len(wait_time_df) == 3
-    assert list(status_df.columns) == ["Lift", "Status"]
-    assert list(wait_time_df.columns) == ["Lift", "Wait Time"]
+    assert list(status_df.columns) == ["Map ID", "Lift ID", "Lift", "Status", "Status Detail"]
+    assert list(wait_time_df.columns) == ["Map ID", "Lift ID", "Lift", "Wait Time"]
     
     # Verify data
+    assert list(status_df["Lift ID"]) == [0, 1, 2]
+    assert list(status_df["Map ID"]) == [152, 152, 1446]
     assert status_df.iloc[0]["Lift"] == "Lift A"
     assert status_df.iloc[0]["Status"] == "Open"
     assert wait_time_df.iloc[0]["Wait Time"] == 5
     
+    # Verify typed columns
+    assert str(wait_time_df["Wait Time"].dtype) == "Int16"
+    assert pd.isna(wait_time_df.iloc[1]["Wait Time"])
+    assert wait_time_df.iloc[2]["Wait Time"] == 10
+    assert isinstance(status_df["Status"].dtype, pd.CategoricalDtype)
+    assert status_df.iloc[2]["Status"] == "Limited"
+    assert status_df.iloc[2]["Status Detail"] == "No Offload at KT-22"
+    assert pd.isna(status_df.iloc[0]["Status Detail"])
+    
     # Verify logs
     captured = capsys.readouterr()
     assert "Lift: Lift A, Status: Open, Wait Time: 5 minutes" in captured.out
@@ -164,3 +217,381 @@ def test_upload_df_to_s3(mock_boto3, capsys):
     captured = capsys.readouterr()
     assert "Uploaded test/file.csv to s3://test-bucket/test/file.csv" in captured.out
 
+
+
+@patch('scraper.fetch_json_from_url')
+@patch('scraper.get_version')
+def test_lambda_handler_saves_new_registry(mock_get_version, mock_fetch, memory_sink, derived_outputs, run_lease):
+    """Test that lambda_handler persists the lift registry when new lifts are seen"""
+    mock_get_version.return_value = '0.4'
+    mock_fetch.return_value = {"lifts": [{"name": "Lift A", "status": "Open", "waitTime": 5}]}
+    
+    response = lambda_handler({}, None)
+    
+    assert response['statusCode'] == 200
+    assert list(read_df(memory_sink, 'lifts.csv')["Lift"]) == ["Lift A", "Lift A"]
+
+
+def test_concurrent_fan_out_batches_keep_distinct_lift_ids(memory_sink):
+    """Test that two fan-out batches that loaded state before either wrote neither collide nor lose lifts"""
+    payloads = {
+        152: {"lifts": [{"id": f"a{i}", "name": f"West {i}", "status": "Open", "waitTime": 5} for i in range(3)]},
+        1446: {"lifts": [{"id": f"b{i}", "name": f"East {i}", "status": "Open", "waitTime": 5} for i in range(3)]},
+    }
+    invocations = fanout.batch_events([[152], [1446]])
+    now = datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc)
+    # Both runs load the (empty) registry before either stores anything
+    registries = [load_lift_registry(memory_sink, event["output"]["prefix"]) for event in invocations]
+    
+    for registry, event in zip(registries, invocations):
+        map_id = event["map_ids"][0]
+        with patch('scraper.fetch_json_from_url', return_value=payloads[map_id]):
+            status_df, wait_time_df = scrape_lift_data(registry, [map_id])
+        store_snapshot(memory_sink, registry, status_df, wait_time_df, {}, event["output"]["prefix"], False, now)
+    
+    stored = read_df(memory_sink, 'lifts.csv')
+    assert list(stored["Lift ID"]) == [0, 1, 2, 3, 4, 5]
+    assert set(stored["Map ID"]) == {152, 1446}
+    west = read_df(memory_sink, 'maps-152/status_20260101_080000.csv')
+    east = read_df(memory_sink, 'maps-1446/status_20260101_080000.csv')
+    assert list(west["Lift ID"]) == [0, 1, 2] and list(east["Lift ID"]) == [3, 4, 5]
+    # State keyed by lift or map ID is shared at the base
+    assert set(json.loads(read_text(memory_sink, 'latest.json'))["resorts"]) == {"152", "1446"}
+    assert list(read_df(memory_sink, 'rollups/hourly/20260101.csv')["Lift ID"]) == [0, 1, 2, 3, 4, 5]
+    assert not [key for key in memory_sink.objects if key.startswith('maps-') and 'latest' in key]
+
+
+def test_replanned_resort_keeps_its_state(memory_sink):
+    """Test that moving resorts to new fan-out namespaces neither logs spurious events nor splits their history"""
+    from analytics import load_snapshot_matrix
+    payloads = {
+        152: {"lifts": [{"id": "a0", "name": "West", "status": "Open", "waitTime": 5}]},
+        1446: {"lifts": [{"id": "b0", "name": "East", "status": "Closed", "waitTime": None}]},
+    }
+    
+    def scrape(batches, minute):
+        for event in fanout.batch_events(batches):
+            registry = load_lift_registry(memory_sink, event["output"]["prefix"])
+            with patch('scraper.fetch_json_from_url', side_effect=lambda url, session: payloads[int(url.rsplit('/', 1)[1])]):
+                status_df, wait_time_df = scrape_lift_data(registry, event["map_ids"])
+            store_snapshot(memory_sink, registry, status_df, wait_time_df, {}, event["output"]["prefix"], False,
+                           datetime(2026, 1, 1, 8, minute, tzinfo=timezone.utc))
+    
+    scrape([[152, 1446]], 0)
+    # A new plan splits the batch, and the next runs land on cold containers
+    recent._recent.clear()
+    scrape([[152], [1446]], 1)
+    
+    log = read_df(memory_sink, 'events/20260101.csv')
+    assert list(log["Time"].astype(str)) == ["20260101_080000"] * 2
+    assert list(read_df(memory_sink, 'rollups/hourly/20260101.csv')["Samples"]) == [2, 2]
+    matrix = load_snapshot_matrix(sink=memory_sink)
+    assert len(matrix.times) == 2 and list(matrix.lift_ids) == [0, 1]
+    assert list(matrix.wait[0]) == [5, 5]
+
+
+@patch('scraper.scrape_lift_data')
+@patch('scraper.get_version')
+def test_lambda_handler_rollup_error_does_not_fail(mock_get_version, mock_scrape, memory_sink, derived_outputs, run_lease, capsys):
+    """Test that a rollup failure is logged but the scrape still succeeds"""
+    mock_get_version.return_value = '0.4'
+    derived_outputs['rollups'].side_effect = Exception("Throttled")
+    mock_scrape.return_value = (
+        pd.DataFrame([{"Lift ID": 0, "Lift": "Lift 1", "Status": "Open"}]),
+        pd.DataFrame([{"Lift ID": 0, "Lift": "Lift 1", "Wait Time": 5}])
+    )
+    
+    response = lambda_handler({}, None)
+    
+    assert response['statusCode'] == 200
+    captured = capsys.readouterr()
+    assert "ERROR: Rollup update failed: Throttled" in captured.out
+
+
+def test_update_rollups_writes_hourly_and_daily():
+    """Test that update_rollups writes both rollup objects for the snapshot time"""
+    from datetime import datetime, timezone
+    status_df = pd.DataFrame([{"Lift ID": 0, "Status": "Open"}])
+    wait_time_df = pd.DataFrame([{"Lift ID": 0, "Wait Time": 5}])
+    
+    sink = MemorySink()
+    
+    update_rollups(sink, status_df, wait_time_df, datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc))
+    
+    assert set(sink.objects) == {'rollups/hourly/20260102.csv', 'rollups/daily/202601.csv'}
+    assert read_df(sink, 'rollups/hourly/20260102.csv').iloc[0]["Period"] == "20260102_09"
+    assert read_df(sink, 'rollups/daily/202601.csv').iloc[0]["Minutes Open"] == 1
+
+
+def test_record_events_seeds_from_stored_snapshots():
+    """Test that a cold start takes each lift's last state from the stored snapshots and logs only changes"""
+    from datetime import datetime, timezone
+    now = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+    recent._recent.clear()
+    recent._stats.update(hits=0, misses=0, objects_read=0)
+    sink = MemorySink()
+    write_df(sink, pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "A", "Status": "Closed"},
+                                 {"Map ID": 152, "Lift ID": 1, "Lift": "B", "Status": "Open"}]),
+             'status_20260102_092900.csv')
+    write_df(sink, pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "A", "Wait Time": None},
+                                 {"Map ID": 152, "Lift ID": 1, "Lift": "B", "Wait Time": 5}]),
+             'wait_time_20260102_092900.csv')
+    status_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Status": "Open"}, {"Map ID": 152, "Lift ID": 1, "Status": "Open"}])
+    wait_time_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Wait Time": 5}, {"Map ID": 152, "Lift ID": 1, "Wait Time": 5}])
+    
+    new_events = record_events(sink, status_df, wait_time_df, now)
+    
+    assert [(e["Lift ID"], e["Event"], e["From"], e["To"]) for e in new_events] == [
+        (0, "status", "Closed", "Open"),
+        (0, "wait", "", "0"),
+    ]
+    assert len(read_df(sink, 'events/20260102.csv')) == 2
+    assert recent.stats()["objects_read"] == 2
+    
+    # A warm repeat of the same snapshot reads nothing and writes nothing
+    sink = Mock(wraps=MemorySink())
+    assert record_events(sink, status_df, wait_time_df, now) == []
+    sink.read.assert_not_called()
+    sink.write.assert_not_called()
+
+
+def test_cold_start_without_recent_runs_seeds_from_latest_state():
+    """Test that seeding falls back to the last published latest.json when nothing is recent"""
+    from datetime import datetime, timezone
+    now = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+    recent._recent.clear()
+    recent._stats.update(hits=0, misses=0, objects_read=0)
+    sink = MemorySink()
+    status_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "A", "Status": "Open"}])
+    wait_time_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "A", "Wait Time": 5}])
+    publish_latest(sink, status_df, wait_time_df, datetime(2026, 1, 1, 16, 0, tzinfo=timezone.utc))
+    
+    # Overnight the lift did not change, so the first morning run logs nothing
+    assert record_events(sink, status_df, wait_time_df, now) == []
+
+
+def test_publish_latest_writes_latest_json():
+    """Test that publish_latest writes the per-resort document to latest.json"""
+    import json
+    from datetime import datetime, timezone
+    status_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "KT-22", "Status": "Open", "Status Detail": None}])
+    wait_time_df = pd.DataFrame([{"Map ID": 152, "Lift ID": 0, "Lift": "KT-22", "Wait Time": 5}])
+    
+    sink = MemorySink()
+    
+    publish_latest(sink, status_df, wait_time_df, datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc))
+    
+    assert sink.content_types['latest.json'] == 'application/json'
+    assert json.loads(read_text(sink, 'latest.json'))["resorts"]["152"]["lifts"][0] == {
+        "id": 0, "name": "KT-22", "status": "Open", "detail": None, "wait": 5
+    }
+
+
+@patch('scraper.fetch_json_from_url')
+@patch('scraper.get_version')
+def test_lambda_handler_batch_event(mock_get_version, mock_fetch, memory_sink, derived_outputs, run_lease):
+    """Test that a batch event scrapes its map IDs into one combined object under its prefix"""
+    mock_get_version.return_value = '0.4'
+    mock_fetch.return_value = {"lifts": [{"name": "Lift A", "status": "Open", "waitTime": 5}]}
+    event = {"map_ids": [7, 8, 9], "output": {"prefix": "west/", "combined": True}}
+    
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    assert 'memory://west/' in response['body']
+    fetched = [call[0][0] for call in mock_fetch.call_args_list]
+    assert fetched == [f"https://vicomap-cdn.resorts-interactive.com/api/maps/{i}" for i in (7, 8, 9)]
+    
+    # All fetches share one session
+    sessions = {id(call[0][1]) for call in mock_fetch.call_args_list}
+    assert len(sessions) == 1
+    
+    snapshot_keys = [key for key in memory_sink.objects if 'snapshot_' in key]
+    assert len(snapshot_keys) == 1
+    assert snapshot_keys[0].startswith('west/snapshot_')
+    assert list(read_df(memory_sink, snapshot_keys[0])["Wait Time"]) == [5, 5, 5]
+    assert 'west/lifts.csv' in memory_sink.objects
+    
+    # Measured fetch time per map is recorded for fan-out planning, next to the run's cost signals
+    costs = json.loads(read_text(memory_sink, fanout.MAP_COSTS_KEY))
+    assert set(costs["maps"]) == {"7", "8", "9"}
+    run = costs["runs"][-1]
+    assert run["fetch"] == 1 and set(run["maps"]) == {"7", "8", "9"}
+    assert run["rss_before_mb"] > 0 and run["rss_peak_mb"] >= run["rss_before_mb"]
+
+
+@patch('scraper.fetch_json_from_url')
+@patch('scraper.get_version')
+def test_lambda_handler_pipelined_batches(mock_get_version, mock_fetch, memory_sink, derived_outputs, run_lease):
+    """Test that a pipelined event writes each batch like a sequential run and reports stage metrics"""
+    mock_get_version.return_value = '0.4'
+    mock_fetch.side_effect = lambda url, session: {
+        "lifts": [{"name": f"Lift {url.rsplit('/', 1)[1]}", "status": "Open", "waitTime": 5}]
+    }
+    event = {
+        "pipeline": {"fetch": 3, "queue": 1},
+        "batches": [
+            {"map_ids": [7, 8, 9], "output": {"prefix": "west/", "combined": True}},
+            {"map_ids": [10], "output": {"prefix": "east/"}},
+        ],
+    }
+    
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    assert 'memory://west/' in response['body'] and 'memory://east/' in response['body']
+    west_key = next(key for key in memory_sink.objects if key.startswith('west/snapshot_'))
+    # Rows keep batch order regardless of which fetch finished first
+    assert list(read_df(memory_sink, west_key)["Map ID"]) == [7, 8, 9]
+    assert any(key.startswith('east/status_') for key in memory_sink.objects)
+    assert run_lease.call_count == 2
+    
+    stages = {stage["stage"]: stage for stage in response['stages']}
+    assert (stages["fetch"]["items"], stages["fetch"]["workers"]) == (4, 3)
+    # Frames are built in their own stage, one item per completed batch
+    assert (stages["build"]["items"], stages["write"]["items"]) == (4, 2)
+    assert stages["write"]["queue_size"] == 1
+    assert json.loads(read_text(memory_sink, PIPELINE_METRICS_KEY))["stages"] == response['stages']
+    run = json.loads(read_text(memory_sink, fanout.MAP_COSTS_KEY))["runs"][-1]
+    assert run["fetch"] == 3 and set(run["maps"]) == {"7", "8", "9", "10"}
+
+
+def test_parse_pipeline_event():
+    """Test that only events with a pipeline key run staged, filling in default settings"""
+    assert parse_pipeline_event({"map_ids": [5]}) == (None, None)
+    batches, settings = parse_pipeline_event({"map_ids": [5], "pipeline": {"write": "4", "unknown": 1}})
+    assert batches == [([5], '', False)]
+    assert settings == {"fetch": 8, "extract": 2, "build": 2, "write": 4, "queue": 16}
+
+
+def test_parse_batch_event_defaults():
+    """Test that non-batch events fall back to the default maps and output"""
+    assert parse_batch_event({"source": "aws.events"}) == ([152, 1446], '', False)
+    assert parse_batch_event(None) == ([152, 1446], '', False)
+    assert parse_batch_event({"map_ids": ["5"], "output": {"combined": True}}) == ([5], '', True)
+
+
+@patch('scraper.scrape_lift_data')
+@patch('scraper.get_version')
+def test_lambda_handler_skips_when_lease_held(mock_get_version, mock_scrape, memory_sink, run_lease, capsys):
+    """Test that an overlapping invocation skips without scraping"""
+    mock_get_version.return_value = '0.4'
+    run_lease.return_value = None
+    
+    response = lambda_handler({}, None)
+    
+    assert response['statusCode'] == 200
+    assert 'Scraper skipped' in response['body']
+    mock_scrape.assert_not_called()
+
+
+@patch('scraper.scrape_lift_data')
+@patch('scraper.get_version')
+def test_lambda_handler_releases_lease_on_error(mock_get_version, mock_scrape, memory_sink, run_lease):
+    """Test that the lease is released without marking the slot completed when the scrape fails"""
+    mock_get_version.return_value = '0.4'
+    mock_scrape.side_effect = Exception("Network error")
+    
+    response = lambda_handler({}, None)
+    
+    assert response['statusCode'] == 500
+    run_lease.return_value.release.assert_called_once_with(completed=False)
+
+
+@patch('scraper.fetch_json_from_url')
+@patch('scraper.get_version')
+def test_lambda_handler_records_marker_for_unchanged_snapshot(mock_get_version, mock_fetch, memory_sink, derived_outputs,
+                                                              run_lease):
+    """Test that an identical snapshot is stored as an index marker, not a full object"""
+    mock_get_version.return_value = '0.4'
+    mock_fetch.return_value = {"lifts": [{"name": "Lift A", "status": "Open", "waitTime": 5}]}
+    
+    # First run stores the full snapshot and remembers it
+    with patch('scraper.datetime') as mock_datetime:
+        mock_datetime.now.return_value = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+        lambda_handler({"map_ids": [152]}, None)
+        
+        # Second identical run, a minute later, only appends a marker pointing at the first
+        mock_datetime.now.return_value = datetime(2026, 1, 2, 9, 31, tzinfo=timezone.utc)
+        lambda_handler({"map_ids": [152]}, None)
+    
+    first_row, marker = read_df(memory_sink, 'index/20260102.csv').fillna("").to_dict('records')
+    assert first_row["Unchanged Since"] == ""
+    assert first_row["Status Key"].startswith("status_")
+    assert marker["Hash"] == first_row["Hash"]
+    assert marker["Status Key"] == first_row["Status Key"]
+    assert marker["Unchanged Since"] == first_row["Time"]
+    assert len([key for key in memory_sink.objects if key.startswith(("status_", "wait_time_"))]) == 2
+
+
+@patch('scraper.fetch_json_from_url')
+def test_scrape_lift_data_extracts_other_entities(mock_fetch):
+    """Test that trails come from the same fetch as lifts"""
+    mock_fetch.return_value = {
+        "lifts": [{"name": "Lift A", "status": "Open", "waitTime": 5}],
+        "trails": [{"name": "Trail A", "status": "Closed"}],
+    }
+    entities = {}
+    
+    status_df, _ = scrape_lift_data(map_ids=[152], entities=entities)
+    
+    assert mock_fetch.call_count == 1
+    assert len(status_df) == 1
+    assert list(entities["trails"]["Trail"]) == ["Trail A"]
+    assert entities["pois"].empty
+
+
+@patch('scraper.fetch_json_from_url')
+@patch('scraper.get_version')
+def test_lambda_handler_writes_to_output_dir(mock_get_version, mock_fetch, tmp_path, derived_outputs):
+    """Test that OUTPUT_DIR runs the whole handler offline against a local directory"""
+    mock_get_version.return_value = '0.4'
+    mock_fetch.return_value = {"lifts": [{"name": "Lift A", "status": "Open", "waitTime": 5}]}
+    dedup._last_snapshots.clear()
+    
+    with patch.dict(os.environ, {'OUTPUT_DIR': str(tmp_path)}, clear=True):
+        response = lambda_handler({"map_ids": [152]}, None)
+    dedup._last_snapshots.clear()
+    
+    assert response['statusCode'] == 200
+    assert str(tmp_path) in response['body']
+    names = {path.name for path in tmp_path.rglob('*.csv')}
+    assert 'lifts.csv' in names
+    assert any(name.startswith('status_') for name in names)
+    # The run's lock file was released
+    assert not list(tmp_path.rglob('*.lock'))
+
+
+@patch('scraper.fetch_json_from_url')
+def test_run_scrape_with_batcher_coalesces_runs(mock_fetch, memory_sink, derived_outputs):
+    """Test that batched runs land in one object that analytics reads like separate snapshots"""
+    from analytics import load_snapshot_matrix
+    waits = iter([5, 5, 10])
+    mock_fetch.side_effect = lambda url, session: {
+        "lifts": [{"name": "Lift A", "status": "Open", "waitTime": next(waits)}],
+        "trails": [{"name": "Trail A", "status": "Open"}],
+    }
+    batcher = snapshot_batcher(memory_sink, max_members=10)
+    
+    for minute in range(3):
+        run_scrape(memory_sink, [152], '', False, datetime(2026, 1, 1, 8, minute, tzinfo=timezone.utc), batcher)
+    # Nothing per-run is written until the batch is flushed, derived state included, except latest.json
+    assert not [key for key in memory_sink.objects if key.startswith(("status_", "trails_", "index/"))]
+    assert not [key for key in memory_sink.objects if key.startswith(("rollups/", "events/", "metrics/"))]
+    assert not derived_outputs['rollups'].called
+    assert derived_outputs['latest'].call_count == 3
+    assert derived_outputs['latest'].call_args[0][3] == datetime(2026, 1, 1, 8, 2, tzinfo=timezone.utc)
+    batcher.close()
+    
+    # The flush folds all three runs into each derived object at once
+    assert list(read_df(memory_sink, "rollups/hourly/20260101.csv")["Samples"]) == [3]
+    assert derived_outputs['latest'].call_count == 3
+    costs = json.loads(read_text(memory_sink, fanout.MAP_COSTS_KEY))
+    assert set(costs["maps"]) == {"152"} and len(costs["runs"]) == 3
+    
+    assert [key for key in memory_sink.objects if key.startswith("batches/")] == ["batches/batch_20260101_080000.snap"]
+    matrix = load_snapshot_matrix(sink=memory_sink)
+    assert list(matrix.wait[0]) == [5, 5, 10]
+    last = json.loads(read_text(memory_sink, 'index/last.json'))
+    assert last["Status Key"] == "batches/batch_20260101_080000.snap#snapshot_20260101_080200"
+    assert list(read_df(memory_sink, "batches/batch_20260101_080000.snap#trails_20260101_080000")["Trail"]) == ["Trail A"]
@@ -0,0 +1,194 @@
+"""
+Unit tests for sinks.py
+"""
+import gzip
+import os
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from botocore.exceptions import ClientError
+from sinks import LocalSink, MemorySink, S3Sink, read_df, read_text, sink_from_env, update_text, write_df
+
+
+@pytest.fixture(params=['local', 'memory'])
+def sink(request, tmp_path):
+    """Each offline backend"""
+    if request.param == 'local':
+        return LocalSink(str(tmp_path))
+    return MemorySink()
+
+
+def test_dataframe_round_trip(sink):
+    """Test that a DataFrame written as CSV reads back unchanged"""
+    df = pd.DataFrame([{"Lift ID": 0, "Lift": "KT-22", "Wait Time": 5}])
+
+    write_df(sink, df, 'west/status_20260102_093000.csv')
+
+    pd.testing.assert_frame_equal(read_df(sink, 'west/status_20260102_093000.csv'), df)
+    assert read_df(sink, 'missing.csv') is None
+
+
+def test_list_filters_prefix_and_start_after(sink):
+    """Test that listing is sorted, prefix-filtered and resumes after start_after"""
+    sink.write_many([(key, 'x', 'text/csv') for key in (
+        'status_20260102_093100.csv', 'status_20260102_093000.csv', 'index/20260102.csv', 'wait_time_20260102_093000.csv'
+    )])
+
+    assert list(sink.list('status_')) == ['status_20260102_093000.csv', 'status_20260102_093100.csv']
+    assert list(sink.list('status_', 'status_20260102_093000.csv')) == ['status_20260102_093100.csv']
+    assert list(sink.list('index/')) == ['index/20260102.csv']
+
+
+def test_compressed_objects_read_back_transparently(tmp_path):
+    """Test that compress=True stores gzip under the same key and read() inflates it"""
+    sink = LocalSink(str(tmp_path), compress=True)
+
+    sink.write('latest.json', '{"resorts": {}}', 'application/json')
+
+    with open(tmp_path / 'latest.json', 'rb') as f:
+        assert gzip.decompress(f.read()) == b'{"resorts": {}}'
+    assert read_text(sink, 'latest.json') == '{"resorts": {}}'
+
+    # An uncompressed reader of the same directory still decodes it
+    assert read_text(LocalSink(str(tmp_path)), 'latest.json') == '{"resorts": {}}'
+
+
+def test_local_atomic_write_leaves_no_temporary_files(tmp_path):
+    """Test that atomic writes rename into place and overwrite whole files"""
+    sink = LocalSink(str(tmp_path))
+
+    sink.write('lifts.csv', 'a' * 1000)
+    sink.write('lifts.csv', 'b')
+
+    assert os.listdir(tmp_path) == ['lifts.csv']
+    assert sink.read('lifts.csv') == b'b'
+
+
+def test_s3_sink_puts_and_maps_missing_keys_to_none():
+    """Test the S3 backend's put parameters and NoSuchKey handling"""
+    s3_client = Mock()
+    s3_client.get_object.side_effect = ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+    sink = S3Sink('test-bucket', s3_client=s3_client, compress=True)
+
+    sink.write_many([('a.csv', 'x', 'text/csv'), ('b.csv', 'y', 'text/csv')])
+
+    puts = {call[1]['Key']: call[1] for call in s3_client.put_object.call_args_list}
+    assert set(puts) == {'a.csv', 'b.csv'}
+    assert puts['a.csv']['ContentEncoding'] == 'gzip'
+    assert gzip.decompress(puts['a.csv']['Body']) == b'x'
+    assert sink.read('missing.csv') is None
+
+
+def test_read_range_returns_stored_bytes(sink):
+    """Test offset and suffix ranges, and that raw writes skip compression"""
+    sink.compress = True
+    sink.write('batch.snap', b'0123456789', 'application/octet-stream', raw=True)
+
+    assert sink.read_range('batch.snap', 2, 5) == b'234'
+    assert sink.read_range('batch.snap', -3) == b'789'
+    assert sink.read_range('batch.snap', -100) == b'0123456789'
+    assert sink.read_range('missing.snap', 0, 1) is None
+
+
+def test_s3_read_range_sends_range_header():
+    """Test that S3 range reads map to HTTP Range requests"""
+    s3_client = Mock()
+    s3_client.get_object.return_value = {'Body': Mock(read=Mock(return_value=b'tail'))}
+    sink = S3Sink('test-bucket', s3_client=s3_client)
+
+    assert sink.read_range('batch.snap', -4) == b'tail'
+    sink.read_range('batch.snap', 10, 20)
+
+    ranges = [call[1]['Range'] for call in s3_client.get_object.call_args_list]
+    assert ranges == ['bytes=-4', 'bytes=10-19']
+
+
+def test_write_if_rejects_stale_versions(sink):
+    """Test that a conditional write only succeeds on the version that was read"""
+    assert sink.write_if('lifts.csv', 'a', 'text/csv', None) is not None
+    assert sink.write_if('lifts.csv', 'b', 'text/csv', None) is None
+
+    body, version = sink.read_versioned('lifts.csv')
+    assert body == b'a'
+    assert sink.write_if('lifts.csv', 'c', 'text/csv', version) is not None
+    assert sink.write_if('lifts.csv', 'd', 'text/csv', version) is None
+    assert sink.read('lifts.csv') == b'c'
+    assert sink.read_versioned('missing.csv') == (None, None)
+
+
+def test_update_text_retries_after_a_concurrent_write(sink):
+    """Test that a read-modify-write that loses a race re-reads and applies its change again"""
+    sink.write('counter.json', '1', 'application/json')
+    calls = []
+
+    def increment(text):
+        calls.append(text)
+        if len(calls) == 1:
+            # Another writer gets in between our read and our write
+            sink.write('counter.json', '10', 'application/json')
+        return str(int(text) + 1)
+
+    assert update_text(sink, 'counter.json', increment) == '11'
+    assert calls == ['1', '10']
+
+
+def test_s3_write_if_sends_conditions():
+    """Test that S3 conditional writes use If-None-Match / If-Match and report lost races as None"""
+    s3_client = Mock()
+    s3_client.put_object.side_effect = [
+        {'ETag': '"v1"'}, ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'PutObject')
+    ]
+    sink = S3Sink('test-bucket', s3_client=s3_client)
+
+    assert sink.write_if('lifts.csv', 'a', 'text/csv', None) == '"v1"'
+    assert sink.write_if('lifts.csv', 'b', 'text/csv', '"v0"') is None
+
+    first, second = [call[1] for call in s3_client.put_object.call_args_list]
+    assert first['IfNoneMatch'] == '*' and second['IfMatch'] == '"v0"'
+
+
+def test_read_if_changed_skips_unchanged_objects(sink):
+    """Test that polling returns the body only when the version moved"""
+    assert sink.read_if_changed('latest.json', None) == (None, None)
+    sink.write('latest.json', '{}', 'application/json')
+    body, version = sink.read_if_changed('latest.json', None)
+    
+    assert body == b'{}'
+    assert sink.read_if_changed('latest.json', version) == (None, version)
+    sink.write('latest.json', '{"a": 1}', 'application/json')
+    assert sink.read_if_changed('latest.json', version)[0] == b'{"a": 1}'
+
+
+def test_s3_read_if_changed_sends_if_none_match():
+    """Test that S3 polling is a conditional GET and 304 means unchanged"""
+    s3_client = Mock()
+    s3_client.get_object.side_effect = [
+        {'Body': Mock(read=Mock(return_value=b'{}')), 'ETag': '"v1"'},
+        ClientError({'Error': {'Code': '304'}}, 'GetObject'),
+    ]
+    sink = S3Sink('test-bucket', s3_client=s3_client)
+    
+    assert sink.read_if_changed('latest.json', None) == (b'{}', '"v1"')
+    assert sink.read_if_changed('latest.json', '"v1"') == (None, '"v1"')
+    assert s3_client.get_object.call_args_list[1][1]['IfNoneMatch'] == '"v1"'
+
+
+def test_sink_from_env(monkeypatch, tmp_path):
+    """Test that OUTPUT_DIR takes precedence over S3_BUCKET"""
+    monkeypatch.delenv('S3_BUCKET', raising=False)
+    monkeypatch.delenv('OUTPUT_DIR', raising=False)
+    assert sink_from_env() is None
+
+    monkeypatch.setenv('S3_BUCKET', 'test-bucket')
+    monkeypatch.setenv('OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setenv('OUTPUT_COMPRESS', '1')
+    sink = sink_from_env()
+
+    assert isinstance(sink, LocalSink)
+    assert sink.compress
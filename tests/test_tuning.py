@@ -0,0 +1,138 @@
+"""
+Unit tests for tuning.py
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from tuning import (MemoryProbe, append_run, choose_settings, cost_model, fetch_makespan, fold_run_costs, project,
+                    run_record, tuned_events)
+
+
+NOW = datetime(2026, 1, 2, 9, 30, tzinfo=timezone.utc)
+
+
+def recorded_runs(map_count=12, latency=1.0, cpu_per_map=0.05, overhead=0.5, memory=100.0, per_fetch=2.0):
+    """Sequential runs plus one with 4 fetch workers, consistent with the given costs"""
+    fetch_seconds = {map_id: latency for map_id in range(map_count)}
+    fetch_bytes = {map_id: 200_000 for map_id in range(map_count)}
+    runs = []
+    for workers in (1, 1, 4):
+        wall = overhead + max(fetch_makespan(list(fetch_seconds.values()), workers), cpu_per_map * map_count)
+        probe = {"rss_before_mb": memory, "rss_after_mb": memory,
+                 "rss_peak_mb": memory + per_fetch * workers}
+        runs = append_run(runs, run_record(NOW, fetch_seconds, fetch_bytes, cpu_per_map * map_count, wall, workers,
+                                           probe))
+    return runs
+
+
+def test_fetch_makespan_hands_maps_to_free_workers():
+    """Test that fetches are scheduled in order onto the first free worker"""
+    assert fetch_makespan([3, 1, 1, 1], 1) == 6
+    assert fetch_makespan([3, 1, 1, 1], 2) == 3
+    assert fetch_makespan([1, 1, 1, 1], 8) == 1
+    assert fetch_makespan([], 4) == 0
+
+
+def test_cost_model_recovers_recorded_costs():
+    """Test that latency, CPU, overhead and memory growth are fitted from run records"""
+    model = cost_model(recorded_runs())
+
+    assert model["maps"]["3"] == {"seconds": 1.0, "bytes": 200_000}
+    assert abs(model["cpu_per_map"] - 0.05) < 1e-9
+    assert abs(model["overhead_seconds"] - 0.5) < 1e-6
+    assert model["base_memory_mb"] == 100.0
+    # 8MB above the starting RSS at peak with 4 concurrent fetches
+    assert abs(model["memory_per_fetch_mb"] - 2.0) < 1e-9
+
+
+def test_cost_model_ignores_lifetime_peaks():
+    """Test that records without a per-run probe fall back to the payload estimate"""
+    runs = recorded_runs()
+    for run in runs:
+        for field in ("rss_before_mb", "rss_after_mb", "rss_peak_mb"):
+            del run[field]
+        run["peak_memory_mb"] = 900.0
+
+    model = cost_model(runs)
+
+    assert model["base_memory_mb"] == 0.0
+    assert abs(model["memory_per_fetch_mb"] - 200_000 * 10 / (1024 * 1024)) < 1e-9
+
+
+def test_memory_probe_samples_the_run():
+    """Test that the probe reports the run's own RSS peak and stops its sampler"""
+    with MemoryProbe() as probe:
+        buffer = bytearray(64 * 1024 * 1024)
+        buffer[::4096] = b'x' * len(buffer[::4096])
+        time.sleep(0.05)
+        del buffer
+
+    memory = probe.result()
+
+    assert memory["rss_peak_mb"] - memory["rss_before_mb"] > 48
+    assert memory["rss_peak_mb"] >= memory["rss_after_mb"] > 0
+    assert not probe._sampler.is_alive()
+
+
+def test_fold_run_costs_keeps_one_table():
+    """Test that run records fold into the smoothed map costs and the run history together"""
+    legacy = {"3": 2.0}
+    runs = recorded_runs(map_count=4)
+
+    table = fold_run_costs(legacy, runs[:1])
+    table = fold_run_costs(table, runs[1:])
+
+    assert len(table["runs"]) == 3
+    assert set(table["maps"]) == {"0", "1", "2", "3"}
+    assert 1.0 < table["maps"]["3"] < 2.0
+
+
+def test_append_run_keeps_newest():
+    """Test that the history is capped at the newest records"""
+    runs = []
+    for index in range(5):
+        runs = append_run(runs, {"index": index}, keep=3)
+    assert [run["index"] for run in runs] == [2, 3, 4]
+
+
+def test_choose_settings_beats_sequential_within_limits():
+    """Test that the tuner adds fetch workers until CPU bounds the run, within budget and memory"""
+    model = cost_model(recorded_runs(map_count=40, cpu_per_map=0.1))
+    map_ids = list(range(40))
+    limits = {"max_fetch": 16, "max_batch_size": 25, "budget_seconds": 20, "memory_mb": 512}
+
+    sequential = project(model, [map_ids[:25], map_ids[25:]], 1, limits)
+    choice = choose_settings(model, map_ids, limits)
+
+    assert choice["feasible"] and not sequential["feasible"]
+    assert choice["total_seconds"] < sequential["total_seconds"] / 4
+    # Beyond 10 workers each map's 1s fetch hides behind the 0.1s of CPU per map
+    assert choice["fetch"] <= 10
+    assert sorted(m for batch in choice["batches"] for m in batch) == map_ids
+    assert all(seconds <= 20 for seconds in choice["invocation_seconds"])
+
+
+def test_choose_settings_respects_memory_limit():
+    """Test that concurrency is capped when each concurrent fetch costs a lot of memory"""
+    model = cost_model(recorded_runs(per_fetch=50.0))
+
+    choice = choose_settings(model, list(range(12)), {"memory_mb": 512})
+
+    assert choice["feasible"]
+    assert choice["peak_memory_mb"] <= 512 * 0.8
+    assert choice["fetch"] == 6
+
+
+def test_tuned_events_are_pipelined_batch_events():
+    """Test that a choice becomes one pipelined batch event per invocation"""
+    choice = {"fetch": 4, "batches": [[1, 2], [3]]}
+
+    assert tuned_events(choice, {"prefix": "west/"}) == [
+        {"map_ids": [1, 2], "output": {"prefix": "west/maps-1-2/"}, "pipeline": {"fetch": 4}},
+        {"map_ids": [3], "output": {"prefix": "west/maps-3/"}, "pipeline": {"fetch": 4}},
+    ]